@@ -4,11 +4,12 @@ from .models import App
 
 @admin.register(App)
 class AppAdmin(admin.ModelAdmin):
-    list_display = ('title', 'owner', 'price', 'verification_status', 'created_at')
+    list_display = ('title', 'owner', 'price', 'verification_status', 'purchase_count', 'created_at')
     list_filter = ('verification_status', 'created_at')
-    search_fields = ('title', 'owner__username')
+    list_select_related = ('owner',)
+    search_fields = ('title', 'owner__email')
     ordering = ('-created_at',)
-    actions = ['verify_apps']
+    actions = ['verify_apps', 'reject_apps']
 
     @admin.action(description="Verify selected apps")
     def verify_apps(self, request, queryset):
@@ -16,10 +17,13 @@ class AppAdmin(admin.ModelAdmin):
         Custom admin action to verify selected apps.
         Apps that are already verified will be skipped.
         """
-        count = 0
-        for app in queryset:
-            if not app.verified_date:  # Skip already verified apps
-                app.verify()
-                count += 1
+        count = queryset.verify()
 
         self.message_user(request, f"{count} app(s) verified successfully.")
+
+    @admin.action(description="Reject selected apps")
+    def reject_apps(self, request, queryset):
+        """Reject the selected apps, skipping the ones already rejected."""
+        count = queryset.reject()
+
+        self.message_user(request, f"{count} app(s) rejected successfully.")
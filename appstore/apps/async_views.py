@@ -0,0 +1,74 @@
+"""
+Async views for the app catalog
+"""
+import base64
+from urllib.parse import urlencode
+
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.dateparse import parse_datetime
+
+from apps.models import App
+from apps.pagination import AppCursorPagination
+from apps.serializers import AppDetailSerializer, AppSerializer
+from core.async_views import async_api_view
+
+
+def encode_cursor(app):
+    return base64.urlsafe_b64encode(f'{app.created_at.isoformat()}|{app.pk}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the ``(created_at, id)`` position encoded in cursor, or None if it is invalid."""
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return parse_datetime(created_at), int(pk)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def get_page_size(request):
+    try:
+        page_size = int(request.GET.get('page_size', AppCursorPagination.page_size))
+    except ValueError:
+        return AppCursorPagination.page_size
+    return max(1, min(page_size, AppCursorPagination.max_page_size))
+
+
+@async_api_view
+async def app_list(request):
+    """
+    Newest apps first, with the same keyset pagination as the sync list:
+    every page is one indexed ``WHERE (created_at, id) < cursor`` query.
+    """
+    page_size = get_page_size(request)
+    queryset = App.objects.only('id', 'created_at', 'title', 'price', 'verification_status').read_only()
+    queryset = queryset.order_by(*AppCursorPagination.ordering)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None or position[0] is None:
+            return JsonResponse({'detail': 'Invalid cursor'}, status=404)
+        created_at, pk = position
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    apps = [app async for app in queryset[:page_size + 1].aiterator()]
+    next_url = None
+    if len(apps) > page_size:
+        apps = apps[:page_size]
+        params = {**request.GET.dict(), 'cursor': encode_cursor(apps[-1])}
+        next_url = request.build_absolute_uri(f'{request.path}?{urlencode(params)}')
+
+    return JsonResponse({'next': next_url, 'results': AppSerializer(apps, many=True).data})
+
+
+@async_api_view
+async def app_detail(request, pk):
+    try:
+        app = await App.objects.read_only().only(
+            'id', 'title', 'price', 'verification_status', 'description',
+        ).aget(pk=pk)
+    except App.DoesNotExist:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    return JsonResponse(AppDetailSerializer(app).data)
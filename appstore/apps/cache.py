@@ -0,0 +1,159 @@
+"""
+Read-through cache for serialized app catalog payloads.
+"""
+import hashlib
+import itertools
+import os
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import transaction
+
+from core.cache import TieredCache
+
+
+_token_counter = itertools.count()
+
+
+def _new_token():
+    """
+    Return a version token that is unique across processes and restarts. It
+    starts with the time it was issued, in milliseconds, see ``token_issued_at()``.
+    """
+    return f'{int(time.time() * 1000):x}.{os.getpid():x}.{os.urandom(4).hex()}.{next(_token_counter):x}'
+
+
+def token_issued_at(token):
+    return datetime.fromtimestamp(int(token.split('.', 1)[0], 16) / 1000, tz=timezone.utc)
+
+
+def _plain(data):
+    """
+    Copy DRF ``ReturnDict``/``ReturnList`` payloads into plain containers,
+    so cached entries do not keep the serializer (and its instances) alive.
+    """
+    if isinstance(data, dict):
+        return {key: _plain(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_plain(value) for value in data]
+    return data
+
+
+class CatalogCache:
+    """
+    Two-tier cache for serialized ``AppSerializer``/``AppDetailSerializer``
+    payloads.
+
+    Entries are kept in an in-process LRU and, if there is one, in the
+    shared cache as well so every worker benefits from a fill (see
+    ``TieredCache``). Keys embed version tokens, kept in the shared cache
+    only: one for the whole catalog (list pages) and one per app (detail
+    payloads). Invalidating is just replacing a token, after which the stale
+    entries are never addressed again and age out on their own.
+
+    Without a shared tier the version tokens are per process, so other
+    workers only notice a change once their entries and tokens expire after
+    ``timeout`` seconds.
+    """
+    CATALOG_VERSION_KEY = 'apps:version:catalog'
+
+    def __init__(self, max_entries=1024, timeout=300, shared_cache=None):
+        self.timeout = timeout
+        self.entries = TieredCache(max_entries, timeout, shared_cache, local_copies=True)
+        # Bounded as well: a forgotten token only costs a cache miss. Local
+        # tokens also expire, the list ETags are built from them.
+        self._versions = TieredCache(max_entries * 4, timeout, shared_cache)
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'APP_CATALOG_CACHE', {})
+        return cls(
+            max_entries=options.get('MAX_ENTRIES', 1024),
+            timeout=options.get('TIMEOUT', 300),
+            shared_cache=getattr(settings, 'SHARED_CACHE', None),
+        )
+
+    @staticmethod
+    def app_version_key(pk):
+        return f'apps:version:app:{pk}'
+
+    def _get_version(self, key):
+        token = self._versions.get(key)
+        if token is None:
+            # Whoever adds first wins, the others read its token back.
+            self._versions.add(key, _new_token(), timeout=None)
+            token = self._versions.get(key)
+        return token
+
+    def _bump(self, keys):
+        self._versions.set_many({key: _new_token() for key in keys}, timeout=None)
+
+    def catalog_version(self):
+        """
+        Return the catalog version token and when it was issued, which is no
+        earlier than the last change to the catalog.
+        """
+        token = self._get_version(self.CATALOG_VERSION_KEY)
+        return token, token_issued_at(token)
+
+    @property
+    def is_shared(self):
+        """Whether the version tokens are shared by every worker."""
+        return self._versions.shared is not None
+
+    def version_issued_at(self, key):
+        """Return when the current token of the version key was issued."""
+        return token_issued_at(self._get_version(key))
+
+    def list_key(self, url):
+        """Return the key for a list page, identified by its absolute URL."""
+        digest = hashlib.md5(url.encode()).hexdigest()
+        return f'apps:list:{self._get_version(self.CATALOG_VERSION_KEY)}:{digest}'
+
+    def detail_key(self, pk, url):
+        """Return the key for the detail payload of one app."""
+        digest = hashlib.md5(url.encode()).hexdigest()
+        return f'apps:detail:{pk}:{self._get_version(self.app_version_key(pk))}:{digest}'
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, data):
+        self.entries.set(key, _plain(data))
+
+    def invalidate_apps(self, pks):
+        """
+        Bump the catalog version and the versions of the given apps.
+
+        The bump is repeated once the surrounding transaction commits, so a
+        reader that filled the cache from the pre-commit snapshot in the
+        meantime does not leave a stale entry behind.
+        """
+        keys = [self.CATALOG_VERSION_KEY] + [self.app_version_key(pk) for pk in pks]
+        self._bump(keys)
+        transaction.on_commit(lambda: self._bump(keys))
+
+    def invalidate_app(self, pk):
+        self.invalidate_apps([pk])
+
+    def clear(self):
+        """Forget every local entry and version token and reset the counters."""
+        self.entries.clear()
+        self._versions.clear()
+
+    def stats(self):
+        local = self.entries.local.stats()
+        shared_hits = self.entries.shared_hits
+        return {
+            'local_hits': local['hits'],
+            'local_misses': local['misses'],
+            'local_size': local['size'],
+            'shared_hits': shared_hits,
+            'shared_misses': self.entries.shared_misses,
+            'hits': local['hits'] + shared_hits,
+            'misses': local['misses'] - shared_hits,
+        }
+
+
+catalog_cache = CatalogCache.from_settings()
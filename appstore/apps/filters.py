@@ -0,0 +1,77 @@
+"""
+Filtering and ordering for the app APIs.
+"""
+from decimal import Decimal
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+from apps.models import App
+
+
+class AppFilterSerializer(serializers.Serializer):
+    """Validate the filter query parameters of the app list."""
+    verification_status = serializers.ChoiceField(choices=App.STATUS_CHOICES, required=False)
+    owner = serializers.IntegerField(min_value=1, required=False)
+    price_min = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'), required=False)
+    price_max = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'), required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        price_min, price_max = attrs.get('price_min'), attrs.get('price_max')
+        if price_min is not None and price_max is not None and price_min > price_max:
+            raise serializers.ValidationError({'price_max': 'Must not be lower than price_min.'})
+        after, before = attrs.get('created_after'), attrs.get('created_before')
+        if after and before and after >= before:
+            raise serializers.ValidationError({'created_before': 'Must be later than created_after.'})
+        return attrs
+
+
+class AppFilterBackend(BaseFilterBackend):
+    """
+    Filter the app list by ``verification_status``, ``owner``, a
+    ``price_min``/``price_max`` range and a ``created_after``/``created_before``
+    range. Invalid values are answered with a 400 instead of being ignored.
+    """
+    lookups = {
+        'verification_status': 'verification_status',
+        'owner': 'owner_id',
+        'price_min': 'price__gte',
+        'price_max': 'price__lte',
+        'created_after': 'created_at__gte',
+        'created_before': 'created_at__lt',
+    }
+
+    @classmethod
+    def get_filters(cls, request):
+        """Return the validated ``{lookup: value}`` filters of request."""
+        serializer = AppFilterSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            raise ValidationError(serializer.errors)
+        return {cls.lookups[name]: value for name, value in serializer.validated_data.items()}
+
+    def filter_queryset(self, request, queryset, view):
+        if getattr(view, 'action', None) != 'list':
+            return queryset
+        return queryset.filter(**self.get_filters(request))
+
+
+class AppOrderingFilter(OrderingFilter):
+    """
+    Order the app list by one of the view's ``ordering_fields``.
+
+    Extra fields are dropped and ``id`` is appended as a tie breaker in the
+    same direction, so the cursor pagination keys on a unique position and
+    every ordering stays on one of the ``(field, id)`` indexes.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        field = ordering[0]
+        if field.lstrip('-') == 'id':
+            return (field,)
+        return (field, '-id' if field.startswith('-') else 'id')
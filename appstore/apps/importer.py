@@ -0,0 +1,138 @@
+"""
+Bulk import of apps from CSV or NDJSON files.
+"""
+import csv
+import io
+import itertools
+import json
+
+from django.db import connections, router, transaction
+from django.utils.timezone import now
+
+from apps.cache import catalog_cache
+from apps.models import App
+from apps.serializers import AppImportSerializer
+
+
+TITLE_TAKEN = 'An app with this title already exists.'
+TITLE_REPEATED = 'The title is repeated from an earlier row.'
+INVALID_RECORD = 'Not a JSON object.'
+
+
+def read_csv(file):
+    """Yield ``(row number, record)`` pairs of a CSV file with a header row."""
+    for number, record in enumerate(csv.DictReader(file), start=1):
+        yield number, record
+
+
+def read_ndjson(file):
+    """Yield ``(row number, record)`` pairs of an NDJSON file, skipping blank lines."""
+    number = 0
+    for line in file:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record if isinstance(record, dict) else None
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+}
+
+
+class AppImporter:
+    """
+    Validate and insert apps owned by ``owner``, ``batch_size`` rows at a time.
+
+    Every batch is validated with ``AppImportSerializer``, checked for title
+    collisions with a single query and inserted in its own transaction:
+    with ``COPY`` on PostgreSQL and ``bulk_create`` elsewhere. Neither sends
+    model signals, so the catalog cache is invalidated once per batch.
+    """
+
+    def __init__(self, owner, batch_size=1000):
+        self.owner = owner
+        self.batch_size = batch_size
+        self.using = router.db_for_write(App)
+
+    def batches(self, records):
+        records = iter(records)
+        while True:
+            batch = list(itertools.islice(records, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def validate(self, batch):
+        """
+        Return the validated rows of batch that can be inserted and the
+        ``(row number, errors)`` of the others.
+        """
+        valid = []
+        errors = []
+        for number, record in batch:
+            if record is None:
+                errors.append((number, {'non_field_errors': [INVALID_RECORD]}))
+                continue
+            serializer = AppImportSerializer(data=record)
+            if serializer.is_valid():
+                valid.append((number, serializer.validated_data))
+            else:
+                errors.append((number, serializer.errors))
+
+        existing = set(
+            App.objects.using(self.using).filter(
+                title__in=[data['title'] for _, data in valid],
+            ).values_list('title', flat=True)
+        )
+        seen = set()
+        rows = []
+        for number, data in valid:
+            if data['title'] in existing:
+                errors.append((number, {'title': [TITLE_TAKEN]}))
+            elif data['title'] in seen:
+                errors.append((number, {'title': [TITLE_REPEATED]}))
+            else:
+                seen.add(data['title'])
+                rows.append(data)
+        return rows, sorted(errors, key=lambda error: error[0])
+
+    def import_batch(self, batch):
+        """Import one batch of ``(row number, record)`` pairs; return ``(imported, errors)``."""
+        rows, errors = self.validate(batch)
+        if rows:
+            with transaction.atomic(using=self.using):
+                self.load(rows)
+            catalog_cache.invalidate_apps([])
+        return len(rows), errors
+
+    def load(self, rows):
+        stamp = now()
+        if connections[self.using].vendor == 'postgresql':
+            self.copy(rows, stamp)
+            return
+        App.objects.using(self.using).bulk_create(
+            App(owner=self.owner, created_at=stamp, updated_at=stamp, **data) for data in rows
+        )
+
+    def copy(self, rows, stamp):
+        """Stream rows into the table with ``COPY ... FROM STDIN``."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for data in rows:
+            writer.writerow([
+                data['title'], data['description'], data['price'], self.owner.pk,
+                App.STATUS_PENDING, stamp.isoformat(), stamp.isoformat(), 0, 0,
+            ])
+        buffer.seek(0)
+        with connections[self.using].cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {App._meta.db_table} (title, description, price, owner_id, verification_status, '
+                'created_at, updated_at, purchase_count, revenue) FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0003_alter_app_verification_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='app',
+            index=models.Index(fields=['-created_at', '-id'], name='app_created_at_id_idx'),
+        ),
+    ]
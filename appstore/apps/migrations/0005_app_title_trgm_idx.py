@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_title_trigram_index(apps, schema_editor):
+    """
+    Back the admin's ``title__icontains`` search with a trigram index.
+
+    Django compares ``UPPER(title::text)`` for icontains on PostgreSQL, so the
+    index is built on that expression. Other databases keep the plain scan.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS app_title_trgm_idx '
+        'ON apps_app USING gin ((UPPER(title::text)) gin_trgm_ops)'
+    )
+
+
+def drop_title_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS app_title_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0004_app_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_title_trigram_index, drop_title_trigram_index),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:03
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('pg_catalog.english', coalesce({table}title, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce({table}description, '')), 'B')
+"""
+
+
+def create_search_vector_trigger(apps, schema_editor):
+    """
+    Maintain ``search_vector`` in the database, so rows written by bulk
+    inserts, queryset updates or COPY are searchable too, then backfill it
+    and index it with GIN.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f"""
+        CREATE OR REPLACE FUNCTION apps_app_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR_SQL.format(table='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    schema_editor.execute("""
+        CREATE TRIGGER apps_app_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, description ON apps_app
+        FOR EACH ROW EXECUTE FUNCTION apps_app_search_vector_update()
+    """)
+    schema_editor.execute(f'UPDATE apps_app SET search_vector = {SEARCH_VECTOR_SQL.format(table="")}')
+    schema_editor.execute('CREATE INDEX app_search_vector_idx ON apps_app USING gin (search_vector)')
+
+
+def drop_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS app_search_vector_idx')
+    schema_editor.execute('DROP TRIGGER IF EXISTS apps_app_search_vector_trigger ON apps_app')
+    schema_editor.execute('DROP FUNCTION IF EXISTS apps_app_search_vector_update()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0005_app_title_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='app',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector_trigger, drop_search_vector_trigger),
+    ]
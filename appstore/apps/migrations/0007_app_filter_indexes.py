@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0006_app_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='app',
+            index=models.Index(condition=models.Q(('verification_status', 'verified')), fields=['-created_at', '-id'], name='app_verified_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='app',
+            index=models.Index(fields=['price', 'id'], name='app_price_id_idx'),
+        ),
+    ]
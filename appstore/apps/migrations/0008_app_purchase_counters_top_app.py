@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0007_app_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='app',
+            name='purchase_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='app',
+            name='revenue',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.CreateModel(
+            name='TopApp',
+            fields=[
+                ('rank', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('purchase_count', models.PositiveIntegerField()),
+                ('revenue', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('refreshed_at', models.DateTimeField()),
+                ('app', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='apps.app')),
+            ],
+            options={
+                'ordering': ['rank'],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0008_app_purchase_counters_top_app'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='app',
+            index=models.Index(fields=['owner', '-created_at', '-id'], include=('title', 'price', 'verification_status'), name='app_owner_created_cover_idx'),
+        ),
+    ]
@@ -1,8 +1,107 @@
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
-from django.db import models
-from model_utils import FieldTracker
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils.timezone import now
 
+from apps.signals import verification_status_changed
+from core.tracker import FieldTracker, UntrackedModelIterable
+
+
+class AppQuerySet(models.QuerySet):
+    def verify(self, batch_size=1000):
+        """
+        Verify every app in the queryset that is not verified yet.
+
+        Gives the same result as calling ``App.verify()`` on each app, but with
+        a single ``UPDATE ... WHERE verified_date IS NULL``.
+        ``verification_status_changed`` is sent once per ``batch_size`` apps.
+        Returns the number of apps verified.
+        """
+        stamp = now()
+        return self.filter(verified_date__isnull=True)._transition(
+            App.STATUS_VERIFIED, stamp, batch_size, verified_date=stamp,
+        )
+
+    def read_only(self):
+        """Load the apps without tracking their changes, for lists and details that are only serialized."""
+        clone = self._chain()
+        clone._iterable_class = UntrackedModelIterable
+        return clone
+
+    def reject(self, batch_size=1000):
+        """
+        Reject every app in the queryset that is not rejected yet, like
+        ``verify()``. The verified date is cleared, so the apps can be
+        verified again.
+        """
+        return self.exclude(verification_status=App.STATUS_REJECTED)._transition(
+            App.STATUS_REJECTED, now(), batch_size, verified_date=None,
+        )
+
+    def _transition(self, status, stamp, batch_size, **values):
+        """
+        Move the queryset to status with one ``UPDATE`` of the status columns
+        and send ``verification_status_changed`` once per ``batch_size`` apps.
+        The ids of the apps are read and locked first, and the ``UPDATE``
+        matches them by primary key.
+        """
+        with transaction.atomic():
+            # Through a subquery, the queryset may be DISTINCT, which can not be locked.
+            app_ids = list(
+                App.objects.filter(pk__in=self.values('pk'))
+                .select_for_update().order_by('pk').values_list('pk', flat=True)
+            )
+            if app_ids:
+                App.objects.filter(pk__in=app_ids).update(verification_status=status, updated_at=stamp, **values)
+            for start in range(0, len(app_ids), batch_size):
+                verification_status_changed.send(
+                    sender=App,
+                    app_ids=app_ids[start:start + batch_size],
+                    status=status,
+                )
+        return len(app_ids)
+
+    def count_purchases(self, prices, delta=1):
+        """
+        Add ``delta`` purchases to each app of ``prices``, a ``{app_id: price}``
+        dict, and the matching revenue.
+
+        A single ``UPDATE`` with ``F()`` expressions, so concurrent purchases
+        of the same app never lose an increment.
+        """
+        if not prices:
+            return
+        output_field = models.DecimalField(max_digits=14, decimal_places=2)
+        if len(prices) == 1:
+            revenue = Value(next(iter(prices.values())) * delta, output_field=output_field)
+        else:
+            revenue = Case(
+                *(When(pk=app_id, then=Value(price * delta)) for app_id, price in prices.items()),
+                output_field=output_field,
+            )
+        self.filter(pk__in=prices).update(
+            purchase_count=F('purchase_count') + delta,
+            revenue=F('revenue') + revenue,
+        )
+
+    def recount_purchases(self):
+        """Recompute the purchase counters of the queryset from the orders table."""
+        orders = self.model._meta.get_field('orders').related_model.objects.filter(
+            app=OuterRef('pk'),
+        ).order_by().values('app')
+        return self.update(
+            purchase_count=Coalesce(Subquery(orders.annotate(count=Count('pk')).values('count')), 0),
+            revenue=Coalesce(
+                Subquery(orders.annotate(total=Sum('price')).values('total')),
+                Value(Decimal('0')),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2),
+            ),
+        )
+
 
 class App(models.Model):
     STATUS_PENDING = 'pending'
@@ -23,20 +122,128 @@ class App(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     verified_date = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
-    # Track changes to verification_status
-    tracker = FieldTracker()
+    # Denormalized from the orders table, see AppQuerySet.count_purchases().
+    purchase_count = models.PositiveIntegerField(default=0, editable=False)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    # Weighted title/description tsvector, kept up to date by a database
+    # trigger on PostgreSQL (see migration 0006) and unused elsewhere.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Track changes to verification_status, whose originals are stored by from_db().
+    tracker = FieldTracker(['verification_status'])
+
+    # Columns written by a status transition, see verify() and reject().
+    TRANSITION_FIELDS = ['verification_status', 'verified_date', 'updated_at']
+
+    objects = AppQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Backs the keyset pagination of the app list (see AppCursorPagination).
+            models.Index(fields=['-created_at', '-id'], name='app_created_at_id_idx'),
+            # The storefront lists verified apps only, newest first.
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='app_verified_created_idx',
+                condition=models.Q(verification_status='verified'),
+            ),
+            # Price range filters and ?ordering=price.
+            models.Index(fields=['price', 'id'], name='app_price_id_idx'),
+            # Covers the developer's own app list (/apps/mine/) for index-only scans.
+            models.Index(
+                fields=['owner', '-created_at', '-id'],
+                include=['title', 'price', 'verification_status'],
+                name='app_owner_created_cover_idx',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        cls.tracker.store(instance)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        App.tracker.store(self, fields)
 
     def verify(self):
-        if not self.verified_date:  # if not already verified
-            self.verification_status = self.STATUS_VERIFIED
-            self.save()
+        """Verify the app, unless it was verified before; return whether it was."""
+        if self.verified_date:  # already verified
+            return False
+        self.verification_status = self.STATUS_VERIFIED
+        self.verified_date = now()
+        self.save(update_fields=self.TRANSITION_FIELDS)
+        return True
+
+    def reject(self):
+        """Reject the app, unless it is rejected already; return whether it was."""
+        if self.verification_status == self.STATUS_REJECTED:
+            return False
+        self.verification_status = self.STATUS_REJECTED
+        self.verified_date = None
+        self.save(update_fields=self.TRANSITION_FIELDS)
+        return True
 
     def save(self, *args, **kwargs):
-        if self.tracker.has_changed('verification_status') and not self.verified_date:
+        # Saves restricted to other columns, e.g. a price change, skip the tracker.
+        update_fields = kwargs.get('update_fields')
+        status_changed = (
+            (update_fields is None or 'verification_status' in update_fields)
+            and self.tracker.has_changed('verification_status')
+        )
+        if status_changed and not self.verified_date:
             if self.verification_status == self.STATUS_VERIFIED:
                 self.verified_date = now()
 
         super(App, self).save(*args, **kwargs)
+        App.tracker.store(self, update_fields)
+
+        if status_changed:
+            verification_status_changed.send(sender=App, app_ids=[self.pk], status=self.verification_status)
 
     def __str__(self):
         return self.title
+
+
+class TopAppQuerySet(models.QuerySet):
+    def refresh(self, size=50):
+        """
+        Rebuild the ranking from the purchase counters of the verified apps.
+
+        The rows are swapped in one transaction, so readers keep seeing the
+        previous ranking until the new one is complete. Returns its size.
+        """
+        stamp = now()
+        best_sellers = App.objects.filter(
+            verification_status=App.STATUS_VERIFIED,
+            purchase_count__gt=0,
+        ).order_by('-purchase_count', '-revenue', 'id').values_list('id', 'purchase_count', 'revenue')[:size]
+        # Read in the transaction, so from the primary rather than a lagging replica.
+        with transaction.atomic():
+            rows = [
+                TopApp(rank=rank, app_id=app_id, purchase_count=purchase_count, revenue=revenue, refreshed_at=stamp)
+                for rank, (app_id, purchase_count, revenue) in enumerate(best_sellers, start=1)
+            ]
+            self.all().delete()
+            self.bulk_create(rows)
+        return len(rows)
+
+
+class TopApp(models.Model):
+    """
+    Materialized best-sellers ranking, rebuilt periodically by the
+    ``refresh_top_apps`` command instead of aggregating orders per request.
+    """
+    rank = models.PositiveIntegerField(primary_key=True)
+    app = models.OneToOneField(App, on_delete=models.CASCADE, related_name='+')
+    purchase_count = models.PositiveIntegerField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2)
+    refreshed_at = models.DateTimeField()
+
+    objects = TopAppQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['rank']
+
+    def __str__(self):
+        return f'#{self.rank} {self.app_id}'
@@ -0,0 +1,100 @@
+"""
+Pagination classes for the app APIs.
+"""
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination, _reverse_ordering
+
+
+class AppCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the app catalog.
+
+    Pages are fetched with ``WHERE (created_at, id) < <cursor>`` instead of
+    an OFFSET, so every page costs the same no matter how deep the client
+    goes. The cursor holds every field of the ordering, so ``id`` breaks ties
+    between apps created in the same instant, and the ordering matches the
+    ``app_created_at_id_idx`` index on ``App``.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Page like ``CursorPagination``, but filter on the whole position of
+        the cursor. Positions are unique, so the links never need an offset
+        to skip the apps of the previous page that share its first field.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, position = self.cursor or (0, False, None)
+
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(queryset, position, reverse))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = None
+        if len(results) > self.page_size:
+            following = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None or offset > 0
+            self.has_previous = following is not None
+            self.next_position, self.previous_position = position, following
+        else:
+            self.has_next = following is not None
+            self.has_previous = position is not None or offset > 0
+            self.next_position, self.previous_position = following, position
+
+        self.display_page_controls = (self.has_previous or self.has_next) and self.template is not None
+        return self.page
+
+    def keyset_filter(self, queryset, position, reverse):
+        """Return the condition that selects the apps past position, in the direction of the page."""
+        values = position.split('|')
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        condition, equal = Q(), {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            try:
+                value = queryset.model._meta.get_field(name).to_python(value)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        return '|'.join(str(getattr(instance, field.lstrip('-'))) for field in ordering)
+
+
+class OwnAppCursorPagination(AppCursorPagination):
+    """
+    Keyset pagination of a developer's own apps, walking the
+    ``app_owner_created_cover_idx`` index in the same order.
+    """
+    page_size = 50
+    max_page_size = 200
+
+
+class AppSearchPagination(LimitOffsetPagination):
+    """
+    Pagination for ranked search results, which have no stable key to put
+    in a cursor. Clients are expected to look at the first pages only.
+    """
+    default_limit = 20
+    max_limit = 100
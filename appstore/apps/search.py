@@ -0,0 +1,127 @@
+"""
+Full-text search over the app catalog.
+"""
+import html
+import re
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.filters import BaseFilterBackend
+
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+
+# The engines mark matches with private use characters, which survive
+# html.escape(), and render_headline() turns them into the tags.
+START_SENTINEL = '\ue000'
+STOP_SENTINEL = '\ue001'
+
+
+def render_headline(headline):
+    """Return the HTML of a headline: its text escaped and its matches highlighted."""
+    text = html.escape(headline)
+    return text.replace(START_SENTINEL, HIGHLIGHT_START).replace(STOP_SENTINEL, HIGHLIGHT_STOP)
+
+
+class PostgresSearchEngine:
+    """
+    Ranked search on the ``search_vector`` column and its GIN index.
+
+    Title matches weigh more than description matches (weights A and B of
+    the vector), and the headline is an excerpt of the description with the
+    matched words between sentinels, see ``render_headline()``.
+    """
+    config = 'english'
+
+    def search(self, queryset, query):
+        search_query = SearchQuery(query, config=self.config, search_type='websearch')
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+            headline=SearchHeadline(
+                'description',
+                search_query,
+                config=self.config,
+                start_sel=START_SENTINEL,
+                stop_sel=STOP_SENTINEL,
+                max_words=35,
+                min_words=15,
+            ),
+        ).order_by('-rank', '-id')
+
+
+class InMemorySearchEngine:
+    """
+    Search engine for databases without PostgreSQL full-text search, such as
+    SQLite in local test runs.
+
+    Candidates are narrowed down with ``icontains`` and then ranked in
+    Python. Every term has to appear in the title or the description, and
+    title matches weigh more, mirroring the PostgreSQL engine.
+    """
+    title_weight = 1.0
+    description_weight = 0.4
+    headline_words = 35
+
+    def tokenize(self, text):
+        return re.findall(r'\w+', text.lower())
+
+    def search(self, queryset, query):
+        terms = self.tokenize(query)
+        if not terms:
+            return []
+
+        condition = Q()
+        for term in terms:
+            condition &= Q(title__icontains=term) | Q(description__icontains=term)
+
+        results = []
+        for app in queryset.defer(None).filter(condition):
+            title_words = self.tokenize(app.title)
+            description_words = self.tokenize(app.description)
+            app.rank = sum(
+                self.title_weight * title_words.count(term) + self.description_weight * description_words.count(term)
+                for term in terms
+            ) / (1 + len(title_words) + len(description_words)) ** 0.5
+            app.headline = self.headline(app.description, terms)
+            results.append(app)
+
+        results.sort(key=lambda app: (-app.rank, -app.pk))
+        return results
+
+    def headline(self, text, terms):
+        """Return an excerpt of text around the first match, with matches between sentinels."""
+        words = text.split()
+        first = next(
+            (i for i, word in enumerate(words) if any(term in word.lower() for term in terms)),
+            0,
+        )
+        start = max(0, first - self.headline_words // 3)
+        # Sentinels in the description itself must not pair with the real ones.
+        excerpt = ' '.join(words[start:start + self.headline_words])
+        excerpt = excerpt.replace(START_SENTINEL, '').replace(STOP_SENTINEL, '')
+        pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+        return pattern.sub(lambda match: f'{START_SENTINEL}{match.group(0)}{STOP_SENTINEL}', excerpt)
+
+
+def get_search_engine(queryset):
+    """Pick the engine that suits the database holding queryset."""
+    if connections[queryset.db].vendor == 'postgresql':
+        return PostgresSearchEngine()
+    return InMemorySearchEngine()
+
+
+class AppSearchFilter(BaseFilterBackend):
+    """Filter and rank the app list by the ``?q=`` full-text query."""
+    search_param = 'q'
+
+    @classmethod
+    def get_search_query(cls, request):
+        return request.query_params.get(cls.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if not query or getattr(view, 'action', None) != 'list':
+            return queryset
+        return get_search_engine(queryset).search(queryset, query)
@@ -1,8 +1,29 @@
 from rest_framework import serializers
-from .models import App
 
+from core.profiling import ProfiledSerializerMixin
+from .models import App, TopApp
+from .search import render_headline
 
-class AppSerializer(serializers.ModelSerializer):
+
+class SparseFieldsMixin:
+    """
+    Accept ``fields`` and ``exclude`` keyword arguments that drop readable
+    fields from the output. Write-only fields are always kept.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        exclude = kwargs.pop('exclude', None)
+        super().__init__(*args, **kwargs)
+
+        for name, field in list(self.fields.items()):
+            if field.write_only:
+                continue
+            if (fields is not None and name not in fields) or (exclude and name in exclude):
+                self.fields.pop(name)
+
+
+class AppSerializer(SparseFieldsMixin, ProfiledSerializerMixin, serializers.ModelSerializer):
     owner = serializers.HiddenField(default=serializers.CurrentUserDefault())
 
     class Meta:
@@ -10,7 +31,63 @@ class AppSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'price', 'owner', 'verification_status']
         read_only_fields = ['id', 'owner', 'verification_status']
 
+    def update(self, instance, validated_data):
+        """Write only the columns of the request, e.g. ``UPDATE ... SET price``."""
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
 
 class AppDetailSerializer(AppSerializer):
     class Meta(AppSerializer.Meta):
         fields = AppSerializer.Meta.fields + ['description']
+
+
+class AppImportSerializer(AppDetailSerializer):
+    """
+    Validate one row of a catalog import. Titles are checked for uniqueness
+    by the importer, one query per batch instead of one per row.
+    """
+    owner = None
+
+    class Meta(AppDetailSerializer.Meta):
+        fields = ['title', 'description', 'price']
+        extra_kwargs = {'title': {'validators': []}}
+
+
+class HeadlineField(serializers.CharField):
+    """Search headline rendered as escaped HTML with ``<mark>`` highlights."""
+
+    def to_representation(self, value):
+        return render_headline(value)
+
+
+class AppSearchSerializer(AppSerializer):
+    """App list entry of a full-text search, with its rank and highlighted excerpt."""
+    rank = serializers.FloatField(read_only=True)
+    headline = HeadlineField(read_only=True)
+
+    class Meta(AppSerializer.Meta):
+        fields = AppSerializer.Meta.fields + ['rank', 'headline']
+
+
+class OwnAppSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
+    """Entry of the developer's own app list, limited to the columns of its covering index."""
+
+    class Meta:
+        model = App
+        fields = ['id', 'title', 'price', 'verification_status', 'created_at']
+        read_only_fields = fields
+
+
+class TopAppSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
+    """Entry of the best-sellers ranking."""
+    id = serializers.IntegerField(source='app_id', read_only=True)
+    title = serializers.CharField(source='app.title', read_only=True)
+    price = serializers.DecimalField(source='app.price', max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = TopApp
+        fields = ['rank', 'id', 'title', 'price', 'purchase_count', 'revenue', 'refreshed_at']
+        read_only_fields = fields
@@ -0,0 +1,25 @@
+"""
+Signals and signal handlers for the app models.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from apps.cache import catalog_cache
+
+
+# Sent with ``app_ids`` and ``status`` whenever apps change verification
+# status. Bulk transitions send it once per batch rather than once per app.
+verification_status_changed = Signal()
+
+
+@receiver(post_save, sender='apps.App')
+@receiver(post_delete, sender='apps.App')
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    """Make saved or deleted apps visible to the next catalog read."""
+    catalog_cache.invalidate_app(instance.pk)
+
+
+@receiver(verification_status_changed)
+def invalidate_catalog_cache_on_transition(sender, app_ids, **kwargs):
+    """Cover transitions made with queryset updates, which send no post_save."""
+    catalog_cache.invalidate_apps(app_ids)
@@ -1,21 +1,44 @@
 """
 Tests for apps APIs.
 """
+import csv
+import os
+import tempfile
+from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ValidationError
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.core.exceptions import FieldError, ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.timezone import now
 
-from apps.models import App
-from django.test import TestCase
+from apps.cache import CatalogCache, catalog_cache
+from apps.importer import TITLE_REPEATED, TITLE_TAKEN, AppImporter
+from apps.models import App, TopApp
+from django.test import AsyncClient, TestCase, override_settings
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.pagination import Cursor
 from rest_framework.test import APIClient
+from apps.pagination import AppCursorPagination
+from apps.search import PostgresSearchEngine, render_headline
 from apps.serializers import AppSerializer, AppDetailSerializer
+from apps.signals import verification_status_changed
+from core.db.routers import replicas_may_lag, use_primary
 
 
 APPS_URL = reverse('app:app-list')
+TOP_APPS_URL = reverse('app:app-top')
+MY_APPS_URL = reverse('app:app-mine')
+ASYNC_APPS_URL = reverse('app:async-app-list')
 
 
 def create_user(**kwargs):
@@ -37,6 +60,10 @@ def detail_url(app_id):
     return reverse('app:app-detail', args=[app_id])
 
 
+def async_detail_url(app_id):
+    return reverse('app:async-app-detail', args=[app_id])
+
+
 class AppStoreAppTestCase(TestCase):
     def setUp(self):
         params = {
@@ -148,6 +175,7 @@ class PrivateAppApiTests(TestCase):
     """Test authenticated API requests."""
 
     def setUp(self):
+        catalog_cache.clear()
         self.client = APIClient()
         self.user = create_user(
             email='user@example.com',
@@ -167,10 +195,10 @@ class PrivateAppApiTests(TestCase):
 
         res = self.client.get(APPS_URL)
 
-        apps = App.objects.all()
+        apps = App.objects.order_by('-created_at', '-id')
         serializer = AppSerializer(apps, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_apps_list_limited_to_user(self):
         """Test list of app is limited to authenticated user."""
@@ -183,10 +211,72 @@ class PrivateAppApiTests(TestCase):
 
         res = self.client.get(APPS_URL)
 
-        apps = App.objects.all()
+        apps = App.objects.order_by('-created_at', '-id')
         serializer = AppSerializer(apps, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_list_apps_is_cursor_paginated(self):
+        """Test the app list is split into pages linked by cursors."""
+        for i in range(5):
+            create_app(owner=self.user, title=f'Paged app {i}')
+
+        res = self.client.get(APPS_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNone(res.data['previous'])
+        self.assertIn('cursor=', res.data['next'])
+
+        seen = [app['id'] for app in res.data['results']]
+        next_url = res.data['next']
+        while next_url:
+            res = self.client.get(next_url)
+            seen.extend(app['id'] for app in res.data['results'])
+            next_url = res.data['next']
+
+        expected = list(App.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_list_apps_pages_apps_created_together(self):
+        """Test apps sharing a creation time are paged by id, back and forth, without an OFFSET."""
+        for i in range(5):
+            create_app(owner=self.user, title=f'Imported app {i}')
+        App.objects.update(created_at=now())
+        expected = list(App.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        first = self.client.get(APPS_URL, {'page_size': 2})
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(first.data['next'])
+        third = self.client.get(second.data['next'])
+        back = self.client.get(third.data['previous'])
+
+        seen = [app['id'] for res in (first, second, third) for app in res.data['results']]
+        self.assertEqual(seen, expected)
+        self.assertIsNone(third.data['next'])
+        self.assertEqual([app['id'] for app in back.data['results']], expected[2:4])
+        self.assertFalse(any('OFFSET' in query['sql'] for query in queries.captured_queries))
+
+    def test_list_apps_tampered_cursor(self):
+        """Test a cursor whose position can not be read is not found."""
+        create_app(owner=self.user)
+        pagination = AppCursorPagination()
+        pagination.base_url = APPS_URL
+        url = pagination.encode_cursor(Cursor(offset=0, reverse=False, position='yesterday|1'))
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_apps_page_size_is_capped(self):
+        """Test clients can not request more than the maximum page size."""
+        for i in range(3):
+            create_app(owner=self.user, title=f'Capped app {i}')
+
+        with patch.object(AppCursorPagination, 'max_page_size', 2):
+            res = self.client.get(APPS_URL, {'page_size': 1000})
+
+        self.assertEqual(len(res.data['results']), 2)
 
     def test_get_app_detail(self):
         """Test get app detail."""
@@ -302,3 +392,1006 @@ class PrivateAppApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
         self.assertTrue(App.objects.filter(id=app.id).exists())
+
+
+class CatalogCacheTests(TestCase):
+    """Test the read-through cache in front of the app catalog."""
+
+    def setUp(self):
+        catalog_cache.clear()
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.app = create_app(owner=self.user)
+
+    def test_list_is_served_from_cache(self):
+        """Test a repeated list request only runs the ETag aggregate."""
+        first = self.client.get(APPS_URL)
+        with self.assertNumQueries(1):
+            second = self.client.get(APPS_URL)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(catalog_cache.stats()['hits'], 1)
+        self.assertEqual(catalog_cache.stats()['misses'], 1)
+
+    @override_settings(DATABASE_REPLICATION={'REPLICAS': ['replica1'], 'STICKINESS_SECONDS': 5})
+    def test_fill_after_change_reads_primary(self):
+        """Test a page is rendered from the primary right after a change, not from a lagging replica."""
+        self.client.get(APPS_URL)
+        self.app.title = 'Renamed'
+        self.app.save()
+
+        with patch('apps.views.use_primary', wraps=use_primary) as primary:
+            res = self.client.get(APPS_URL)
+            self.client.get(APPS_URL)
+            self.client.get(detail_url(self.app.id))
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'][0]['title'], 'Renamed')
+        # The cached list is not rendered again.
+        self.assertEqual([call.args for call in primary.call_args_list], [(True,), (True,)])
+        with patch('core.db.routers.now', return_value=now() + timedelta(seconds=6)):
+            self.assertFalse(replicas_may_lag(catalog_cache.version_issued_at(catalog_cache.CATALOG_VERSION_KEY)))
+
+    def test_detail_is_served_from_cache(self):
+        """Test a repeated detail request is answered from the cache."""
+        self.client.get(detail_url(self.app.id))
+        with self.assertNumQueries(1):
+            res = self.client.get(detail_url(self.app.id))
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+        self.assertEqual(res.data, AppDetailSerializer(self.app).data)
+
+    def test_created_app_invalidates_list(self):
+        """Test a new app shows up in the next list response."""
+        self.client.get(APPS_URL)
+        new_app = create_app(owner=self.user, title='Another app')
+
+        res = self.client.get(APPS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertIn(new_app.id, [app['id'] for app in res.data['results']])
+
+    def test_verified_app_is_visible_immediately(self):
+        """Test verifying an app invalidates both its detail and the list."""
+        self.client.get(APPS_URL)
+        self.client.get(detail_url(self.app.id))
+
+        self.app.verify()
+
+        res = self.client.get(detail_url(self.app.id))
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['verification_status'], App.STATUS_VERIFIED)
+        res = self.client.get(APPS_URL)
+        self.assertEqual(res.data['results'][0]['verification_status'], App.STATUS_VERIFIED)
+
+    def test_deleted_app_is_not_served(self):
+        """Test a deleted app is not served from a stale cache entry."""
+        self.client.get(detail_url(self.app.id))
+        self.app.delete()
+
+        res = self.client.get(detail_url(self.app.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(CACHES={'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_shared_tier_fills_local_tier(self):
+        """Test an entry stored by one worker is picked up by another."""
+        worker_a = CatalogCache(shared_cache='shared')
+        worker_b = CatalogCache(shared_cache='shared')
+
+        worker_a.set(worker_a.list_key('/api/app/apps/'), {'results': []})
+
+        key = worker_b.list_key('/api/app/apps/')
+        self.assertEqual(worker_b.get(key), {'results': []})
+        self.assertEqual(worker_b.stats()['shared_hits'], 1)
+
+        worker_a.invalidate_app(self.app.id)
+        self.assertIsNone(worker_b.get(worker_b.list_key('/api/app/apps/')))
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag/Last-Modified validators on the app endpoints."""
+
+    def setUp(self):
+        catalog_cache.clear()
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.app = create_app(owner=self.user)
+
+    def test_list_sends_validators(self):
+        """Test the list response carries an ETag and Last-Modified."""
+        res = self.client.get(APPS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+
+    def test_list_not_modified(self):
+        """Test a matching If-None-Match gets a 304 from a single aggregate query."""
+        etag = self.client.get(APPS_URL)['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(APPS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_list_etag_sees_changes_of_other_workers(self):
+        """Test without a shared cache the list ETag changes with a write that bumped no local token."""
+        etag = self.client.get(APPS_URL)['ETag']
+        # As another worker would: its invalidation does not reach this one.
+        App.objects.filter(pk=self.app.pk).update(title='Renamed', updated_at=now())
+
+        res = self.client.get(APPS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'conditional-get-tests'},
+    })
+    def test_shared_cache_list_runs_no_query(self):
+        """Test with a shared cache a cached list and its 304 are served from the version token alone."""
+        caches['shared'].clear()
+        with patch('apps.views.catalog_cache', CatalogCache(shared_cache='shared')):
+            etag = self.client.get(APPS_URL)['ETag']
+
+            with self.assertNumQueries(0):
+                cached = self.client.get(APPS_URL)
+                res = self.client.get(APPS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_changes_with_catalog(self):
+        """Test adding an app invalidates the list ETag."""
+        etag = self.client.get(APPS_URL)['ETag']
+        create_app(owner=self.user, title='Another app')
+
+        res = self.client.get(APPS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_detail_not_modified(self):
+        """Test the detail endpoint honours If-None-Match and If-Modified-Since."""
+        res = self.client.get(detail_url(self.app.id))
+
+        self.assertEqual(
+            self.client.get(detail_url(self.app.id), HTTP_IF_NONE_MATCH=res['ETag']).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        self.assertEqual(
+            self.client.get(detail_url(self.app.id), HTTP_IF_MODIFIED_SINCE=res['Last-Modified']).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+    def test_detail_etag_changes_on_update(self):
+        """Test updating an app invalidates its ETag."""
+        etag = self.client.get(detail_url(self.app.id))['ETag']
+        self.client.patch(detail_url(self.app.id), {'price': Decimal('1.00')})
+
+        res = self.client.get(detail_url(self.app.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['price'], '1.00')
+
+
+class VerifyAppsAdminActionTests(TestCase):
+    """Test the set-based "Verify selected apps" admin action."""
+
+    def setUp(self):
+        catalog_cache.clear()
+        self.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='test_password',
+        )
+        self.client.force_login(self.admin_user)
+        self.pending = [create_app(owner=self.admin_user, title=f'Pending app {i}') for i in range(5)]
+        self.verified = create_app(owner=self.admin_user, title='Verified app')
+        self.verified.verify()
+        self.verified_date = self.verified.verified_date
+
+    def post_action(self, apps):
+        return self.client.post(reverse('admin:apps_app_changelist'), {
+            'action': 'verify_apps',
+            '_selected_action': [app.id for app in apps],
+        }, follow=True)
+
+    def test_verify_selected_apps(self):
+        """Test pending apps are verified and stamped, verified ones are skipped."""
+        res = self.post_action(self.pending + [self.verified])
+
+        self.assertContains(res, '5 app(s) verified successfully.')
+        for app in self.pending:
+            app.refresh_from_db()
+            self.assertEqual(app.verification_status, App.STATUS_VERIFIED)
+            self.assertIsNotNone(app.verified_date)
+        self.verified.refresh_from_db()
+        self.assertEqual(self.verified.verified_date, self.verified_date)
+
+    def test_verify_is_a_single_update(self):
+        """Test the number of queries does not depend on the number of apps."""
+        with CaptureQueriesContext(connection) as queries:
+            count = App.objects.filter(pk__in=[app.pk for app in self.pending]).verify()
+
+        self.assertEqual(count, 5)
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+
+    def test_verify_sends_batched_signal(self):
+        """Test the status-changed signal is sent per batch, not per app."""
+        received = []
+
+        def handler(sender, app_ids, status, **kwargs):
+            received.append((sorted(app_ids), status))
+
+        verification_status_changed.connect(handler)
+        self.addCleanup(verification_status_changed.disconnect, handler)
+
+        App.objects.all().verify(batch_size=2)
+
+        self.assertEqual(len(received), 3)
+        self.assertEqual(
+            sorted(app_id for app_ids, _ in received for app_id in app_ids),
+            sorted(app.pk for app in self.pending),
+        )
+        self.assertTrue(all(status == App.STATUS_VERIFIED for _, status in received))
+
+    def test_verify_invalidates_catalog_cache(self):
+        """Test verified apps are visible to the next detail request."""
+        client = APIClient()
+        client.force_authenticate(self.admin_user)
+        client.get(detail_url(self.pending[0].id))
+
+        App.objects.all().verify()
+
+        res = client.get(detail_url(self.pending[0].id))
+        self.assertEqual(res.data['verification_status'], App.STATUS_VERIFIED)
+
+
+class AppTransitionTests(TestCase):
+    """Test the verify and reject transitions write the status columns only."""
+
+    def setUp(self):
+        catalog_cache.clear()
+        self.user = create_user(email='user@example.com', password='test_password')
+        self.apps = [create_app(owner=self.user, title=f'App {i}') for i in range(4)]
+        self.received = []
+
+        def handler(sender, app_ids, status, **kwargs):
+            self.received.append((sorted(app_ids), status))
+
+        verification_status_changed.connect(handler)
+        self.addCleanup(verification_status_changed.disconnect, handler)
+
+    def updates(self, queries):
+        return [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+
+    def test_reject_queryset(self):
+        """Test rejecting apps in bulk skips rejected ones and sends batched signals."""
+        self.apps[0].reject()
+        self.received.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            count = App.objects.all().reject(batch_size=2)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(len(self.updates(queries)), 1)
+        # The updated rows are not looked up again by their new updated_at.
+        selects = [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertNotIn('updated_at', selects[0])
+        self.assertEqual(
+            self.received,
+            [([app.pk for app in self.apps[1:3]], App.STATUS_REJECTED), ([self.apps[3].pk], App.STATUS_REJECTED)],
+        )
+        self.assertEqual(App.objects.filter(verification_status=App.STATUS_REJECTED).count(), 4)
+
+    def test_instance_transitions_update_status_columns(self):
+        """Test verify() and reject() only write the status columns."""
+        app = self.apps[0]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(app.verify())
+            self.assertTrue(app.reject())
+            self.assertFalse(app.reject())
+
+        updates = self.updates(queries)
+        self.assertEqual(len(updates), 2)
+        for sql in updates:
+            self.assertNotIn('"description"', sql)
+            self.assertNotIn('"price"', sql)
+        self.assertEqual(self.received, [([app.pk], App.STATUS_VERIFIED), ([app.pk], App.STATUS_REJECTED)])
+        app.refresh_from_db()
+        self.assertEqual(app.verification_status, App.STATUS_REJECTED)
+        self.assertIsNone(app.verified_date)
+
+    def test_rejected_app_can_be_verified_again(self):
+        """Test verify, reject and verify again, one app at a time and in bulk."""
+        app = self.apps[0]
+        app.verify()
+        app.reject()
+        self.assertTrue(app.verify())
+        app.refresh_from_db()
+        self.assertEqual(app.verification_status, App.STATUS_VERIFIED)
+
+        queryset = App.objects.filter(pk__in=[app.pk for app in self.apps])
+        queryset.verify()
+        self.assertEqual(queryset.reject(), 4)
+        self.assertFalse(queryset.filter(verified_date__isnull=False).exists())
+        self.assertEqual(queryset.verify(), 4)
+        self.assertEqual(queryset.filter(verification_status=App.STATUS_VERIFIED).count(), 4)
+
+    def test_price_update_skips_tracker(self):
+        """Test changing the price writes that column only, without checking the status."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with patch('core.tracker.BoundFieldTracker.has_changed') as has_changed, \
+                CaptureQueriesContext(connection) as queries:
+            res = client.patch(detail_url(self.apps[0].id), {'price': Decimal('1.00')})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        has_changed.assert_not_called()
+        sql, = self.updates(queries)
+        self.assertIn('"price"', sql)
+        self.assertNotIn('"description"', sql)
+        self.assertEqual(self.received, [])
+
+    def test_reject_admin_action(self):
+        """Test the "Reject selected apps" admin action."""
+        admin_user = get_user_model().objects.create_superuser(email='admin@example.com', password='test_password')
+        self.client.force_login(admin_user)
+
+        res = self.client.post(reverse('admin:apps_app_changelist'), {
+            'action': 'reject_apps',
+            '_selected_action': [app.id for app in self.apps[:2]],
+        }, follow=True)
+
+        self.assertContains(res, '2 app(s) rejected successfully.')
+
+
+class AppTrackerTests(TestCase):
+    """Test the tracking of the verification status of loaded apps."""
+
+    def setUp(self):
+        self.user = create_user(email='user@example.com', password='test_password')
+        self.app = create_app(owner=self.user)
+
+    def test_loaded_app_tracks_status_only(self):
+        """Test a loaded app remembers its status, not its other columns."""
+        app = App.objects.get(pk=self.app.pk)
+
+        self.assertEqual(app._tracker_originals, (App.STATUS_PENDING,))
+        self.assertFalse(app.tracker.has_changed('verification_status'))
+        app.verification_status = App.STATUS_REJECTED
+        self.assertTrue(app.tracker.has_changed('verification_status'))
+        self.assertEqual(app.tracker.changed(), {'verification_status': App.STATUS_PENDING})
+        with self.assertRaises(FieldError):
+            app.tracker.has_changed('description')
+
+    def test_saved_app_is_tracked_again(self):
+        """Test the status saved, or refreshed, is the new original."""
+        app = App.objects.get(pk=self.app.pk)
+        app.verification_status = App.STATUS_VERIFIED
+        app.save()
+        self.assertFalse(app.tracker.has_changed('verification_status'))
+
+        App.objects.filter(pk=app.pk).update(verification_status=App.STATUS_REJECTED)
+        app.refresh_from_db()
+        self.assertFalse(app.tracker.has_changed('verification_status'))
+        self.assertEqual(app.tracker.previous('verification_status'), App.STATUS_REJECTED)
+
+    def test_deferred_status(self):
+        """Test a deferred status has not changed until it is set."""
+        app = App.objects.only('id', 'price').get(pk=self.app.pk)
+
+        self.assertFalse(app.tracker.has_changed('verification_status'))
+        app.verification_status = App.STATUS_VERIFIED
+        self.assertTrue(app.tracker.has_changed('verification_status'))
+
+    def test_read_only_queryset_is_not_tracked(self):
+        """Test apps of a read-only queryset skip the tracking, others do not."""
+        untracked = App.objects.read_only().get(pk=self.app.pk)
+        tracked = App.objects.get(pk=self.app.pk)
+
+        self.assertNotIn('_tracker_originals', untracked.__dict__)
+        self.assertTrue(untracked.tracker.has_changed('verification_status'))
+        self.assertIn('_tracker_originals', tracked.__dict__)
+
+    def test_read_only_iteration_does_not_leak(self):
+        """Test apps loaded while iterating a read-only queryset are tracked."""
+        for _ in App.objects.read_only():
+            loaded = App.objects.get(pk=self.app.pk)
+
+        self.assertIn('_tracker_originals', loaded.__dict__)
+
+
+class AppAdminTests(TestCase):
+    """Test the app admin changelist."""
+
+    CHANGELIST_QUERY_BUDGET = 6
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='test_password',
+        )
+        self.client.force_login(self.admin_user)
+        for i in range(10):
+            owner = create_user(email=f'developer{i}@example.com', password='test123')
+            create_app(owner=owner, title=f'Admin listed app {i}')
+
+    def test_changelist_within_query_budget(self):
+        """Test owners are joined instead of fetched per row."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(reverse('admin:apps_app_changelist'))
+
+        self.assertContains(res, 'developer9@example.com')
+        self.assertLessEqual(len(queries), self.CHANGELIST_QUERY_BUDGET)
+
+    def test_search_by_owner_email(self):
+        """Test the changelist can be searched by the owner's email."""
+        res = self.client.get(reverse('admin:apps_app_changelist'), {'q': 'developer3@'})
+
+        self.assertContains(res, 'Admin listed app 3')
+        self.assertNotContains(res, 'Admin listed app 4')
+
+
+class SparseFieldsetTests(TestCase):
+    """Test trimming app payloads with ?fields= and ?exclude=."""
+
+    def setUp(self):
+        catalog_cache.clear()
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.app = create_app(owner=self.user, description='A very long description. ' * 100)
+
+    def test_list_fields(self):
+        """Test the list only returns and selects the requested fields."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(APPS_URL, {'fields': 'id,title,price'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(res.data['results'][0]), ['id', 'title', 'price'])
+        select = next(query['sql'] for query in queries if 'ORDER BY' in query['sql'])
+        self.assertNotIn('verification_status', select)
+        self.assertNotIn('description', select)
+
+    def test_list_never_selects_description(self):
+        """Test the default list does not pull descriptions out of the database."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(APPS_URL)
+
+        self.assertFalse(any('description' in query['sql'] for query in queries))
+
+    def test_detail_exclude(self):
+        """Test the detail can leave the description out of payload and SELECT."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(detail_url(self.app.id), {'exclude': 'description'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('description', res.data)
+        self.assertEqual(res.data['title'], self.app.title)
+        self.assertFalse(any('description' in query['sql'] for query in queries))
+
+    def test_detail_defaults_to_all_fields(self):
+        """Test the detail still returns every field without parameters."""
+        res = self.client.get(detail_url(self.app.id))
+
+        self.assertEqual(res.data, AppDetailSerializer(self.app).data)
+
+    def test_unknown_field(self):
+        """Test asking for a field that does not exist is an error."""
+        res = self.client.get(APPS_URL, {'fields': 'id,secret'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('secret', str(res.data['fields']))
+
+    def test_sparse_and_full_responses_are_cached_apart(self):
+        """Test a trimmed response is never served for the full one."""
+        self.client.get(detail_url(self.app.id), {'fields': 'id'})
+
+        res = self.client.get(detail_url(self.app.id))
+
+        self.assertIn('description', res.data)
+
+
+class AppSearchTests(TestCase):
+    """Test full-text search on the app list."""
+
+    def setUp(self):
+        catalog_cache.clear()
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.weather = create_app(
+            owner=self.user,
+            title='Weather Radar',
+            description='Live rain radar with hourly forecasts.',
+        )
+        self.calendar = create_app(
+            owner=self.user,
+            title='Family Calendar',
+            description='Shared calendar that also shows the weather forecast for every event.',
+        )
+        self.notes = create_app(owner=self.user, title='Notes', description='Plain text notes.')
+
+    def test_search_ranks_title_matches_first(self):
+        """Test apps matching in the title rank above description matches."""
+        res = self.client.get(APPS_URL, {'q': 'weather'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([app['id'] for app in res.data['results']], [self.weather.id, self.calendar.id])
+        self.assertEqual(res.data['count'], 2)
+        first, second = res.data['results']
+        self.assertGreater(first['rank'], second['rank'])
+
+    def test_search_highlights_matches(self):
+        """Test the headline marks the matched words in the description."""
+        res = self.client.get(APPS_URL, {'q': 'forecast'})
+
+        headlines = [app['headline'] for app in res.data['results']]
+        self.assertTrue(all('<mark>' in headline for headline in headlines))
+
+    def test_search_headline_is_escaped(self):
+        """Test markup in a description is escaped around the highlights."""
+        create_app(
+            owner=self.user, title='Unsafe',
+            description='Forecast <script>alert(1)</script> <img src=x onerror=alert(2)> \ue001',
+        )
+
+        res = self.client.get(APPS_URL, {'q': 'forecast alert'})
+
+        headline, = [app['headline'] for app in res.data['results']]
+        self.assertNotIn('<script>', headline)
+        self.assertNotIn('<img', headline)
+        self.assertIn('&lt;script&gt;', headline)
+        self.assertEqual(headline.count('<mark>'), headline.count('</mark>'))
+        self.assertIn('<mark>Forecast</mark>', headline)
+
+    def test_search_requires_every_term(self):
+        """Test every word of the query must match."""
+        res = self.client.get(APPS_URL, {'q': 'weather radar'})
+
+        self.assertEqual([app['id'] for app in res.data['results']], [self.weather.id])
+
+    def test_search_without_matches(self):
+        """Test an unmatched query returns an empty page."""
+        res = self.client.get(APPS_URL, {'q': 'spreadsheet'})
+
+        self.assertEqual(res.data['count'], 0)
+        self.assertEqual(res.data['results'], [])
+
+    def test_search_is_paginated(self):
+        """Test search results honour the limit parameter."""
+        res = self.client.get(APPS_URL, {'q': 'forecast', 'limit': 1})
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIsNotNone(res.data['next'])
+
+    def test_search_with_sparse_fields(self):
+        """Test search results can be trimmed like the plain list."""
+        res = self.client.get(APPS_URL, {'q': 'weather', 'fields': 'id,title,rank'})
+
+        self.assertEqual(list(res.data['results'][0]), ['id', 'title', 'rank'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Uses PostgreSQL full-text search.')
+    def test_postgres_engine(self):
+        """Test the PostgreSQL engine ranks, filters and highlights in the database."""
+        results = list(PostgresSearchEngine().search(App.objects.all(), 'weather'))
+
+        self.assertEqual([app.id for app in results], [self.weather.id, self.calendar.id])
+        self.assertIn('<mark>', render_headline(results[1].headline))
+
+
+class AppFilterTests(TestCase):
+    """Test filtering and ordering the app list."""
+
+    def setUp(self):
+        catalog_cache.clear()
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='testpass123')
+        self.other = create_user(email='other@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.cheap = create_app(owner=self.user, title='Cheap', price=Decimal('1.00'))
+        self.verified = create_app(
+            owner=self.other, title='Verified', price=Decimal('20.00'), verification_status=App.STATUS_VERIFIED,
+        )
+        self.pricey = create_app(owner=self.other, title='Pricey', price=Decimal('99.00'))
+
+    def get_ids(self, params):
+        res = self.client.get(APPS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [app['id'] for app in res.data['results']]
+
+    def test_filter_by_verification_status(self):
+        """Test filtering by verification status."""
+        self.assertEqual(self.get_ids({'verification_status': 'verified'}), [self.verified.id])
+
+    def test_filter_by_owner(self):
+        """Test filtering by owner."""
+        self.assertEqual(self.get_ids({'owner': self.other.id}), [self.pricey.id, self.verified.id])
+
+    def test_filter_by_price_range(self):
+        """Test filtering by a price range."""
+        self.assertEqual(self.get_ids({'price_min': '10', 'price_max': '20'}), [self.verified.id])
+
+    def test_filter_by_creation_date(self):
+        """Test filtering by creation date."""
+        App.objects.filter(pk=self.cheap.pk).update(created_at=self.cheap.created_at - timedelta(days=10))
+
+        ids = self.get_ids({'created_before': (self.cheap.created_at - timedelta(days=1)).isoformat()})
+
+        self.assertEqual(ids, [self.cheap.id])
+
+    def test_combined_filters(self):
+        """Test filters combine with AND."""
+        ids = self.get_ids({'owner': self.other.id, 'price_max': '50', 'verification_status': 'verified'})
+
+        self.assertEqual(ids, [self.verified.id])
+
+    def test_invalid_filter(self):
+        """Test invalid filter values are rejected rather than ignored."""
+        res = self.client.get(APPS_URL, {'verification_status': 'banned', 'price_min': 'cheap'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('verification_status', res.data)
+        self.assertIn('price_min', res.data)
+
+    def test_inverted_price_range(self):
+        """Test a price range whose minimum exceeds its maximum is rejected."""
+        res = self.client.get(APPS_URL, {'price_min': '50', 'price_max': '10'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_order_by_price(self):
+        """Test ordering by price in both directions."""
+        self.assertEqual(self.get_ids({'ordering': 'price'}), [self.cheap.id, self.verified.id, self.pricey.id])
+        self.assertEqual(self.get_ids({'ordering': '-price'}), [self.pricey.id, self.verified.id, self.cheap.id])
+
+    def test_order_by_price_pages(self):
+        """Test the cursor follows the requested ordering across pages."""
+        res = self.client.get(APPS_URL, {'ordering': 'price', 'page_size': 2, 'fields': 'id'})
+        ids = [app['id'] for app in res.data['results']]
+        res = self.client.get(res.data['next'])
+        ids += [app['id'] for app in res.data['results']]
+
+        self.assertEqual(ids, [self.cheap.id, self.verified.id, self.pricey.id])
+        self.assertIsNone(res.data['next'])
+
+    def test_unknown_ordering_falls_back_to_newest_first(self):
+        """Test an unknown ordering field keeps the default ordering."""
+        self.assertEqual(self.get_ids({'ordering': 'description'}), [self.pricey.id, self.verified.id, self.cheap.id])
+
+
+class TopAppsTests(TestCase):
+    """Test the best-sellers ranking."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.apps = [
+            create_app(owner=self.user, title=f'App {i}', verification_status=App.STATUS_VERIFIED)
+            for i in range(3)
+        ]
+        App.objects.filter(pk=self.apps[0].pk).update(purchase_count=5, revenue=Decimal('50.00'))
+        App.objects.filter(pk=self.apps[1].pk).update(purchase_count=9, revenue=Decimal('90.00'))
+        self.pending = create_app(owner=self.user, title='Pending')
+        App.objects.filter(pk=self.pending.pk).update(purchase_count=20, revenue=Decimal('200.00'))
+
+    def test_top_before_refresh(self):
+        """Test the ranking is empty until it has been built."""
+        res = self.client.get(TOP_APPS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_top_apps(self):
+        """Test verified apps with purchases are ranked by purchase count."""
+        TopApp.objects.refresh()
+
+        with self.assertNumQueries(2):
+            res = self.client.get(TOP_APPS_URL)
+
+        self.assertEqual([(app['rank'], app['id']) for app in res.data], [(1, self.apps[1].id), (2, self.apps[0].id)])
+        self.assertEqual(res.data[0]['title'], self.apps[1].title)
+        self.assertEqual(res.data[0]['purchase_count'], 9)
+        self.assertEqual(res.data[0]['revenue'], '90.00')
+
+    def test_top_reads_the_snapshot(self):
+        """Test new purchases only show up once the ranking is refreshed."""
+        TopApp.objects.refresh()
+        App.objects.filter(pk=self.apps[2].pk).update(purchase_count=100)
+
+        self.assertNotIn(self.apps[2].id, [app['id'] for app in self.client.get(TOP_APPS_URL).data])
+
+        TopApp.objects.refresh()
+        self.assertEqual(self.client.get(TOP_APPS_URL).data[0]['id'], self.apps[2].id)
+
+    def test_top_not_modified(self):
+        """Test the ranking is revalidated against its refresh time."""
+        TopApp.objects.refresh()
+        etag = self.client.get(TOP_APPS_URL)['ETag']
+
+        res = self.client.get(TOP_APPS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_refresh_command_recounts(self):
+        """Test the refresh command can rebuild the counters from the orders."""
+        Order = App._meta.get_field('orders').related_model
+        buyer = create_user(email='buyer@example.com', password='testpass123')
+        Order.objects.bulk_create([Order(owner=buyer, app=self.apps[2], price=Decimal('19.99'))])
+
+        call_command('refresh_top_apps', '--recount', '--size', '1', stdout=StringIO())
+
+        self.assertEqual(list(TopApp.objects.values_list('app_id', 'purchase_count', 'revenue')), [
+            (self.apps[2].id, 1, Decimal('19.99')),
+        ])
+
+    def test_refresh_command_interval(self):
+        """Test the refresh command keeps rebuilding the ranking with an interval."""
+        out = StringIO()
+
+        with patch('core.management.commands.refresh_top_apps.time.sleep', side_effect=[None, KeyboardInterrupt]) \
+                as sleep:
+            call_command('refresh_top_apps', '--interval', '60', stdout=out)
+
+        self.assertEqual(out.getvalue().count('Ranked'), 2)
+        sleep.assert_called_with(60.0)
+
+
+class MyAppsTests(TestCase):
+    """Test the list of the current user's own apps."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='testpass123')
+        self.other = create_user(email='other@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        self.apps = [create_app(owner=self.user, title=f'Mine {i}') for i in range(3)]
+        create_app(owner=self.other, title='Not mine', verification_status=App.STATUS_VERIFIED)
+
+    def test_my_apps_requires_authentication(self):
+        """Test anonymous users have no apps to list."""
+        res = APIClient().get(MY_APPS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_my_apps(self):
+        """Test only the user's apps are listed, newest first, whatever their status."""
+        with self.assertNumQueries(1):
+            res = self.client.get(MY_APPS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([app['id'] for app in res.data['results']], [app.id for app in reversed(self.apps)])
+        self.assertEqual(
+            list(res.data['results'][0]), ['id', 'title', 'price', 'verification_status', 'created_at'],
+        )
+
+    def test_my_apps_ignore_ordering(self):
+        """Test the list stays newest first, in the order of its index, whatever ordering is asked for."""
+        for price, app in enumerate(self.apps, start=1):
+            App.objects.filter(pk=app.pk).update(price=price)
+
+        res = self.client.get(MY_APPS_URL, {'ordering': 'price'})
+
+        self.assertEqual([app['id'] for app in res.data['results']], [app.id for app in reversed(self.apps)])
+
+    def test_my_apps_are_paginated(self):
+        """Test the list is paginated by cursor."""
+        first = self.client.get(MY_APPS_URL, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual(len(first.data['results']), 2)
+        self.assertEqual([app['id'] for app in second.data['results']], [self.apps[0].id])
+
+    def test_my_apps_use_covering_index(self):
+        """Test the list is read from the covering index, from the index alone on PostgreSQL."""
+        queryset = App.objects.filter(owner=self.user).only('id', 'title', 'price', 'verification_status', 'created_at')
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.order_by('-created_at', '-id')[:51].explain()
+
+        self.assertIn('app_owner_created_cover_idx', plan)
+        if connection.vendor == 'postgresql':
+            self.assertIn('Index Only Scan', plan)
+
+
+class ImportAppsTests(TestCase):
+    """Test the bulk catalog import."""
+
+    def setUp(self):
+        catalog_cache.clear()
+        self.owner = create_user(email='partner@example.com', password='testpass123')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', newline='') as file:
+            file.write(content)
+        return path
+
+    def write_csv(self, rows, name='apps.csv'):
+        lines = ['title,description,price'] + [f'{title},Imported app,{price}' for title, price in rows]
+        return self.write(name, '\n'.join(lines) + '\n')
+
+    def import_apps(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_apps', path, '--owner', self.owner.email, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv(self):
+        """Test valid rows become pending apps of the owner."""
+        self.import_apps(self.write_csv([('First', '1.99'), ('Second', '0')]))
+
+        apps = App.objects.order_by('title')
+        self.assertEqual([app.title for app in apps], ['First', 'Second'])
+        self.assertTrue(all(app.owner == self.owner for app in apps))
+        self.assertTrue(all(app.verification_status == App.STATUS_PENDING for app in apps))
+        self.assertEqual(apps[0].price, Decimal('1.99'))
+
+    def test_import_ndjson(self):
+        """Test NDJSON files are imported, with blank lines skipped."""
+        path = self.write('apps.ndjson', '{"title": "One", "description": "d", "price": "1"}\n\n'
+                                         '{"title": "Two", "description": "d", "price": 2}\n')
+
+        self.import_apps(path)
+
+        self.assertEqual(App.objects.count(), 2)
+
+    def test_queries_per_batch(self):
+        """Test a batch costs the same number of queries whatever its size."""
+        importer = AppImporter(self.owner, batch_size=100)
+        small = [(i, {'title': f'Small {i}', 'description': 'd', 'price': '1'}) for i in range(2)]
+        large = [(i, {'title': f'Large {i}', 'description': 'd', 'price': '1'}) for i in range(50)]
+
+        with CaptureQueriesContext(connection) as small_queries:
+            importer.import_batch(small)
+        with CaptureQueriesContext(connection) as large_queries:
+            importer.import_batch(large)
+
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertEqual(App.objects.count(), 52)
+
+    def test_rejected_rows_are_reported(self):
+        """Test invalid rows are reported by row number and the others imported."""
+        create_app(owner=self.owner, title='Taken')
+        path = self.write('apps.ndjson', '\n'.join([
+            '{"title": "Good", "description": "d", "price": "1"}',
+            '{"title": "Taken", "description": "d", "price": "1"}',
+            '{"title": "Good", "description": "d", "price": "1"}',
+            '{"title": "Cheap", "description": "d", "price": "free"}',
+            'not json',
+            '{"description": "d", "price": "1"}',
+        ]))
+        report = os.path.join(self.directory.name, 'errors.csv')
+
+        out, _ = self.import_apps(path, '--errors', report)
+
+        self.assertIn('1 apps imported, 5 rows rejected.', out)
+        with open(report, newline='') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual([row[0] for row in rows], ['row', '2', '3', '4', '5', '6'])
+        self.assertIn(TITLE_TAKEN, rows[1][1])
+        self.assertIn(TITLE_REPEATED, rows[2][1])
+        self.assertIn('price', rows[3][1])
+        self.assertIn('title', rows[5][1])
+        self.assertEqual(App.objects.filter(title='Good').count(), 1)
+
+    def test_resume_from_checkpoint(self):
+        """Test an interrupted import resumes after the last committed batch."""
+        path = self.write_csv([(f'App {i}', '1') for i in range(5)])
+        checkpoint = os.path.join(self.directory.name, 'checkpoint.json')
+        import_batch = AppImporter.import_batch
+        calls = []
+
+        def interrupt_second_batch(importer, batch):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return import_batch(importer, batch)
+
+        with patch.object(AppImporter, 'import_batch', interrupt_second_batch):
+            with self.assertRaises(KeyboardInterrupt):
+                self.import_apps(path, '--batch-size', '2', '--checkpoint', checkpoint)
+        self.assertEqual(App.objects.count(), 2)
+
+        out, err = self.import_apps(path, '--batch-size', '2', '--checkpoint', checkpoint)
+
+        self.assertIn('Resuming after row 2.', out)
+        self.assertEqual(err, '')
+        self.assertEqual(App.objects.count(), 5)
+
+    def test_import_invalidates_catalog_cache(self):
+        """Test imported apps show up in a cached app list."""
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        client.get(APPS_URL)
+
+        self.import_apps(self.write_csv([('Fresh', '1')]))
+
+        res = client.get(APPS_URL)
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual([app['title'] for app in res.data['results']], ['Fresh'])
+
+    def test_unknown_owner(self):
+        """Test the owner has to exist."""
+        with self.assertRaisesMessage(CommandError, 'nobody@example.com'):
+            call_command('import_apps', self.write_csv([]), '--owner', 'nobody@example.com')
+
+
+class AsyncAppApiTests(TestCase):
+    """Test the async catalog endpoints."""
+
+    def setUp(self):
+        self.user = create_user(email='user@example.com', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.apps = [create_app(owner=self.user, title=f'App {i}') for i in range(3)]
+
+    def test_requires_token(self):
+        """Test anonymous requests and unknown tokens are rejected."""
+        self.assertEqual(APIClient().get(ASYNC_APPS_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION='Token unknown')
+        self.assertEqual(self.client.get(ASYNC_APPS_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_read_only(self):
+        """Test the async endpoints only answer reads."""
+        res = self.client.post(ASYNC_APPS_URL, {'title': 'New'})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_list_matches_sync_list(self):
+        """Test the async list returns the same apps as the sync one."""
+        res = self.client.get(ASYNC_APPS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['results'], self.client.get(APPS_URL).json()['results'])
+
+    def test_list_pages(self):
+        """Test the list follows its cursor to the last page."""
+        res = self.client.get(ASYNC_APPS_URL, {'page_size': 2})
+        ids = [app['id'] for app in res.json()['results']]
+        res = self.client.get(res.json()['next'])
+        ids += [app['id'] for app in res.json()['results']]
+
+        self.assertEqual(ids, [app.id for app in reversed(self.apps)])
+        self.assertIsNone(res.json()['next'])
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor is answered like the sync list does."""
+        res = self.client.get(ASYNC_APPS_URL, {'cursor': 'garbage'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_detail(self):
+        """Test the async detail matches the sync detail."""
+        res = self.client.get(async_detail_url(self.apps[0].id))
+
+        self.assertEqual(res.json(), self.client.get(detail_url(self.apps[0].id)).json())
+
+    def test_detail_not_found(self):
+        """Test unknown apps are a 404."""
+        res = self.client.get(async_detail_url(999999))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_served_on_the_event_loop(self):
+        """Test the views run natively under the async client."""
+        res = await AsyncClient().get(ASYNC_APPS_URL, headers={'Authorization': f'Token {self.token.key}'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()['results']), 3)
@@ -8,7 +8,7 @@ from django.urls import (
 
 from rest_framework.routers import DefaultRouter
 
-from apps import views
+from apps import async_views, views
 
 
 router = DefaultRouter()
@@ -18,4 +18,6 @@ app_name = 'app'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/apps/', async_views.app_list, name='async-app-list'),
+    path('async/apps/<int:pk>/', async_views.app_detail, name='async-app-detail'),
 ]
@@ -1,31 +1,195 @@
 """
 Views for the app APIs
 """
-from rest_framework.exceptions import NotFound
+from django.db.models import Count, Max
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 # Create your views here.
-from apps.models import App
+from apps.cache import catalog_cache
+from apps.filters import AppFilterBackend, AppOrderingFilter
+from apps.models import App, TopApp
 from apps import serializers
+from apps.pagination import AppCursorPagination, AppSearchPagination, OwnAppCursorPagination
+from apps.search import AppSearchFilter
+from core.db.routers import replicas_may_lag, use_primary
+from core.mixins import ConditionalGetMixin
+from users.authentication import CachedTokenAuthentication
 
 
-class AppViewSet(viewsets.ModelViewSet):
+class CatalogCacheMixin:
+    """
+    Serve ``list`` and ``retrieve`` payloads through the catalog cache.
+
+    A payload is rendered from the primary while its version token is
+    younger than ``DATABASE_REPLICATION['STICKINESS_SECONDS']``: right after
+    an invalidation a lagging replica would have it cached stale for the
+    whole cache timeout.
+    """
+
+    def list(self, request, *args, **kwargs):
+        key = catalog_cache.list_key(request.build_absolute_uri())
+        version_key = catalog_cache.CATALOG_VERSION_KEY
+        return self._cached_response(key, version_key, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        if not pk.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        key = catalog_cache.detail_key(pk, request.build_absolute_uri())
+        version_key = catalog_cache.app_version_key(pk)
+        return self._cached_response(key, version_key, super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, key, version_key, view, request, *args, **kwargs):
+        """Serve a cached payload for key, or render it with view and cache it."""
+        data = catalog_cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        with use_primary(replicas_may_lag(catalog_cache.version_issued_at(version_key))):
+            response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            catalog_cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class AppViewSet(ConditionalGetMixin, CatalogCacheMixin, viewsets.ModelViewSet):
     """View for manage app APIs."""
     serializer_class = serializers.AppDetailSerializer
     queryset = App.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = AppCursorPagination
+    # Search runs last: it may rank the filtered rows in Python.
+    filter_backends = [AppFilterBackend, AppOrderingFilter, AppSearchFilter]
+    ordering_fields = ['created_at', 'price']
+    ordering = AppCursorPagination.ordering
+
+    @property
+    def is_search(self):
+        return self.action == 'list' and bool(AppSearchFilter.get_search_query(self.request))
+
+    @property
+    def paginator(self):
+        """Ranked search results are paginated by offset, not by cursor."""
+        if self.is_search and not hasattr(self, '_paginator'):
+            self._paginator = AppSearchPagination()
+        return super().paginator
 
     def get_serializer_class(self):
+        if self.is_search:
+            return serializers.AppSearchSerializer
         if self.action == 'list':
             return serializers.AppSerializer
         return self.serializer_class
 
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ('list', 'retrieve'):
+            kwargs.setdefault('fields', self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        """Only SELECT the columns that the read actions are going to serialize."""
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            serializer_fields = self.get_serializer_class()().fields
+            model_fields = {field.name for field in App._meta.concrete_fields}
+            # The ordering fields position the pagination cursor.
+            ordering = AppOrderingFilter().get_ordering(self.request, queryset, self)
+            columns = {field.lstrip('-') for field in ordering}
+            columns.update(serializer_fields[name].source for name in self.get_sparse_fields())
+            queryset = queryset.only(*columns & model_fields).read_only()
+        return queryset
+
+    def get_sparse_fields(self):
+        """
+        Return the readable fields picked with the comma separated ``?fields=``
+        and ``?exclude=`` query parameters; all of them by default.
+        """
+        if getattr(self, '_sparse_fields', None) is None:
+            available = [
+                name for name, field in self.get_serializer_class()().fields.items() if not field.write_only
+            ]
+            fields = self._get_field_list('fields') or available
+            exclude = self._get_field_list('exclude')
+
+            unknown = sorted((set(fields) | set(exclude)) - set(available))
+            if unknown:
+                raise ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}."})
+            self._sparse_fields = [name for name in available if name in fields and name not in exclude]
+        return self._sparse_fields
+
+    def _get_field_list(self, param):
+        value = self.request.query_params.get(param, '')
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def get_list_validators(self):
+        """
+        Fingerprint the whole catalog by the version token of the catalog
+        cache, which every change to an app replaces, without a query. Other
+        workers only see a new token through the shared cache, so without
+        one the catalog is fingerprinted by its size and latest modification.
+        The query string in the ETag tells filtered and searched lists apart.
+        """
+        if catalog_cache.is_shared:
+            return catalog_cache.catalog_version()
+        stats = self.get_queryset().aggregate(
+            count=Count('id'),
+            last_modified=Max('updated_at'),
+        )
+        last_modified = stats['last_modified']
+        return f"{stats['count']}:{last_modified and last_modified.isoformat()}", last_modified
+
+    def get_detail_validators(self):
+        pk = self.kwargs[self.lookup_field]
+        if not pk.isdigit():
+            return None
+        updated_at = self.get_queryset().filter(pk=pk).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None
+        return f"{pk}:{updated_at.isoformat()}", updated_at
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    @action(detail=False, methods=['get'], serializer_class=serializers.TopAppSerializer, pagination_class=None)
+    def top(self, request):
+        """
+        Best-selling verified apps, read from the ranking last built by the
+        ``refresh_top_apps`` command rather than aggregated from the orders.
+        """
+        ranking = TopApp.objects.all()
+        stats = ranking.aggregate(count=Count('rank'), refreshed_at=Max('refreshed_at'))
+        refreshed_at = stats['refreshed_at']
+        validators = f"{stats['count']}:{refreshed_at and refreshed_at.isoformat()}", refreshed_at
+
+        def view(request):
+            queryset = ranking.select_related('app').only(
+                'rank', 'app', 'purchase_count', 'revenue', 'refreshed_at', 'app__title', 'app__price',
+            )
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        return self.conditional_response(validators, view, request)
+
+    @action(detail=False, methods=['get'], serializer_class=serializers.OwnAppSerializer,
+            pagination_class=OwnAppCursorPagination, filter_backends=[])
+    def mine(self, request):
+        """
+        The apps of the current user, newest first, whatever their status.
+        Every column is in the ``app_owner_created_cover_idx`` covering index,
+        so PostgreSQL answers from the index alone. Without filter backends
+        the pagination can not be reordered by ``?ordering=``.
+        """
+        queryset = App.objects.filter(owner=request.user).only(*serializers.OwnAppSerializer.Meta.fields).read_only()
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
     def destroy(self, request, *args, **kwargs):
         """
         Ensure only the owner can delete the app. Return 404 if the app is not found
@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'appstore.settings')
 
 application = get_asgi_application()
+
+# Open the pooled connections up front rather than on the first requests;
+# a database that is down is only logged.
+from core.db.pool import warm_pools  # noqa: E402
+
+warm_pools()
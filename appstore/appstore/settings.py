@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestProfilingMiddleware',
+    'core.middleware.ReplicaStickinessMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,17 +83,106 @@ WSGI_APPLICATION = 'appstore.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# With DB_POOL=1 connections are borrowed from a pool for every request
+# instead of being kept by each thread for DB_CONN_MAX_AGE seconds.
+DB_POOL = os.environ.get('DB_POOL') == '1'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql_pool' if DB_POOL else 'django.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
-
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0 if DB_POOL else 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 20)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+            'MAX_IDLE': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+            'CHECK_INTERVAL': float(os.environ.get('DB_POOL_CHECK_INTERVAL', 30)),
+        },
     }
 }
 
+# A CACHES alias shared by the workers, e.g. a Redis or Memcached one, to
+# keep the replica pins, failed login counts, login tokens and app catalog
+# cache in (see core/cache.py). Without one every worker keeps its own.
+SHARED_CACHE = os.environ.get('SHARED_CACHE') or None
+
+# Read replicas, one per host of DB_REPLICA_HOSTS, with the credentials of
+# the primary. In tests they mirror it instead of getting their own database.
+DB_REPLICA_HOSTS = [host for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if host]
+
+for index, host in enumerate(DB_REPLICA_HOSTS, start=1):
+    DATABASES[f'replica{index}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['core.db.routers.PrimaryReplicaRouter']
+
+# Reads go to the replicas, except for clients that wrote in the last
+# STICKINESS_SECONDS (see core/middleware.py).
+DATABASE_REPLICATION = {
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+    'STICKINESS_SECONDS': int(os.environ.get('DB_REPLICA_STICKINESS_SECONDS', 5)),
+    'MAX_PINNED_CLIENTS': int(os.environ.get('DB_REPLICA_MAX_PINNED_CLIENTS', 10000)),
+}
+
+
+# Password hashing. New passwords are hashed with the hasher of the
+# profile; existing hashes of another profile or cost are upgraded on the
+# next successful login. The default Argon2id costs are the OWASP minimum
+# (19 MiB, 2 passes, 1 lane), about 30 ms of one core per login, a tenth of
+# Django's PBKDF2 default. See `manage.py benchmark_login`.
+PASSWORD_HASHING = {
+    'PROFILE': os.environ.get('PASSWORD_HASHER_PROFILE', 'argon2'),
+    'ARGON2_TIME_COST': int(os.environ.get('ARGON2_TIME_COST', 2)),
+    'ARGON2_MEMORY_COST': int(os.environ.get('ARGON2_MEMORY_COST', 19456)),
+    'ARGON2_PARALLELISM': int(os.environ.get('ARGON2_PARALLELISM', 1)),
+    'SCRYPT_WORK_FACTOR': int(os.environ.get('SCRYPT_WORK_FACTOR', 2 ** 14)),
+    'SCRYPT_BLOCK_SIZE': int(os.environ.get('SCRYPT_BLOCK_SIZE', 8)),
+    'SCRYPT_PARALLELISM': int(os.environ.get('SCRYPT_PARALLELISM', 1)),
+    'PBKDF2_ITERATIONS': int(os.environ.get('PBKDF2_ITERATIONS', 600000)),
+}
+
+# PASSWORD_HASHERS of each profile: its hasher first, to hash new passwords,
+# then the others, to verify passwords hashed before a switch. The algorithm
+# names are Django's, so hashes made by the stock hashers are verified too.
+PASSWORD_HASHER_PROFILES = {
+    'argon2': [
+        'users.hashers.TunedArgon2PasswordHasher',
+        'users.hashers.TunedScryptPasswordHasher',
+        'users.hashers.TunedPBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    ],
+    'scrypt': [
+        'users.hashers.TunedScryptPasswordHasher',
+        'users.hashers.TunedArgon2PasswordHasher',
+        'users.hashers.TunedPBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    ],
+    'pbkdf2': [
+        'users.hashers.TunedPBKDF2PasswordHasher',
+        'users.hashers.TunedArgon2PasswordHasher',
+        'users.hashers.TunedScryptPasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    ],
+}
+
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[PASSWORD_HASHING['PROFILE']]
+
+# Failed logins tolerated per email from one client address, per email from
+# any address and per client address, within WINDOW seconds, after which the
+# token endpoint answers 429 without hashing the password (see
+# users/throttling.py).
+LOGIN_THROTTLE = {
+    'MAX_FAILURES': int(os.environ.get('LOGIN_THROTTLE_MAX_FAILURES', 5)),
+    'MAX_FAILURES_PER_EMAIL': int(os.environ.get('LOGIN_THROTTLE_MAX_FAILURES_PER_EMAIL', 20)),
+    'MAX_FAILURES_PER_IP': int(os.environ.get('LOGIN_THROTTLE_MAX_FAILURES_PER_IP', 50)),
+    'WINDOW': int(os.environ.get('LOGIN_THROTTLE_WINDOW', 300)),
+    'MAX_ENTRIES': int(os.environ.get('LOGIN_THROTTLE_MAX_ENTRIES', 100000)),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -135,4 +227,46 @@ AUTH_USER_MODEL = 'users.User'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-}
\ No newline at end of file
+    # Reverse proxies in front of the app. The throttles identify clients by
+    # the X-Forwarded-For entry the last of them added, or by REMOTE_ADDR
+    # without one, rather than by addresses the client can make up.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Opt-in per-request SQL and timing instrumentation (see core/middleware.py).
+REQUEST_PROFILING = {
+    'ENABLED': os.environ.get('REQUEST_PROFILING') == '1',
+    'SLOW_REQUEST_MS': int(os.environ.get('REQUEST_PROFILING_SLOW_MS', 500)),
+    'SLOW_SAMPLE_RATE': float(os.environ.get('REQUEST_PROFILING_SLOW_SAMPLE_RATE', 1.0)),
+}
+
+# Token -> user cache used by CachedTokenAuthentication, in SHARED_CACHE if set.
+AUTH_TOKEN_CACHE = {
+    'MAX_ENTRIES': int(os.environ.get('AUTH_TOKEN_CACHE_MAX_ENTRIES', 10000)),
+    'TTL': int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 60)),
+}
+
+# Token handed out at login (see users/tokens.py). LIFETIME, in seconds, makes
+# tokens expire and be replaced at the next login; 0 keeps them forever.
+# last_login is written at most once per LAST_LOGIN_INTERVAL seconds.
+AUTH_TOKEN_ISSUANCE = {
+    'LIFETIME': int(os.environ.get('AUTH_TOKEN_LIFETIME', 0)),
+    'LAST_LOGIN_INTERVAL': int(os.environ.get('AUTH_TOKEN_LAST_LOGIN_INTERVAL', 300)),
+    'TTL': int(os.environ.get('AUTH_TOKEN_ISSUANCE_TTL', 300)),
+    'MAX_ENTRIES': int(os.environ.get('AUTH_TOKEN_ISSUANCE_MAX_ENTRIES', 10000)),
+}
+
+# Read-through cache for serialized app catalog payloads (see apps/cache.py).
+APP_CATALOG_CACHE = {
+    'MAX_ENTRIES': int(os.environ.get('APP_CATALOG_CACHE_MAX_ENTRIES', 1024)),
+    'TIMEOUT': int(os.environ.get('APP_CATALOG_CACHE_TIMEOUT', 300)),
+}
+# Post-purchase events delivered by the drain_outbox worker (see core/outbox.py).
+# A failed event is retried after BACKOFF_SECONDS, doubled at every attempt.
+OUTBOX = {
+    'BATCH_SIZE': int(os.environ.get('OUTBOX_BATCH_SIZE', 100)),
+    'MAX_ATTEMPTS': int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 10)),
+    'BACKOFF_SECONDS': int(os.environ.get('OUTBOX_BACKOFF_SECONDS', 5)),
+    'MAX_BACKOFF_SECONDS': int(os.environ.get('OUTBOX_MAX_BACKOFF_SECONDS', 3600)),
+    'POLL_INTERVAL': float(os.environ.get('OUTBOX_POLL_INTERVAL', 1)),
+}
@@ -0,0 +1,32 @@
+"""
+Helpers for the async (ASGI) read endpoints.
+"""
+import functools
+
+from django.http import JsonResponse
+
+from users.authentication import aauthenticate
+
+
+def async_api_view(view):
+    """
+    Turn ``view`` into a token-authenticated, read-only async endpoint.
+
+    The view runs natively on the event loop under ASGI and gets the user as
+    ``request.user``. Errors are answered with the same ``{"detail": ...}``
+    bodies as the DRF views.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+            response['Allow'] = 'GET, HEAD'
+            return response
+        user = await aauthenticate(request)
+        if user is None:
+            response = JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+            response['WWW-Authenticate'] = 'Token'
+            return response
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,594 @@
+"""
+Helpers for the query-count and latency benchmarks of the API.
+"""
+import asyncio
+import copy
+import gc
+import itertools
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections
+from django.db.utils import load_backend
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils.timezone import now
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from apps.cache import catalog_cache
+from apps.models import App, TopApp
+from core.db.pool import close_pools
+from core.tracker import call_untracked
+from orders.models import Order
+from users.authentication import token_cache
+from users.tokens import token_issuer
+from users.hashers import hashers_for
+from users.throttling import login_failures
+
+
+DEFAULT_TOLERANCE = 0.5
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def primary_only():
+    """Route the reads to the primary too, the benchmarks seed and measure only its database."""
+    with override_settings(DATABASE_REPLICATION={**getattr(settings, 'DATABASE_REPLICATION', {}), 'REPLICAS': []}):
+        yield
+
+
+def seed_dataset(users, apps, orders, batch_size=5000):
+    """
+    Bulk-create ``users`` users, ``apps`` apps and ``orders`` orders.
+
+    Rows are inserted with ``bulk_create`` in batches, so no model signals
+    run and the password is hashed only once. The purchase counters and the
+    best-sellers ranking are computed once at the end. Returns the first user, who
+    owns the first app and has at least one order when the sizes allow it.
+    """
+    if orders > users * apps:
+        raise ValueError('Cannot create more orders than (user, app) pairs.')
+
+    password = make_password('benchmark-password')
+    user_model = get_user_model()
+    for batch in _batched(range(users), batch_size):
+        user_model.objects.bulk_create(
+            user_model(email=f'bench-user-{i}@example.com', name=f'Bench user {i}', password=password)
+            for i in batch
+        )
+    user_ids = list(
+        user_model.objects.filter(email__startswith='bench-user-').order_by('id').values_list('id', flat=True)
+    )
+
+    statuses = [App.STATUS_VERIFIED] * 8 + [App.STATUS_PENDING, App.STATUS_REJECTED]
+    for batch in _batched(range(apps), batch_size):
+        App.objects.bulk_create(
+            App(
+                title=f'Bench app {i}',
+                description=f'Description of bench app {i}. ' * 20,
+                price=Decimal(i % 10000) / 100,
+                owner_id=user_ids[i % len(user_ids)],
+                verification_status=statuses[i % len(statuses)],
+            )
+            for i in batch
+        )
+
+    bench_apps = App.objects.filter(title__startswith='Bench app ')
+    app_ids = list(bench_apps.order_by('id').values_list('id', flat=True))
+    prices = dict(bench_apps.values_list('id', 'price'))
+
+    # Walk (user, app) pairs so that the unique_owner_app_order constraint holds.
+    for batch in _batched(range(orders), batch_size):
+        pairs = [(user_ids[i % len(user_ids)], app_ids[(i // len(user_ids)) % len(app_ids)]) for i in batch]
+        Order.objects.bulk_create(
+            Order(owner_id=owner_id, app_id=app_id, price=prices[app_id]) for owner_id, app_id in pairs
+        )
+    bench_apps.recount_purchases()
+    TopApp.objects.refresh()
+
+    return user_model.objects.get(pk=user_ids[0])
+
+
+class Endpoint:
+    """
+    A request to benchmark.
+
+    ``build`` receives the benchmark context and returns ``(path, data)``; it
+    runs outside of the measurement so it may create the rows the request
+    needs (e.g. an app to delete).
+    """
+
+    def __init__(self, route, method, build, authenticated=True, staff=False, format='json'):
+        self.route = route
+        self.method = method
+        self.build = build
+        self.authenticated = authenticated
+        self.staff = staff
+        self.format = format
+
+    @property
+    def name(self):
+        return f'{self.method} {self.route}'
+
+
+def _new_app(context, **kwargs):
+    params = {
+        'title': f'Benchmark app {next(context["counter"])}',
+        'description': 'Created by the benchmark.',
+        'price': Decimal('1.00'),
+        'owner': context['user'],
+        'verification_status': App.STATUS_VERIFIED,
+    }
+    params.update(kwargs)
+    return App.objects.create(**params)
+
+
+def _app_payload(context):
+    return {'title': f'Benchmark app {next(context["counter"])}', 'description': 'Updated.', 'price': '2.00'}
+
+
+ENDPOINTS = [
+    Endpoint('api-schema', 'get', lambda c: (reverse('api-schema'), None), authenticated=False),
+    Endpoint('api-docs', 'get', lambda c: (reverse('api-docs'), None), authenticated=False),
+    Endpoint('users:create', 'post', lambda c: (reverse('users:create'), {
+        'email': f'bench-new-{next(c["counter"])}@example.com', 'password': 'benchmark-password', 'name': 'New',
+    }), authenticated=False),
+    Endpoint('users:token', 'post', lambda c: (reverse('users:token'), {
+        'email': c['user'].email, 'password': 'benchmark-password',
+    }), authenticated=False),
+    Endpoint('users:profile', 'get', lambda c: (reverse('users:profile'), None)),
+    Endpoint('users:profile', 'patch', lambda c: (reverse('users:profile'), {'name': 'Renamed'})),
+    Endpoint('app:api-root', 'get', lambda c: (reverse('app:api-root'), None)),
+    Endpoint('app:app-list', 'get', lambda c: (reverse('app:app-list'), None)),
+    Endpoint('app:app-list', 'post', lambda c: (reverse('app:app-list'), _app_payload(c))),
+    Endpoint('app:app-top', 'get', lambda c: (reverse('app:app-top'), None)),
+    Endpoint('app:app-mine', 'get', lambda c: (reverse('app:app-mine'), None)),
+    Endpoint('app:async-app-list', 'get', lambda c: (reverse('app:async-app-list'), None)),
+    Endpoint('app:async-app-detail', 'get', lambda c: (reverse('app:async-app-detail', args=[c['app'].id]), None)),
+    Endpoint('app:app-detail', 'get', lambda c: (reverse('app:app-detail', args=[c['app'].id]), None)),
+    Endpoint('app:app-detail', 'put', lambda c: (
+        reverse('app:app-detail', args=[_new_app(c).id]), _app_payload(c),
+    )),
+    Endpoint('app:app-detail', 'delete', lambda c: (reverse('app:app-detail', args=[_new_app(c).id]), None)),
+    Endpoint('order:api-root', 'get', lambda c: (reverse('order:api-root'), None)),
+    Endpoint('order:order-list', 'get', lambda c: (reverse('order:order-list'), None)),
+    Endpoint('order:order-list', 'post', lambda c: (reverse('order:order-list'), {'app': _new_app(c).id})),
+    Endpoint('order:order-bulk', 'post', lambda c: (reverse('order:order-bulk'), {
+        'apps': [_new_app(c).id for _ in range(10)],
+    })),
+    Endpoint('order:order-export', 'get', lambda c: (reverse('order:order-export'), None), staff=True),
+    Endpoint('order:async-order-list', 'get', lambda c: (reverse('order:async-order-list'), None)),
+    Endpoint('order:order-detail', 'get', lambda c: (reverse('order:order-detail', args=[c['order'].id]), None)),
+    Endpoint('order:order-detail', 'delete', lambda c: (
+        reverse('order:order-detail', args=[Order.objects.create(owner=c['user'], app=_new_app(c)).id]), None,
+    )),
+    Endpoint('admin:apps_app_changelist', 'get', lambda c: (reverse('admin:apps_app_changelist'), None)),
+    Endpoint('admin:orders_order_changelist', 'get', lambda c: (reverse('admin:orders_order_changelist'), None)),
+]
+
+
+def iter_route_names(patterns=None, namespace=None):
+    """Yield the namespaced name of every named route, skipping the admin site."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            child = ':'.join(filter(None, [namespace, pattern.namespace])) or None
+            yield from iter_route_names(pattern.url_patterns, child)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield ':'.join(filter(None, [namespace, pattern.name]))
+
+
+def missing_routes(endpoints=ENDPOINTS):
+    """Return the routes that no endpoint benchmarks."""
+    covered = {endpoint.route for endpoint in endpoints}
+    return sorted(set(iter_route_names()) - covered)
+
+
+def _request(endpoint, context):
+    client = APIClient()
+    if endpoint.route.startswith('admin:'):
+        client.force_login(context['admin'])
+    elif endpoint.authenticated:
+        token = context['admin_token'] if endpoint.staff else context['token']
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    path, data = endpoint.build(context)
+    # Every run starts cold so that query counts are deterministic.
+    catalog_cache.clear()
+    token_cache.clear()
+    token_issuer.clear()
+    return getattr(client, endpoint.method), path, data
+
+
+def _consume(response):
+    """Read a streaming response, whose queries only run as it is consumed."""
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+
+
+def measure(endpoint, context, repeat=5):
+    """Return the query count, median wall time and peak memory of an endpoint."""
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        send, path, data = _request(endpoint, context)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = send(path, data, format=endpoint.format)
+            _consume(response)
+            timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            raise AssertionError(f'{endpoint.name} answered {response.status_code}: {response.content[:200]!r}')
+        queries = max(queries, len(captured))
+
+    send, path, data = _request(endpoint, context)
+    tracemalloc.start()
+    try:
+        _consume(send(path, data, format=endpoint.format))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'queries': queries,
+        'time_ms': round(statistics.median(timings), 3),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+@primary_only()
+def run_api_benchmark(users, apps, orders, repeat=5, endpoints=ENDPOINTS):
+    """Seed a dataset in the current database and measure every endpoint."""
+    user = seed_dataset(users, apps, orders)
+    admin = get_user_model().objects.create_superuser(email='bench-admin@example.com', password='benchmark-password')
+    context = {
+        'user': user,
+        'admin': admin,
+        'token': Token.objects.create(user=user),
+        'admin_token': Token.objects.create(user=admin),
+        'app': user.apps.order_by('id').first() or _new_app({'user': user, 'counter': itertools.count()}),
+        'counter': itertools.count(),
+    }
+    context['order'] = user.user_orders.first() or Order.objects.create(owner=user, app=_new_app(context))
+
+    return {
+        'dataset': {'users': users, 'apps': apps, 'orders': orders},
+        'endpoints': {endpoint.name: measure(endpoint, context, repeat) for endpoint in endpoints},
+    }
+
+
+# Sync route, async route and the arguments of both.
+ASYNC_VIEW_ENDPOINTS = [
+    ('app:app-list', 'app:async-app-list', lambda c: []),
+    ('app:app-detail', 'app:async-app-detail', lambda c: [c['app'].id]),
+    ('order:order-list', 'order:async-order-list', lambda c: []),
+]
+
+
+def measure_sync_throughput(path, headers, requests, concurrency, latency):
+    """
+    Return the requests per second of ``requests`` GETs of path served in
+    process by the sync test client on ``concurrency`` threads.
+
+    Every thread stays busy ``latency`` seconds after its response, the time
+    a slow client takes to read it, and closes its database connection as
+    Django does at the end of a request with the default CONN_MAX_AGE.
+    """
+    client = Client()
+
+    def serve(_):
+        response = client.get(path, headers=headers)
+        if response.status_code != 200:
+            raise AssertionError(f'{path} answered {response.status_code}')
+        time.sleep(latency)
+        connections.close_all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(serve, range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def measure_async_throughput(path, headers, requests, concurrency, latency):
+    """
+    Return the requests per second of ``requests`` GETs of path served in
+    process by the async test client with up to ``concurrency`` requests in
+    flight on one event loop, every one of them held ``latency`` seconds by
+    its client.
+    """
+    client = AsyncClient()
+    in_flight = asyncio.Semaphore(concurrency)
+
+    async def serve():
+        async with in_flight:
+            response = await client.get(path, headers=headers)
+            if response.status_code != 200:
+                raise AssertionError(f'{path} answered {response.status_code}')
+            await asyncio.sleep(latency)
+            await sync_to_async(connections.close_all)()
+
+    async def serve_all():
+        await asyncio.gather(*(serve() for _ in range(requests)))
+
+    start = time.perf_counter()
+    asyncio.run(serve_all())
+    return requests / (time.perf_counter() - start)
+
+
+@primary_only()
+def run_async_view_benchmark(users, apps, orders, requests=200, concurrency=50, latency=0.05):
+    """
+    Seed a dataset and compare the throughput of the sync and async read
+    views, called through the test clients with the same number of requests
+    in flight. No server is involved, see the ``benchmark_async_views``
+    command.
+    """
+    user = seed_dataset(users, apps, orders)
+    token = Token.objects.create(user=user)
+    context = {'app': user.apps.order_by('id').first() or _new_app({'user': user, 'counter': itertools.count()})}
+    headers = {'Authorization': f'Token {token.key}'}
+
+    results = {}
+    for sync_route, async_route, args in ASYNC_VIEW_ENDPOINTS:
+        catalog_cache.clear()
+        sync_path, async_path = reverse(sync_route, args=args(context)), reverse(async_route, args=args(context))
+        sync_rps = measure_sync_throughput(sync_path, headers, requests, concurrency, latency)
+        async_rps = measure_async_throughput(async_path, headers, requests, concurrency, latency)
+        results[sync_route] = {
+            'sync_rps': round(sync_rps, 1),
+            'async_rps': round(async_rps, 1),
+            'speedup': round(async_rps / sync_rps, 2),
+        }
+    return results
+
+
+@primary_only()
+def run_login_benchmark(logins=20, profiles=None):
+    """
+    Measure signups and token logins with every password hasher profile.
+
+    Logins run one after the other, so ``logins_per_core`` is the throughput
+    of one core: logins per second of CPU time, which also counts the extra
+    threads of a hasher with parallel lanes. ``throttled_ms`` is the cost of
+    an attempt refused by the login throttle, which hashes nothing.
+    """
+    client = APIClient()
+    path = reverse('users:token')
+    password = 'benchmark-password'
+    results = {}
+    for profile in profiles or settings.PASSWORD_HASHER_PROFILES:
+        with override_settings(PASSWORD_HASHERS=hashers_for(profile)):
+            email = f'bench-login-{profile}@example.com'
+            start = time.perf_counter()
+            get_user_model().objects.create_user(email=email, password=password)
+            signup = time.perf_counter() - start
+
+            start, cpu_start = time.perf_counter(), time.process_time()
+            for _ in range(logins):
+                response = client.post(path, {'email': email, 'password': password})
+                if response.status_code != 200:
+                    raise AssertionError(f'Login with {profile} answered {response.status_code}')
+            elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+
+            # The 4xx answers would each log a warning.
+            request_logger = logging.getLogger('django.request')
+            level = request_logger.level
+            request_logger.setLevel(logging.ERROR)
+            try:
+                for _ in range(login_failures.max_failures):
+                    client.post(path, {'email': email, 'password': 'wrong-password'})
+                start = time.perf_counter()
+                response = client.post(path, {'email': email, 'password': 'wrong-password'})
+                throttled = time.perf_counter() - start
+            finally:
+                request_logger.setLevel(level)
+            if response.status_code != 429:
+                raise AssertionError(f'Failed logins with {profile} were not throttled')
+            login_failures.clear()
+
+        results[profile] = {
+            'signup_ms': round(signup * 1000, 1),
+            'login_ms': round(elapsed / logins * 1000, 1),
+            'logins_per_core': round(logins / cpu, 1) if cpu else None,
+            'throttled_ms': round(throttled * 1000, 3),
+        }
+    return results
+
+
+# Connection handling compared by the connection benchmark: the engine,
+# ``None`` for the configured one, and the CONN_MAX_AGE.
+CONNECTION_MODES = {
+    'per-request': (None, 0),
+    'persistent': (None, None),
+    'pooled': ('core.db.backends.postgresql_pool', 0),
+}
+
+
+def connection_wrapper(alias, engine=None, max_age=0):
+    """Return a new connection to the database alias, with its engine and CONN_MAX_AGE overridden."""
+    settings_dict = {**connections[alias].settings_dict, 'CONN_MAX_AGE': max_age}
+    if engine is not None:
+        settings_dict['ENGINE'] = engine
+    return load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, alias)
+
+
+def measure_connection_overhead(wrapper, requests):
+    """
+    Return the time in ms of ``requests`` simulated requests on wrapper.
+
+    Each runs a single ``SELECT 1`` between the connection housekeeping
+    Django does when a request starts and finishes, so that what differs
+    between the modes is the cost of getting a connection.
+    """
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        wrapper.close_if_unusable_or_obsolete()
+        timings.append((time.perf_counter() - start) * 1000)
+    wrapper.close()
+    return timings
+
+
+def run_connection_benchmark(requests=500, alias='default'):
+    """
+    Measure the per-request latency of every connection mode the database
+    supports; the pooled mode is PostgreSQL only and measured on a warm pool.
+    """
+    results = {}
+    for mode, (engine, max_age) in CONNECTION_MODES.items():
+        if engine is not None and connections[alias].vendor != 'postgresql':
+            continue
+        wrapper = connection_wrapper(alias, engine, max_age)
+        if getattr(wrapper, 'pooled', False):
+            wrapper.warm_pool()
+        try:
+            timings = measure_connection_overhead(wrapper, requests)
+        finally:
+            if getattr(wrapper, 'pooled', False):
+                close_pools(wrapper.settings_dict['NAME'])
+        results[mode] = {
+            'mean_ms': round(statistics.mean(timings), 3),
+            'median_ms': round(statistics.median(timings), 3),
+        }
+    return results
+
+
+def _app_row(description_size):
+    """Return the column names and values of an app row, as the database returns them."""
+    stamp = now()
+    row = {
+        'id': 1, 'title': 'Bench app', 'description': 'x' * description_size, 'price': Decimal('9.99'),
+        'owner_id': 1, 'verification_status': App.STATUS_VERIFIED, 'created_at': stamp,
+        'verified_date': stamp, 'updated_at': stamp, 'purchase_count': 0, 'revenue': Decimal('0'),
+        'search_vector': None,
+    }
+    names = [field.attname for field in App._meta.concrete_fields]
+    return names, tuple(row[name] for name in names)
+
+
+def _load_all_fields(names, values):
+    # What model_utils.FieldTracker() did on top: a deep copy of every field.
+    app = App.from_db('default', names, values)
+    app.__dict__['_all_fields'] = copy.deepcopy({name: app.__dict__[name] for name in names})
+    return app
+
+
+def _load_tracked(names, values):
+    return App.from_db('default', names, values)
+
+
+def _load_read_only(names, values):
+    # As UntrackedModelIterable does for every row.
+    return call_untracked(App.from_db, 'default', names, values)
+
+
+# Ways of building the apps of a query compared by the instantiation benchmark.
+INSTANTIATION_MODES = {
+    'all-fields': _load_all_fields,
+    'tracked': _load_tracked,
+    'read-only': _load_read_only,
+}
+
+
+def run_instantiation_benchmark(instances=100000, description_size=2000, modes=tuple(INSTANTIATION_MODES)):
+    """
+    Build ``instances`` apps from an in-memory row with every mode, without
+    touching the database, and report the time per app and the memory the
+    apps hold. ``all-fields`` snapshots every field on load as the generic
+    tracker App used to; ``tracked`` is the current tracker, which only
+    keeps ``verification_status``, and ``read-only`` the apps of read-only
+    querysets, which are not tracked at all.
+    """
+    names, values = _app_row(description_size)
+    results = {}
+    for mode in modes:
+        load = INSTANTIATION_MODES[mode]
+        # As timeit does, so that collections triggered by the other modes do not count.
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            apps = [load(names, values) for _ in range(instances)]
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        del apps
+
+        tracemalloc.start()
+        try:
+            apps = [load(names, values) for _ in range(instances)]
+            held, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del apps
+
+        results[mode] = {
+            'total_ms': round(elapsed * 1000, 1),
+            'per_app_us': round(elapsed / instances * 1e6, 2),
+            'held_kb': round(held / 1024, 1),
+        }
+    return results
+
+
+def check_budgets(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare ``results`` with ``baseline`` and return a list of violations.
+
+    Query counts must not grow at all. Wall time and peak memory may exceed
+    the baseline by ``tolerance`` (a fraction) and are only compared when
+    both runs used the same dataset.
+    """
+    violations = []
+    same_dataset = results['dataset'] == baseline.get('dataset')
+    for name, budget in baseline.get('endpoints', {}).items():
+        measured = results['endpoints'].get(name)
+        if measured is None:
+            continue
+        if 'queries' in budget and measured['queries'] > budget['queries']:
+            violations.append(f"{name}: {measured['queries']} queries, budget is {budget['queries']}")
+        if not same_dataset:
+            continue
+        for metric in ('time_ms', 'peak_kb'):
+            if metric in budget and measured[metric] > budget[metric] * (1 + tolerance):
+                violations.append(f'{name}: {metric} {measured[metric]}, budget is {budget[metric]}')
+    for name in sorted(set(results['endpoints']) - set(baseline.get('endpoints', {}))):
+        violations.append(f'{name}: no budget in the baseline')
+    return violations
+
+
+def load_baseline(path):
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def write_baseline(path, results):
+    with open(path, 'w') as baseline_file:
+        json.dump(results, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
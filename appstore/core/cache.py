@@ -0,0 +1,174 @@
+"""
+Caching helpers.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU mapping with an optional per-entry TTL.
+
+    Hit and miss counters are kept so callers can report how effective the
+    cache is.
+    """
+    _missing = object()
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if absent or expired."""
+        with self._lock:
+            entry = self._data.get(key, self._missing)
+            if entry is not self._missing:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries."""
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Cache kept in an in-process LRU or, when ``shared_cache`` names one of
+    the ``CACHES`` aliases (the ``SHARED_CACHE`` setting), in Django's cache
+    framework, so that every worker sees the entries of the others.
+
+    Entries expire after ``timeout`` seconds. With ``local_copies`` an entry
+    is kept in the LRU next to the shared one, and one read from the shared
+    tier is copied into it, for data a worker may use for up to ``timeout``
+    seconds after another changed it. Otherwise the shared tier is the only
+    one, e.g. for counters every worker must agree on.
+    """
+
+    def __init__(self, max_entries=1024, timeout=300, shared_cache=None, local_copies=False):
+        self.timeout = timeout
+        self.shared_cache_alias = shared_cache
+        self.local_copies = local_copies
+        self.local = LRUCache(maxsize=max_entries, ttl=timeout)
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        if self.shared_cache_alias:
+            return caches[self.shared_cache_alias]
+        return None
+
+    def _shared_timeout(self, timeout):
+        return self.timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def get(self, key, default=None):
+        shared = self.shared
+        if shared is None or self.local_copies:
+            value = self.local.get(key, LRUCache._missing)
+            if value is not LRUCache._missing:
+                return value
+        if shared is None:
+            return default
+        value = shared.get(key, LRUCache._missing)
+        if value is LRUCache._missing:
+            self.shared_misses += 1
+            return default
+        self.shared_hits += 1
+        if self.local_copies:
+            self.local.set(key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        """Store value under key; timeout only applies to the shared tier, None keeps it forever."""
+        shared = self.shared
+        if shared is None or self.local_copies:
+            self.local.set(key, value)
+        if shared is not None:
+            shared.set(key, value, self._shared_timeout(timeout))
+
+    def set_many(self, values, timeout=DEFAULT_TIMEOUT):
+        shared = self.shared
+        if shared is None or self.local_copies:
+            for key, value in values.items():
+                self.local.set(key, value)
+        if shared is not None:
+            shared.set_many(values, self._shared_timeout(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT):
+        """Store value under key unless it is there already; return whether it was stored."""
+        shared = self.shared
+        if shared is not None:
+            return shared.add(key, value, self._shared_timeout(timeout))
+        with self._lock:
+            if self.local.get(key, LRUCache._missing) is not LRUCache._missing:
+                return False
+            self.local.set(key, value)
+            return True
+
+    def incr(self, key):
+        """Add one to the count under key, restarting its timeout, and return it."""
+        shared = self.shared
+        if shared is not None:
+            if shared.add(key, 1, self.timeout):
+                return 1
+            count = shared.incr(key)
+            shared.touch(key, self.timeout)
+            return count
+        with self._lock:
+            count = self.local.get(key, 0) + 1
+            self.local.set(key, count)
+            return count
+
+    def delete(self, key):
+        self.local.delete(key)
+        shared = self.shared
+        if shared is not None:
+            shared.delete(key)
+
+    def clear(self):
+        """Forget every local entry and reset the counters."""
+        self.local.clear()
+        self.shared_hits = 0
+        self.shared_misses = 0
@@ -0,0 +1,56 @@
+"""
+PostgreSQL backend checking its connections out of a process-wide pool.
+"""
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import DatabaseCreation as BaseDatabaseCreation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from core.db.pool import close_pools, get_pool
+
+
+class DatabaseCreation(BaseDatabaseCreation):
+    """Close the pooled connections of a test database before it is dropped or cloned."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        close_pools(self.connection.settings_dict['NAME'])
+        super()._clone_test_db(suffix, verbosity, keepdb)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Opening a connection checks one out of the pool and closing it hands it
+    back, so with ``CONN_MAX_AGE = 0`` every request borrows a connection
+    for its duration instead of paying for a new one.
+
+    The pool is configured with the ``POOL`` key of the database settings:
+    ``MIN_SIZE``, ``MAX_SIZE``, ``TIMEOUT``, ``MAX_IDLE`` and
+    ``CHECK_INTERVAL``, see ``core.db.pool.ConnectionPool``.
+    """
+    pooled = True
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias, self.settings_dict)
+        connection = pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        # Opening a connection sets the isolation level, a reused one keeps the one it was opened with.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        self._pool = pool
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            self._pool.putconn(self.connection)
+
+    def warm_pool(self):
+        """Open the ``MIN_SIZE`` connections of the pool; return how many were opened."""
+        with self.wrap_database_errors:
+            conn_params = self.get_connection_params()
+            return get_pool(self.alias, self.settings_dict).warm(
+                lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+            )
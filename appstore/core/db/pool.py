@@ -0,0 +1,211 @@
+"""
+Process-wide pool of database connections.
+"""
+import collections
+import logging
+import os
+import threading
+import time
+
+from django.db import connections
+from django.db.utils import OperationalError
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(OperationalError):
+    """Raised when no connection is returned to a full pool in time."""
+
+
+class ConnectionPool:
+    """
+    Bounded LIFO pool of DB-API connections.
+
+    At most ``max_size`` connections are open at once; a checkout waits up to
+    ``timeout`` seconds for one to be returned before giving up. Idle
+    connections are reused most recent first, closed once unused for
+    ``max_idle`` seconds, and checked with ``SELECT 1`` before reuse when
+    they sat idle longer than ``check_interval`` seconds.
+    """
+
+    def __init__(self, min_size=0, max_size=10, timeout=5.0, max_idle=300.0, check_interval=30.0):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_interval = check_interval
+        self.size = 0
+        self.opened = 0
+        self.reused = 0
+        self.discarded = 0
+        self.closed = False
+        self._idle = collections.deque()
+        self._condition = threading.Condition()
+
+    @property
+    def stats(self):
+        with self._condition:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'in_use': self.size - len(self._idle),
+                'opened': self.opened,
+                'reused': self.reused,
+                'discarded': self.discarded,
+            }
+
+    def getconn(self, connect):
+        """Return a healthy idle connection, or one opened with ``connect()``."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._condition:
+                while not self.closed and not self._idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f'No database connection was released within {self.timeout}s '
+                            f'({self.max_size} in use).'
+                        )
+                    self._condition.wait(remaining)
+                if self.closed:
+                    raise OperationalError('The connection pool is closed.')
+                if self._idle:
+                    conn, released = self._idle.pop()
+                else:
+                    conn, released = None, None
+                    self.size += 1
+            if conn is None:
+                return self._open(connect)
+            if self.is_healthy(conn, time.monotonic() - released):
+                with self._condition:
+                    self.reused += 1
+                return conn
+            self._discard(conn)
+
+    def putconn(self, conn):
+        """Return a connection to the pool, closing it if it is unusable."""
+        try:
+            if conn.closed or self.closed:
+                raise OperationalError('The connection is closed.')
+            # Roll back whatever the borrower left open, the next one starts clean.
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        now = time.monotonic()
+        with self._condition:
+            self._idle.append((conn, now))
+            stale = []
+            while len(self._idle) > self.min_size and now - self._idle[0][1] > self.max_idle:
+                stale.append(self._idle.popleft()[0])
+            self._condition.notify()
+        for idle_conn in stale:
+            self._discard(idle_conn)
+
+    def warm(self, connect):
+        """Open connections until ``min_size`` are idle; return how many were opened."""
+        opened = []
+        try:
+            while True:
+                with self._condition:
+                    if len(self._idle) + len(opened) >= self.min_size or self.size >= self.max_size:
+                        break
+                    self.size += 1
+                opened.append(self._open(connect))
+        finally:
+            for conn in opened:
+                self.putconn(conn)
+        return len(opened)
+
+    def close(self):
+        """Close the idle connections; checked out ones are closed when returned."""
+        with self._condition:
+            idle, self._idle = self._idle, collections.deque()
+            self.closed = True
+            self._condition.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def is_healthy(self, conn, idle_for):
+        if conn.closed:
+            return False
+        if idle_for < self.check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            conn.rollback()
+        except Exception:
+            return False
+        return True
+
+    def _open(self, connect):
+        try:
+            conn = connect()
+        except BaseException:
+            with self._condition:
+                self.size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.opened += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._condition:
+            self.size -= 1
+            self.discarded += 1
+            self._condition.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict):
+    """
+    Return the pool of the database ``alias`` of this process.
+
+    Pools are keyed by database name, so the test database gets its own, and
+    recreated after a fork: a child must not share the sockets of its parent.
+    """
+    key = (alias, settings_dict['NAME'])
+    with _pools_lock:
+        pid, pool = _pools.get(key, (None, None))
+        if pid != os.getpid():
+            options = {name.lower(): value for name, value in settings_dict.get('POOL', {}).items()}
+            pool = ConnectionPool(**options)
+            _pools[key] = (os.getpid(), pool)
+        return pool
+
+
+def close_pools(name=None):
+    """Close and forget the pools of this process, or only those of database ``name``."""
+    with _pools_lock:
+        keys = [key for key in _pools if name in (None, key[1])]
+        pools = [_pools.pop(key) for key in keys]
+    for pid, pool in pools:
+        if pid == os.getpid():
+            pool.close()
+
+
+def warm_pools():
+    """
+    Open the ``MIN_SIZE`` connections of every pooled database; return how
+    many were opened. A database that can not be reached is logged and
+    skipped, its pool opens connections on demand once it is back.
+    """
+    opened = 0
+    for alias in connections:
+        connection = connections[alias]
+        if not getattr(connection, 'pooled', False):
+            continue
+        try:
+            opened += connection.warm_pool()
+        except OperationalError as exc:
+            logger.warning('Could not warm the connection pool of database %r: %s', alias, exc)
+    return opened
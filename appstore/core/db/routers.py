@@ -0,0 +1,109 @@
+"""
+Routing of the reads to the read replicas.
+"""
+import contextvars
+import hashlib
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.timezone import now
+
+from core.cache import TieredCache
+
+
+_use_primary = contextvars.ContextVar('use_primary', default=False)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICATION', {}).get('REPLICAS', [])
+
+
+def replicas_may_lag(changed_at):
+    """
+    Tell whether the replicas may not have a change made at ``changed_at``
+    yet, i.e. whether it is less than ``STICKINESS_SECONDS`` old.
+    """
+    options = getattr(settings, 'DATABASE_REPLICATION', {})
+    if not options.get('REPLICAS'):
+        return False
+    return (now() - changed_at).total_seconds() < options.get('STICKINESS_SECONDS', 5)
+
+
+@contextmanager
+def use_primary(enabled=True):
+    """Send the reads of the block to the primary, e.g. to read back a write."""
+    token = _use_primary.set(enabled or _use_primary.get())
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send writes to the primary and reads to a random replica of
+    ``DATABASE_REPLICATION['REPLICAS']``.
+
+    Reads stay on the primary inside ``use_primary()`` and inside a
+    transaction of the primary, where they must see its uncommitted writes.
+    Replicas are copies of the primary, so migrations only run on it.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas or _use_primary.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
+
+
+class PrimaryPins:
+    """
+    Clients that wrote recently, whose reads go to the primary for
+    ``timeout`` seconds so they see their own writes despite replication lag.
+
+    Pins are kept in an in-process LRU and in the shared cache too, if there
+    is one, so a write through one worker pins the client on the others.
+    """
+
+    def __init__(self, max_entries=10000, timeout=5, shared_cache=None):
+        self.timeout = timeout
+        self.pins = TieredCache(max_entries, timeout, shared_cache, local_copies=True)
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'DATABASE_REPLICATION', {})
+        return cls(
+            max_entries=options.get('MAX_PINNED_CLIENTS', 10000),
+            timeout=options.get('STICKINESS_SECONDS', 5),
+            shared_cache=getattr(settings, 'SHARED_CACHE', None),
+        )
+
+    @staticmethod
+    def client_key(request):
+        """Return a key for the client of request, or None if it is anonymous."""
+        credentials = request.headers.get('Authorization') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if not credentials:
+            return None
+        return 'replication:pin:' + hashlib.sha256(credentials.encode()).hexdigest()
+
+    def pin(self, key):
+        self.pins.set(key, True)
+
+    def is_pinned(self, key):
+        return self.pins.get(key, False)
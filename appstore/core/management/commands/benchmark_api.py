@@ -0,0 +1,70 @@
+"""
+Django command to benchmark every API endpoint against a seeded dataset
+"""
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core import benchmarking
+
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'core' / 'benchmark_baseline.json'
+
+
+class Command(BaseCommand):
+    """
+    Seed a throw-away test database, hit every route and compare the query
+    counts, wall time and peak memory of each endpoint with a JSON baseline.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--apps', type=int, default=10000)
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--tolerance', type=float, default=benchmarking.DEFAULT_TOLERANCE,
+                            help='Allowed relative growth of time_ms and peak_kb.')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Write the measured numbers as the new baseline.')
+
+    def handle(self, *args, **options):
+        missing = benchmarking.missing_routes()
+        if missing:
+            raise CommandError(f'Routes without a benchmark: {", ".join(missing)}')
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = benchmarking.run_api_benchmark(
+                options['users'], options['apps'], options['orders'], repeat=options['repeat'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for name, measured in results['endpoints'].items():
+            self.stdout.write(
+                f"{name:45} {measured['queries']:4d} queries {measured['time_ms']:10.2f} ms "
+                f"{measured['peak_kb']:10.1f} KiB"
+            )
+
+        if options['update_baseline']:
+            benchmarking.write_baseline(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        try:
+            baseline = benchmarking.load_baseline(options['baseline'])
+        except FileNotFoundError:
+            raise CommandError(f"No baseline at {options['baseline']}, run with --update-baseline first.")
+        violations = benchmarking.check_budgets(results, baseline, options['tolerance'])
+        if violations:
+            raise CommandError('Benchmark budgets exceeded:\n' + '\n'.join(violations))
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget.'))
+        self.stdout.write(json.dumps(results['dataset']))
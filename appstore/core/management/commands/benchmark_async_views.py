@@ -0,0 +1,51 @@
+"""
+Django command to compare the code paths of the sync and async read views
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core import benchmarking
+
+
+class Command(BaseCommand):
+    """
+    Seed a throw-away test database and serve the same reads in process,
+    through Django's test clients: the sync views on ``--concurrency``
+    threads, and the async views on one event loop with as many requests in
+    flight. Every request is held by a slow client for ``--latency-ms``,
+    which ties up a thread but not the loop.
+
+    A micro-benchmark of the view code paths only: no server, socket or
+    HTTP parsing is involved, so it does not measure how a WSGI or ASGI
+    server performs. Load test a running server for that.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--apps', type=int, default=1000)
+        parser.add_argument('--orders', type=int, default=5000)
+        parser.add_argument('--requests', type=int, default=400, help='Requests per endpoint and view.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight, sync and async alike.')
+        parser.add_argument('--latency-ms', type=float, default=200.0, help='Time a client takes to read a response.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = benchmarking.run_async_view_benchmark(
+                options['users'], options['apps'], options['orders'],
+                requests=options['requests'],
+                concurrency=options['concurrency'],
+                latency=options['latency_ms'] / 1000,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for name, measured in results.items():
+            self.stdout.write(
+                f"{name:25} sync {measured['sync_rps']:8.1f} req/s   async {measured['async_rps']:8.1f} req/s   "
+                f"x{measured['speedup']:.2f}"
+            )
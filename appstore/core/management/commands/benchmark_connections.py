@@ -0,0 +1,30 @@
+"""
+Django command to measure the per-request cost of getting a database connection
+"""
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from core import benchmarking
+
+
+class Command(BaseCommand):
+    """
+    Time simulated requests running a single query with a new connection
+    per request (``CONN_MAX_AGE = 0``), a persistent connection and, on
+    PostgreSQL, a connection borrowed from the pool. The difference with the
+    fastest mode is the connection overhead every request pays.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        results = benchmarking.run_connection_benchmark(options['requests'], options['database'])
+        fastest = min(measured['mean_ms'] for measured in results.values())
+        for mode, measured in results.items():
+            self.stdout.write(
+                f"{mode:12} mean {measured['mean_ms']:8.3f} ms   median {measured['median_ms']:8.3f} ms   "
+                f"overhead {measured['mean_ms'] - fastest:+8.3f} ms"
+            )
@@ -0,0 +1,35 @@
+"""
+Django command to measure what building App instances costs
+"""
+from django.core.management.base import BaseCommand
+
+from core import benchmarking
+
+
+class Command(BaseCommand):
+    """
+    Build ``--instances`` apps from an in-memory row, as a query loading them
+    would, with each way of tracking their changes, and report the time and
+    memory they take. No database is used.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--instances', type=int, default=100000)
+        parser.add_argument('--description-size', type=int, default=2000,
+                            help='Characters of the description of every app.')
+        parser.add_argument(
+            '--mode', action='append', choices=list(benchmarking.INSTANTIATION_MODES), dest='modes',
+            help='Mode to measure, may be repeated. All of them by default.',
+        )
+
+    def handle(self, *args, **options):
+        results = benchmarking.run_instantiation_benchmark(
+            options['instances'], options['description_size'],
+            options['modes'] or tuple(benchmarking.INSTANTIATION_MODES),
+        )
+        for mode, measured in results.items():
+            self.stdout.write(
+                f"{mode:10} {measured['total_ms']:10.1f} ms   {measured['per_app_us']:7.2f} us/app   "
+                f"{measured['held_kb']:10.1f} KiB held"
+            )
@@ -0,0 +1,41 @@
+"""
+Django command to measure the login throughput of every password hasher profile
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core import benchmarking
+
+
+class Command(BaseCommand):
+    """
+    Sign up a user and log in with the token endpoint ``--logins`` times with
+    each password hasher profile, on a throw-away test database, and report
+    the logins per second one core can serve with the costs configured in
+    ``PASSWORD_HASHING``.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20)
+        parser.add_argument(
+            '--profile', action='append', choices=sorted(settings.PASSWORD_HASHER_PROFILES), dest='profiles',
+            help='Profile to measure, may be repeated. All of them by default.',
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = benchmarking.run_login_benchmark(options['logins'], options['profiles'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for profile, measured in results.items():
+            self.stdout.write(
+                f"{profile:8} signup {measured['signup_ms']:8.1f} ms   login {measured['login_ms']:8.1f} ms   "
+                f"{measured['logins_per_core']:7.1f} logins/s per core   throttled {measured['throttled_ms']:6.3f} ms"
+            )
@@ -0,0 +1,117 @@
+"""
+Django command to check that every filter of the app list can use an index
+"""
+import itertools
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.timezone import now
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.models import App
+from apps.views import AppViewSet
+
+
+def postgresql_full_scan(plan, table, filtered):
+    """Return how a PostgreSQL plan reads all of table, if it does."""
+    # Every node starts on a line of its own, followed by its conditions.
+    for node in re.split(r'\n\s*->\s*', plan):
+        if re.match(rf'\s*Seq Scan on {table}\b', node):
+            return 'SEQ SCAN'
+        if (re.match(rf'\s*Index (Only )?Scan (Backward )?using \S+ on {table}\b', node)
+                and 'Filter:' in node and 'Index Cond:' not in node):
+            return 'FULL INDEX SCAN'
+    return None
+
+
+def sqlite_full_scan(plan, table, filtered):
+    """Return how a SQLite plan reads all of table, if it does."""
+    if re.search(rf'\bSCAN {table}\b(?! USING)', plan):
+        return 'SEQ SCAN'
+    # A SCAN through an index walks all of it, filtering every row it reads.
+    if filtered and re.search(rf'\bSCAN {table} USING (COVERING )?INDEX\b', plan):
+        return 'FULL INDEX SCAN'
+    return None
+
+
+FULL_SCAN = {
+    'postgresql': postgresql_full_scan,
+    'sqlite': sqlite_full_scan,
+}
+
+
+def filter_examples():
+    """Return a representative value for every filter of the app list."""
+    stamp = now()
+    return {
+        'verification_status': App.STATUS_VERIFIED,
+        'owner': App.objects.values_list('owner_id', flat=True).first() or 1,
+        'price_min': Decimal('1.00'),
+        'price_max': Decimal('50.00'),
+        'created_after': (stamp - timedelta(days=30)).isoformat(),
+        'created_before': stamp.isoformat(),
+    }
+
+
+def iter_filter_combinations():
+    """Yield the query parameters of every filter combination and ordering."""
+    examples = filter_examples()
+    # The two bounds of a range are planned alike, so they are checked together.
+    groups = [['verification_status'], ['owner'], ['price_min', 'price_max'], ['created_after', 'created_before']]
+    orderings = [
+        prefix + field for field in AppViewSet.ordering_fields for prefix in ('-', '')
+    ]
+    for size in range(len(groups) + 1):
+        for combination in itertools.combinations(groups, size):
+            params = {name: examples[name] for group in combination for name in group}
+            for ordering in orderings:
+                yield {**params, 'ordering': ordering}
+
+
+def build_list_queryset(params):
+    """Return the first page query the app list runs for params."""
+    request = Request(APIRequestFactory().get('/', params))
+    view = AppViewSet(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+    queryset = view.filter_queryset(view.get_queryset())
+    paginator = view.paginator
+    return queryset.order_by(*paginator.get_ordering(request, queryset, view))[:paginator.page_size + 1]
+
+
+class Command(BaseCommand):
+    """
+    EXPLAIN the query of every supported filter combination of the app list
+    and report the ones that read the whole table, either by a sequential
+    scan or by an index scan that filters every entry of the index.
+
+    The table is analyzed first and planned with the settings the server
+    runs with, so run it against a database of production size.
+    """
+    help = __doc__
+
+    def handle(self, *args, **options):
+        full_scan = FULL_SCAN.get(connection.vendor)
+        if full_scan is None:
+            raise CommandError(f'Query plans of {connection.vendor} are not supported.')
+        table = re.escape(App._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(App._meta.db_table)}')
+
+        failures = []
+        for params in iter_filter_combinations():
+            plan = build_list_queryset(params).explain()
+            label = ' '.join(f'{name}={value}' for name, value in params.items())
+            problem = full_scan(plan, table, filtered=len(params) > 1)
+            if problem:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f'{problem:<15} {label}'))
+                self.stdout.write(plan)
+            else:
+                self.stdout.write(f'{"ok":<15} {label}')
+
+        if failures:
+            raise CommandError(f'{len(failures)} filter combinations read the whole table or index.')
+        self.stdout.write(self.style.SUCCESS('Every filter combination can use an index.'))
@@ -0,0 +1,43 @@
+"""
+Django command to deliver the events of the outbox to their consumers
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.outbox import OutboxWorker
+
+
+class Command(BaseCommand):
+    """
+    Deliver the pending outbox events, such as ``order.placed``, to their
+    consumers. Runs as a worker polling the database every ``--interval``
+    seconds, so no message broker is needed; ``--once`` stops as soon as no
+    event is due, e.g. to run it from cron.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--max-attempts', type=int, help='Attempts before an event is marked failed.')
+        parser.add_argument('--interval', type=float, help='Seconds to wait when no event is due.')
+        parser.add_argument('--once', action='store_true', help='Exit once no event is due.')
+
+    def handle(self, *args, **options):
+        worker = OutboxWorker.from_settings(batch_size=options['batch_size'], max_attempts=options['max_attempts'])
+        interval = options['interval']
+        if interval is None:
+            interval = getattr(settings, 'OUTBOX', {}).get('POLL_INTERVAL', 1)
+
+        try:
+            while True:
+                delivered, failed = worker.drain()
+                if delivered or failed:
+                    self.stdout.write(f'{delivered} events delivered, {failed} failed.')
+                if options['once']:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('Outbox drained.'))
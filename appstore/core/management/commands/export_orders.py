@@ -0,0 +1,45 @@
+"""
+Django command to export every order as CSV or NDJSON
+"""
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from orders.export import DEFAULT_CHUNK_SIZE, FORMATS, iter_export
+
+
+def date_argument(value):
+    date = parse_date(value)
+    if date is None:
+        raise ValueError(value)
+    return date
+
+
+class Command(BaseCommand):
+    """
+    Stream every order, joined with its app and buyer, to a file or to
+    standard output without loading the orders into memory.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write to, standard output by default.')
+        parser.add_argument('--since-id', type=int, help='Only export orders with a greater id.')
+        parser.add_argument('--from', dest='date_from', type=date_argument, help='First purchase date, YYYY-MM-DD.')
+        parser.add_argument('--to', dest='date_to', type=date_argument, help='Last purchase date, YYYY-MM-DD.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lines = iter_export(
+            options['format'],
+            chunk_size=options['chunk_size'],
+            since_id=options['since_id'],
+            date_from=options['date_from'],
+            date_to=options['date_to'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
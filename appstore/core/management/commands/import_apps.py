@@ -0,0 +1,88 @@
+"""
+Django command to import apps in bulk from a CSV or NDJSON file
+"""
+import csv
+import itertools
+import json
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.importer import READERS, AppImporter
+
+
+class Command(BaseCommand):
+    """
+    Import the apps of a partner from a CSV or NDJSON file with ``title``,
+    ``description`` and ``price`` columns.
+
+    The file is streamed and imported in batches. Rows that fail validation
+    are written to the ``--errors`` report (standard error by default) and
+    the others are imported. With ``--checkpoint`` the number of the last row
+    of every committed batch is saved, and a rerun resumes after it.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--owner', required=True, help='Email of the user owning the imported apps.')
+        parser.add_argument('--format', choices=sorted(READERS), help='Guessed from the file extension by default.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--errors', help='CSV file the rejected rows are appended to.')
+        parser.add_argument('--checkpoint', help='File tracking the progress, to resume an interrupted import.')
+
+    def handle(self, *args, **options):
+        try:
+            owner = get_user_model().objects.get(email=options['owner'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with the email {options['owner']}.")
+
+        file_format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError('Cannot guess the format of the file, pass --format.')
+
+        checkpoint = options['checkpoint']
+        resume_after = self.read_checkpoint(checkpoint)
+        if resume_after:
+            self.stdout.write(f'Resuming after row {resume_after}.')
+
+        importer = AppImporter(owner, batch_size=options['batch_size'])
+        imported = rejected = 0
+        with open(options['path'], newline='') as file:
+            records = itertools.dropwhile(lambda item: item[0] <= resume_after, READERS[file_format](file))
+            for batch in importer.batches(records):
+                count, errors = importer.import_batch(batch)
+                imported += count
+                rejected += len(errors)
+                self.report(options['errors'], errors)
+                if checkpoint:
+                    self.write_checkpoint(checkpoint, batch[-1][0])
+                self.stdout.write(f'Imported up to row {batch[-1][0]}.')
+
+        self.stdout.write(self.style.SUCCESS(f'{imported} apps imported, {rejected} rows rejected.'))
+
+    def read_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as checkpoint:
+            return json.load(checkpoint)['row']
+
+    def write_checkpoint(self, path, row):
+        # Replace the file atomically, an interrupted write must not lose the progress.
+        with open(f'{path}.tmp', 'w') as checkpoint:
+            json.dump({'row': row}, checkpoint)
+        os.replace(f'{path}.tmp', path)
+
+    def report(self, path, errors):
+        """Append the ``(row number, errors)`` of the rejected rows to the report."""
+        if not path:
+            for number, row_errors in errors:
+                self.stderr.write(f'Row {number}: {json.dumps(row_errors)}')
+            return
+        new = not os.path.exists(path)
+        with open(path, 'a', newline='') as report:
+            writer = csv.writer(report)
+            if new:
+                writer.writerow(['row', 'errors'])
+            writer.writerows((number, json.dumps(row_errors)) for number, row_errors in errors)
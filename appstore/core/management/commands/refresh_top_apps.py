@@ -0,0 +1,40 @@
+"""
+Django command to rebuild the best-selling apps ranking
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.models import App, TopApp
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the ranking served by GET /api/app/apps/top/. Runs once, e.g.
+    from cron every few minutes, or with ``--interval`` as a worker that
+    rebuilds it every that many seconds.
+    """
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=50, help='Number of apps to rank.')
+        parser.add_argument('--recount', action='store_true',
+                            help='Recompute the purchase counters from the orders table first.')
+        parser.add_argument('--interval', type=float, help='Seconds between two rebuilds, run once without.')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                self.refresh(options)
+                if options['interval'] is None:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def refresh(self, options):
+        if options['recount']:
+            count = App.objects.recount_purchases()
+            self.stdout.write(f'Recounted the purchases of {count} apps.')
+        size = TopApp.objects.refresh(size=options['size'])
+        self.stdout.write(self.style.SUCCESS(f'Ranked {size} apps.'))
@@ -0,0 +1,133 @@
+"""
+Middleware for the appstore project.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core.db.routers import PrimaryPins, get_replicas, use_primary
+from core.profiling import RequestProfile, activate, get_current_profile
+
+
+logger = logging.getLogger('appstore.profiling')
+
+
+class RequestProfilingMiddleware:
+    """
+    Measure view, serializer, render and database time of every request.
+
+    The numbers are sent back in a ``Server-Timing`` header and logged as
+    one JSON line on the ``appstore.profiling`` logger. Requests slower than
+    ``SLOW_REQUEST_MS`` are logged with their full query list, for a
+    ``SLOW_SAMPLE_RATE`` fraction of them. Disabled unless
+    ``REQUEST_PROFILING['ENABLED']`` is set, in which case Django drops the
+    middleware at startup and it costs nothing.
+    """
+
+    def __init__(self, get_response):
+        options = getattr(settings, 'REQUEST_PROFILING', {})
+        if not options.get('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_request_ms = options.get('SLOW_REQUEST_MS', 500)
+        self.slow_sample_rate = options.get('SLOW_SAMPLE_RATE', 1.0)
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        with activate(profile), ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile.record_query))
+            response = self.get_response(request)
+            profile.finished = time.perf_counter()
+
+        timings = profile.timings()
+        duplicates = profile.duplicate_queries
+        duplicated = sum(duplicates.values()) - len(duplicates)
+        entries = [f'{name};dur={duration}' for name, duration in timings.items() if name != 'db']
+        entries.append(f'db;dur={timings["db"]};desc="{len(profile.queries)} queries, {duplicated} duplicated"')
+        response['Server-Timing'] = ', '.join(entries)
+
+        self.log(request, response, profile, timings, duplicates, duplicated)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        get_current_profile().view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called right after the view returns and before the response renders.
+        get_current_profile().view_finished = time.perf_counter()
+        return response
+
+    def log(self, request, response, profile, timings, duplicates, duplicated):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'timings_ms': timings,
+            'queries': len(profile.queries),
+            'duplicate_queries': duplicated,
+        }
+        if duplicates:
+            sql, count = max(duplicates.items(), key=lambda item: item[1])
+            record['most_duplicated'] = {'sql': sql, 'count': count}
+        logger.info(json.dumps(record))
+
+        if timings['total'] >= self.slow_request_ms and random.random() < self.slow_sample_rate:
+            record['query_list'] = [
+                {'sql': sql, 'ms': round(duration * 1000, 3)} for sql, duration in profile.queries
+            ]
+            logger.warning(json.dumps(record))
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Keep the reads of a client on the primary database for
+    ``DATABASE_REPLICATION['STICKINESS_SECONDS']`` after it wrote, so that
+    e.g. a new order shows up in its order list even if the replicas lag.
+
+    Requests with an unsafe method read from the primary as well. Clients
+    are told apart by their ``Authorization`` header or session cookie.
+    Dropped at startup when no replica is configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pins = PrimaryPins.from_settings()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = self.pins.client_key(request)
+        with use_primary(self.reads_from_primary(request, key)):
+            response = self.get_response(request)
+        self.record_write(request, response, key)
+        return response
+
+    async def __acall__(self, request):
+        key = self.pins.client_key(request)
+        with use_primary(self.reads_from_primary(request, key)):
+            response = await self.get_response(request)
+        self.record_write(request, response, key)
+        return response
+
+    def reads_from_primary(self, request, key):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return True
+        return key is not None and self.pins.is_pinned(key)
+
+    def record_write(self, request, response, key):
+        if key is not None and request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            self.pins.pin(key)
@@ -0,0 +1,55 @@
+"""
+Reusable mixins for the API views.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Add ETag/Last-Modified validators to the ``list`` and ``retrieve`` actions.
+
+    Views implement ``get_list_validators`` and ``get_detail_validators``,
+    returning a ``(fingerprint, last_modified)`` pair computed from a cheap
+    query (an aggregate for lists, a single column for details) or ``None``
+    when no validators can be given. A request whose ``If-None-Match`` or
+    ``If-Modified-Since`` still matches is answered with a 304 before any
+    row is fetched or serialized.
+    """
+
+    def get_list_validators(self):
+        return None
+
+    def get_detail_validators(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(self.get_list_validators(), super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(self.get_detail_validators(), super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, validators, view, request, *args, **kwargs):
+        if validators is None:
+            return view(request, *args, **kwargs)
+
+        fingerprint, last_modified = validators
+        # Query parameters (cursor, sparse fields...) change the representation.
+        fingerprint = f'{request.get_full_path()}|{fingerprint}'
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = view(request, *args, **kwargs)
+        if response.status_code not in (200, 304):
+            return response
+
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        # Clients must revalidate instead of guessing a freshness lifetime.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils.timezone import now
+
+
+class OutboxEvent(models.Model):
+    """
+    Event written in the transaction of the change it describes and handed to
+    its consumers afterwards by the ``drain_outbox`` worker (see core/outbox.py).
+    """
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Not handed out before, pushed back after every failed attempt.
+    available_at = models.DateTimeField(default=now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Set once the attempts are exhausted; the event is then left for inspection.
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker only ever scans the pending events, oldest first.
+            models.Index(
+                fields=['available_at', 'id'],
+                name='outbox_pending_idx',
+                condition=models.Q(failed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.topic} #{self.pk}'
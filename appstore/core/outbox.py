@@ -0,0 +1,126 @@
+"""
+Transactional outbox: events written with the change that caused them and
+handed to their consumers by a worker, outside of the request.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils.timezone import now
+
+from core.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Topic -> functions called with the payload of each of its events.
+consumers = defaultdict(list)
+
+
+def consumer(topic):
+    """
+    Register the decorated function as a consumer of topic.
+
+    Events are delivered at least once: a consumer that fails has the event
+    retried with every consumer of the topic, so consumers must be idempotent.
+    """
+    def register(func):
+        consumers[topic].append(func)
+        return func
+    return register
+
+
+def publish(topic, payload, using=None):
+    """Add an event to the outbox, in the current transaction of using."""
+    return OutboxEvent.objects.using(using or router.db_for_write(OutboxEvent)).create(topic=topic, payload=payload)
+
+
+def publish_many(topic, payloads, using=None):
+    """Add one event per payload with a single INSERT."""
+    return OutboxEvent.objects.using(using or router.db_for_write(OutboxEvent)).bulk_create(
+        OutboxEvent(topic=topic, payload=payload) for payload in payloads
+    )
+
+
+class OutboxWorker:
+    """
+    Deliver the pending events of the outbox, ``batch_size`` at a time.
+
+    A batch is locked with ``SELECT ... FOR UPDATE SKIP LOCKED`` on
+    PostgreSQL, so several workers can drain the outbox side by side. Every
+    event is delivered in its own savepoint: delivered events are deleted,
+    and a failure pushes the event back by ``backoff`` seconds, doubled at
+    every attempt up to ``max_backoff``, until ``max_attempts`` is reached
+    and the event is marked failed.
+    """
+
+    def __init__(self, batch_size=100, max_attempts=10, backoff=5, max_backoff=3600, using=None):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.using = using or router.db_for_write(OutboxEvent)
+
+    @classmethod
+    def from_settings(cls, **overrides):
+        options = getattr(settings, 'OUTBOX', {})
+        kwargs = {
+            'batch_size': options.get('BATCH_SIZE', 100),
+            'max_attempts': options.get('MAX_ATTEMPTS', 10),
+            'backoff': options.get('BACKOFF_SECONDS', 5),
+            'max_backoff': options.get('MAX_BACKOFF_SECONDS', 3600),
+        }
+        kwargs.update((name, value) for name, value in overrides.items() if value is not None)
+        return cls(**kwargs)
+
+    def retry_delay(self, attempts):
+        return timedelta(seconds=min(self.backoff * 2 ** (attempts - 1), self.max_backoff))
+
+    def pending(self):
+        queryset = OutboxEvent.objects.using(self.using).filter(
+            failed_at__isnull=True, available_at__lte=now(),
+        ).order_by('available_at', 'id')
+        if connections[self.using].features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        return queryset[:self.batch_size]
+
+    def drain_batch(self):
+        """Deliver one batch and return the ``(delivered, failed)`` counts."""
+        delivered = failed = 0
+        with transaction.atomic(using=self.using):
+            events = list(self.pending())
+            done = []
+            for event in events:
+                try:
+                    with transaction.atomic(using=self.using):
+                        for func in consumers.get(event.topic, ()):
+                            func(event.payload)
+                except Exception as exc:
+                    logger.warning('Delivering %s failed', event, exc_info=True)
+                    self.fail(event, exc)
+                    failed += 1
+                else:
+                    done.append(event.pk)
+            OutboxEvent.objects.using(self.using).filter(pk__in=done).delete()
+            delivered = len(done)
+        return delivered, failed
+
+    def fail(self, event, exc):
+        event.attempts += 1
+        event.last_error = f'{type(exc).__name__}: {exc}'
+        if event.attempts >= self.max_attempts:
+            event.failed_at = now()
+        else:
+            event.available_at = now() + self.retry_delay(event.attempts)
+        event.save(using=self.using, update_fields=['attempts', 'last_error', 'available_at', 'failed_at'])
+
+    def drain(self):
+        """Deliver batches until no event is due; return the ``(delivered, failed)`` totals."""
+        delivered = failed = 0
+        while True:
+            batch_delivered, batch_failed = self.drain_batch()
+            delivered += batch_delivered
+            failed += batch_failed
+            if batch_delivered + batch_failed < self.batch_size:
+                return delivered, failed
@@ -0,0 +1,96 @@
+"""
+Per-request SQL and timing instrumentation.
+"""
+import contextvars
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+_current_profile = contextvars.ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Timings and SQL statements collected while serving one request."""
+    __slots__ = ('started', 'view_started', 'view_finished', 'finished', 'sections', 'queries', '_depth')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_finished = None
+        self.finished = None
+        self.sections = {}
+        self.queries = []
+        self._depth = Counter()
+
+    def record_query(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook timing every statement."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    @property
+    def db_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    @property
+    def duplicate_queries(self):
+        """Return ``{sql: count}`` for statements that ran more than once."""
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count > 1}
+
+    def timings(self):
+        """Return the measured durations in milliseconds."""
+        timings = {'total': self.finished - self.started}
+        if self.view_started is not None:
+            timings['view'] = (self.view_finished or self.finished) - self.view_started
+        if self.view_finished is not None:
+            timings['render'] = self.finished - self.view_finished
+        timings.update(self.sections)
+        timings['db'] = self.db_time
+        return {name: round(duration * 1000, 3) for name, duration in timings.items()}
+
+
+def get_current_profile():
+    return _current_profile.get()
+
+
+@contextmanager
+def activate(profile):
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+@contextmanager
+def profile_section(name):
+    """
+    Add the time spent in the block to the ``name`` section of the current
+    profile. Nested blocks of the same section are only counted once, and
+    without an active profile the block runs untouched.
+    """
+    profile = _current_profile.get()
+    if profile is None or profile._depth[name]:
+        yield
+        return
+    profile._depth[name] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile._depth[name] -= 1
+        profile.sections[name] = profile.sections.get(name, 0) + time.perf_counter() - start
+
+
+class ProfiledSerializerMixin:
+    """Report time spent in ``to_representation`` as the serializer section."""
+
+    def to_representation(self, instance):
+        if _current_profile.get() is None:
+            return super().to_representation(instance)
+        with profile_section('serializer'):
+            return super().to_representation(instance)
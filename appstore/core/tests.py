@@ -1,13 +1,37 @@
 """
 Test custom Django management commands.
 """
-from unittest.mock import patch
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import Mock, patch
 
+from asgiref.sync import async_to_sync
 from psycopg2 import OperationalError as Psycopg2OpError
 
-from django.core.management import call_command
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from apps.models import App
+from core import benchmarking
+from core.cache import TieredCache
+from core.db.pool import ConnectionPool, PoolTimeout, close_pools, get_pool, warm_pools
+from core.db.routers import PrimaryReplicaRouter, replicas_may_lag, use_primary
+from core.middleware import ReplicaStickinessMiddleware
+from core.models import OutboxEvent
+from core.outbox import OutboxWorker, consumers, publish
+from core.profiling import RequestProfile, activate, profile_section
+from core.management.commands.benchmark_api import DEFAULT_BASELINE
+from core.management.commands.check_app_filters import postgresql_full_scan, sqlite_full_scan
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -32,3 +56,546 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class CheckAppFiltersTests(TestCase):
+    """Test the query plan check of the app list filters."""
+
+    def test_every_filter_combination_is_checked(self):
+        """Test every filter combination and ordering is explained."""
+        user = get_user_model().objects.create_user(email='user@example.com', password='testpass123')
+        App.objects.create(title='App', description='Description', price=1, owner=user)
+        out = StringIO()
+        plan = (
+            'SEARCH apps_app USING INDEX app_created_at_id_idx (created_at>?)'
+            if connection.vendor == 'sqlite' else
+            'Index Scan using app_created_at_id_idx on apps_app\n  Index Cond: (created_at > now())'
+        )
+
+        with patch('django.db.models.query.QuerySet.explain', return_value=plan) as explain:
+            call_command('check_app_filters', stdout=out)
+
+        self.assertEqual(explain.call_count, 64)
+        self.assertEqual(out.getvalue().count('ordering='), 64)
+        self.assertNotIn('SCAN', out.getvalue().replace(plan, ''))
+
+    def test_sequential_scans_are_reported(self):
+        """Test the command fails when a plan scans the whole table."""
+        out = StringIO()
+        plan = 'SCAN apps_app' if connection.vendor == 'sqlite' else 'Seq Scan on apps_app'
+
+        with patch('django.db.models.query.QuerySet.explain', return_value=plan):
+            with self.assertRaisesMessage(CommandError, '64 filter combinations'):
+                call_command('check_app_filters', stdout=out)
+
+        self.assertIn('SEQ SCAN', out.getvalue())
+
+    def test_postgresql_filtered_index_scans_are_full_scans(self):
+        """Test a PostgreSQL index scan that only filters its entries counts as a full scan."""
+        plan = (
+            'Limit  (cost=0.29..0.71 rows=21 width=1)\n'
+            '  ->  Index Scan using app_price_id_idx on apps_app  (cost=0.29..8.31 rows=1 width=1)\n'
+            "        Filter: ((verification_status)::text = 'verified'::text)"
+        )
+        bounded = plan.replace('Filter:', 'Index Cond: (price >= 1.00)\n        Filter:')
+
+        self.assertEqual(postgresql_full_scan(plan, 'apps_app', filtered=True), 'FULL INDEX SCAN')
+        self.assertIsNone(postgresql_full_scan(bounded, 'apps_app', filtered=True))
+        self.assertEqual(postgresql_full_scan('Seq Scan on apps_app', 'apps_app', filtered=False), 'SEQ SCAN')
+
+    def test_sqlite_filtered_index_scans_are_full_scans(self):
+        """Test a SQLite scan through an index counts as a full scan of a filtered list."""
+        plan = 'SCAN apps_app USING INDEX app_price_id_idx'
+        bounded = 'SEARCH apps_app USING INDEX app_price_id_idx (price>?)'
+
+        self.assertEqual(sqlite_full_scan(plan, 'apps_app', filtered=True), 'FULL INDEX SCAN')
+        self.assertIsNone(sqlite_full_scan(plan, 'apps_app', filtered=False))
+        self.assertIsNone(sqlite_full_scan(bounded, 'apps_app', filtered=True))
+
+
+class ApiBenchmarkTests(TransactionTestCase):
+    """Test the API benchmark suite against the committed baseline."""
+
+    def test_every_route_is_benchmarked(self):
+        """Test a new route can not be added without a benchmark."""
+        self.assertEqual(benchmarking.missing_routes(), [])
+
+    def test_endpoints_within_query_budget(self):
+        """Test no endpoint runs more queries than the baseline allows."""
+        results = benchmarking.run_api_benchmark(users=3, apps=6, orders=6, repeat=1)
+
+        violations = benchmarking.check_budgets(results, benchmarking.load_baseline(DEFAULT_BASELINE))
+
+        self.assertEqual(violations, [])
+
+    def test_async_view_benchmark(self):
+        """Test the sync and async read views are compared."""
+        results = benchmarking.run_async_view_benchmark(
+            users=2, apps=3, orders=2, requests=4, concurrency=4, latency=0,
+        )
+
+        self.assertEqual(set(results), {'app:app-list', 'app:app-detail', 'order:order-list'})
+        for measured in results.values():
+            self.assertGreater(measured['sync_rps'], 0)
+            self.assertGreater(measured['async_rps'], 0)
+
+    @override_settings(PASSWORD_HASHING={'ARGON2_TIME_COST': 1, 'ARGON2_MEMORY_COST': 1024, 'PBKDF2_ITERATIONS': 1000})
+    def test_login_benchmark(self):
+        """Test logins are measured per hasher profile and failures are throttled."""
+        results = benchmarking.run_login_benchmark(logins=2, profiles=('argon2', 'pbkdf2'))
+
+        self.assertEqual(set(results), {'argon2', 'pbkdf2'})
+        for measured in results.values():
+            self.assertGreater(measured['login_ms'], 0)
+
+    def test_check_budgets_reports_regressions(self):
+        """Test query growth, slowdowns and unbudgeted endpoints are reported."""
+        dataset = {'users': 1, 'apps': 1, 'orders': 1}
+        baseline = {'dataset': dataset, 'endpoints': {
+            'get a': {'queries': 2, 'time_ms': 10.0, 'peak_kb': 100.0},
+            'get b': {'queries': 2},
+        }}
+        results = {'dataset': dataset, 'endpoints': {
+            'get a': {'queries': 2, 'time_ms': 20.0, 'peak_kb': 100.0},
+            'get b': {'queries': 3, 'time_ms': 1.0, 'peak_kb': 1.0},
+            'get c': {'queries': 1, 'time_ms': 1.0, 'peak_kb': 1.0},
+        }}
+
+        violations = benchmarking.check_budgets(results, baseline, tolerance=0.5)
+
+        self.assertEqual(violations, [
+            'get a: time_ms 20.0, budget is 10.0',
+            'get b: 3 queries, budget is 2',
+            'get c: no budget in the baseline',
+        ])
+
+
+PROFILING_ON = {'ENABLED': True, 'SLOW_REQUEST_MS': 0, 'SLOW_SAMPLE_RATE': 1.0}
+
+
+class RequestProfilingTests(TestCase):
+    """Test the opt-in request profiling middleware."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='user@example.com', password='testpass123')
+        App.objects.create(title='Profiled app', description='', price=1, owner=self.user)
+
+    def get_apps(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client.get(reverse('app:app-list'))
+
+    def test_disabled_by_default(self):
+        """Test no Server-Timing header is sent unless profiling is enabled."""
+        res = self.get_apps()
+
+        self.assertNotIn('Server-Timing', res)
+
+    @override_settings(REQUEST_PROFILING=PROFILING_ON)
+    def test_server_timing_header(self):
+        """Test view, serializer, render and db timings are reported."""
+        with self.assertLogs('appstore.profiling', level='INFO'):
+            res = self.get_apps()
+
+        timing = res['Server-Timing']
+        for name in ('total', 'view', 'serializer', 'render', 'db'):
+            self.assertIn(f'{name};dur=', timing)
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries, 0 duplicated"')
+
+    @override_settings(REQUEST_PROFILING=PROFILING_ON)
+    def test_slow_requests_log_query_list(self):
+        """Test slow requests are logged as structured lines with their queries."""
+        with self.assertLogs('appstore.profiling', level='INFO') as logs:
+            self.get_apps()
+
+        summary, slow = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertEqual(summary['path'], reverse('app:app-list'))
+        self.assertEqual(summary['status'], 200)
+        self.assertNotIn('query_list', summary)
+        self.assertEqual(len(slow['query_list']), slow['queries'])
+        self.assertTrue(any('apps_app' in query['sql'] for query in slow['query_list']))
+
+    def test_duplicate_queries_are_detected(self):
+        """Test repeated statements are reported as N+1 candidates."""
+        for i in range(2):
+            App.objects.create(title=f'Extra app {i}', description='', price=1, owner=self.user)
+        profile = RequestProfile()
+        with connection.execute_wrapper(profile.record_query):
+            for app in App.objects.all():
+                app.owner.email
+
+        duplicates = profile.duplicate_queries
+        self.assertEqual(len(profile.queries), 4)
+        self.assertEqual(list(duplicates.values()), [3])
+
+    def test_nested_sections_are_counted_once(self):
+        """Test re-entering a section does not double count it."""
+        profile = RequestProfile()
+        with activate(profile):
+            with profile_section('serializer'):
+                with profile_section('serializer'):
+                    pass
+        self.assertEqual(list(profile.sections), ['serializer'])
+
+
+class FakeConnection:
+    """Stand-in for a DB-API connection, counting the statements it runs."""
+
+    def __init__(self):
+        self.closed = 0
+        self.statements = []
+        self.rollbacks = 0
+        self.broken = False
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                pass
+
+            def execute(self, sql):
+                if connection.broken:
+                    raise OperationalError('server closed the connection unexpectedly')
+                connection.statements.append(sql)
+
+        return Cursor()
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the database connection pool."""
+
+    def test_connections_are_reused(self):
+        """Test a returned connection is handed out again instead of a new one."""
+        pool = ConnectionPool(max_size=2)
+        first = pool.getconn(FakeConnection)
+        pool.putconn(first)
+
+        self.assertIs(pool.getconn(FakeConnection), first)
+        self.assertEqual(first.rollbacks, 1)
+        self.assertEqual(pool.stats, {'size': 1, 'idle': 0, 'in_use': 1, 'opened': 1, 'reused': 1, 'discarded': 0})
+
+    def test_full_pool_times_out(self):
+        """Test a checkout fails when every connection stays in use."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.getconn(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(FakeConnection)
+
+    def test_unhealthy_connections_are_replaced(self):
+        """Test closed and broken connections are discarded at checkout."""
+        pool = ConnectionPool(max_size=2, check_interval=0)
+        closed, broken = pool.getconn(FakeConnection), pool.getconn(FakeConnection)
+        pool.putconn(closed)
+        pool.putconn(broken)
+        closed.closed = 1
+        broken.broken = True
+
+        conn = pool.getconn(FakeConnection)
+
+        self.assertNotIn(conn, (closed, broken))
+        self.assertEqual(pool.stats['discarded'], 2)
+        self.assertEqual(pool.stats['size'], 1)
+
+    def test_idle_connections_are_checked(self):
+        """Test a connection idle longer than the check interval is pinged first."""
+        pool = ConnectionPool(check_interval=0)
+        conn = pool.getconn(FakeConnection)
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(FakeConnection), conn)
+        self.assertEqual(conn.statements, ['SELECT 1'])
+
+    def test_warm_opens_min_size(self):
+        """Test warming opens connections up to the minimum size only once."""
+        pool = ConnectionPool(min_size=3, max_size=5)
+
+        self.assertEqual(pool.warm(FakeConnection), 3)
+        self.assertEqual(pool.warm(FakeConnection), 0)
+        self.assertEqual(pool.stats['idle'], 3)
+
+    def test_failed_warm_keeps_opened_connections(self):
+        """Test the connections opened before a failure are kept in the pool."""
+        pool = ConnectionPool(min_size=3, max_size=5)
+        connect = Mock(side_effect=[FakeConnection(), OperationalError('down')])
+
+        with self.assertRaises(OperationalError):
+            pool.warm(connect)
+
+        self.assertEqual(pool.stats['idle'], 1)
+        self.assertEqual(pool.stats['size'], 1)
+
+    def test_unreachable_database_is_logged(self):
+        """Test warming the pools at startup logs a database that is down instead of failing."""
+        with patch.object(connection, 'pooled', True, create=True), \
+                patch.object(connection, 'warm_pool', side_effect=OperationalError('down'), create=True), \
+                self.assertLogs('core.db.pool', 'WARNING') as logs:
+            self.assertEqual(warm_pools(), 0)
+
+        self.assertIn("'default': down", logs.output[0])
+
+    def test_closed_pool_discards_returned_connections(self):
+        """Test connections returned after the pool is closed are closed."""
+        pool = ConnectionPool()
+        conn = pool.getconn(FakeConnection)
+        pool.close()
+
+        pool.putconn(conn)
+
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats['size'], 0)
+
+    def test_pools_are_per_database(self):
+        """Test each database name gets its own pool, until it is closed."""
+        settings_dict = {'NAME': 'appstore', 'POOL': {'MAX_SIZE': 3}}
+        pool = get_pool('default', settings_dict)
+        self.addCleanup(close_pools)
+
+        self.assertIs(get_pool('default', settings_dict), pool)
+        self.assertIsNot(get_pool('default', {'NAME': 'test_appstore'}), pool)
+        self.assertEqual(pool.max_size, 3)
+        close_pools('appstore')
+        self.assertIsNot(get_pool('default', settings_dict), pool)
+
+
+class ConnectionBenchmarkTests(TestCase):
+    """Test the connection overhead benchmark."""
+
+    def test_benchmark_connections(self):
+        """Test every connection mode the database supports is measured."""
+        out = StringIO()
+
+        call_command('benchmark_connections', requests=5, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('per-request', output)
+        self.assertIn('persistent', output)
+        self.assertEqual('pooled' in output, connection.vendor == 'postgresql')
+
+
+class InstantiationBenchmarkTests(SimpleTestCase):
+    """Test the App instantiation benchmark."""
+
+    def test_benchmark_instantiation(self):
+        """Test every tracking mode is measured, without using the database."""
+        out = StringIO()
+
+        call_command('benchmark_instantiation', instances=100, stdout=out)
+
+        for mode in benchmarking.INSTANTIATION_MODES:
+            self.assertIn(mode, out.getvalue())
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-cache-tests'},
+})
+class TieredCacheTests(SimpleTestCase):
+    """Test the cache shared by the workers through a CACHES alias."""
+
+    def tearDown(self):
+        caches['shared'].clear()
+
+    def test_local_only(self):
+        """Test without a shared cache entries stay in the process."""
+        cache = TieredCache(max_entries=10, timeout=60)
+
+        self.assertTrue(cache.add('key', 1))
+        self.assertFalse(cache.add('key', 2))
+        self.assertEqual(cache.incr('key'), 2)
+        self.assertEqual(cache.get('key'), 2)
+        self.assertIsNone(TieredCache(max_entries=10, timeout=60).get('key'))
+
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+
+    def test_shared_only(self):
+        """Test without local copies every worker reads the shared entries."""
+        worker_a = TieredCache(timeout=60, shared_cache='shared')
+        worker_b = TieredCache(timeout=60, shared_cache='shared')
+
+        worker_a.incr('key')
+        worker_b.incr('key')
+        self.assertEqual(worker_a.get('key'), 2)
+
+        worker_b.delete('key')
+        self.assertIsNone(worker_a.get('key'))
+        self.assertEqual(len(worker_a.local), 0)
+
+    def test_local_copies(self):
+        """Test an entry read from the shared cache is copied into the local one."""
+        worker_a = TieredCache(timeout=60, shared_cache='shared', local_copies=True)
+        worker_b = TieredCache(timeout=60, shared_cache='shared', local_copies=True)
+
+        worker_a.set('key', 'value')
+        self.assertEqual(worker_b.get('key'), 'value')
+        self.assertEqual(worker_b.shared_hits, 1)
+
+        caches['shared'].delete('key')
+        self.assertEqual(worker_b.get('key'), 'value')
+        self.assertEqual(worker_b.shared_hits, 1)
+
+
+@override_settings(DATABASE_REPLICATION={'REPLICAS': ['replica1'], 'STICKINESS_SECONDS': 5})
+class ReplicaRoutingTests(SimpleTestCase):
+    """Test the routing of the reads to the replicas."""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaStickinessMiddleware(self.view)
+        self.used = []
+
+    def view(self, request):
+        self.used.append(self.router.db_for_read(App))
+        return HttpResponse(status=self.status)
+
+    def serve(self, method, status=200, **headers):
+        """Serve a request through the middleware and return the database its reads used."""
+        self.status = status
+        self.middleware(getattr(self.factory, method)('/', headers=headers))
+        return self.used[-1]
+
+    def test_reads_go_to_replicas(self):
+        """Test reads use a replica and writes the primary."""
+        self.assertEqual(self.router.db_for_read(App), 'replica1')
+        self.assertEqual(self.router.db_for_write(App), 'default')
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(App), 'default')
+
+    def test_migrations_skip_replicas(self):
+        """Test migrations only run on the primary."""
+        self.assertIs(self.router.allow_migrate('replica1', 'apps'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'apps'))
+
+    def test_client_reads_its_writes(self):
+        """Test a client reads from the primary after a successful write."""
+        self.assertEqual(self.serve('get', Authorization='Token a'), 'replica1')
+        self.assertEqual(self.serve('post', Authorization='Token a'), 'default')
+
+        self.assertEqual(self.serve('get', Authorization='Token a'), 'default')
+        self.assertEqual(self.serve('get', Authorization='Token b'), 'replica1')
+        self.assertEqual(self.serve('get'), 'replica1')
+
+    def test_failed_writes_do_not_pin(self):
+        """Test a rejected write keeps the client on the replicas."""
+        self.serve('post', status=400, Authorization='Token a')
+
+        self.assertEqual(self.serve('get', Authorization='Token a'), 'replica1')
+
+    def test_async_requests(self):
+        """Test the middleware keeps async requests on the event loop."""
+        used = []
+
+        async def view(request):
+            used.append(self.router.db_for_read(App))
+            return HttpResponse()
+
+        middleware = ReplicaStickinessMiddleware(view)
+        async_to_sync(middleware)(self.factory.post('/', headers={'Authorization': 'Token a'}))
+        async_to_sync(middleware)(self.factory.get('/', headers={'Authorization': 'Token a'}))
+
+        self.assertEqual(used, ['default', 'default'])
+
+    def test_replicas_may_lag(self):
+        """Test changes count as not replicated yet for STICKINESS_SECONDS."""
+        self.assertIs(replicas_may_lag(now() - timedelta(seconds=1)), True)
+        self.assertIs(replicas_may_lag(now() - timedelta(seconds=6)), False)
+        with override_settings(DATABASE_REPLICATION={'REPLICAS': []}):
+            self.assertIs(replicas_may_lag(now()), False)
+
+    @override_settings(DATABASE_REPLICATION={'REPLICAS': []})
+    def test_no_replicas(self):
+        """Test everything uses the primary and the middleware is dropped without replicas."""
+        self.assertEqual(self.router.db_for_read(App), 'default')
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaStickinessMiddleware(HttpResponse)
+
+
+class OutboxTests(TestCase):
+    """Test the delivery of outbox events by the worker."""
+
+    def setUp(self):
+        self.consumer = Mock()
+        patcher = patch.dict(consumers, {'test.event': [self.consumer]})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.worker = OutboxWorker(batch_size=2, max_attempts=3, backoff=10, max_backoff=15)
+
+    def test_events_are_delivered_once(self):
+        """Test due events are handed to their consumers and deleted."""
+        for index in range(3):
+            publish('test.event', {'index': index})
+        publish('unknown.event', {})
+
+        self.assertEqual(self.worker.drain(), (4, 0))
+
+        self.assertEqual([call.args[0] for call in self.consumer.call_args_list], [{'index': i} for i in range(3)])
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_failed_event_is_retried_with_backoff(self):
+        """Test a failing event is pushed back and delivered once due again."""
+        self.consumer.side_effect = [ValueError('boom'), ValueError('boom'), None]
+        event = publish('test.event', {})
+
+        self.assertEqual(self.worker.drain(), (0, 1))
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.last_error, 'ValueError: boom')
+        self.assertAlmostEqual((event.available_at - now()).total_seconds(), 10, delta=5)
+        self.assertEqual(self.worker.drain(), (0, 0))
+
+        with patch('core.outbox.now', return_value=now() + timedelta(seconds=11)):
+            self.worker.drain()
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 2)
+        self.assertEqual(self.worker.retry_delay(2), timedelta(seconds=15))
+
+        with patch('core.outbox.now', return_value=now() + timedelta(seconds=30)):
+            self.assertEqual(self.worker.drain(), (1, 0))
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_event_fails_after_max_attempts(self):
+        """Test an event is set aside once its attempts are exhausted."""
+        self.consumer.side_effect = ValueError('boom')
+        event = publish('test.event', {})
+
+        for attempt in range(self.worker.max_attempts):
+            with patch('core.outbox.now', return_value=now() + timedelta(hours=attempt)):
+                self.worker.drain()
+
+        event.refresh_from_db()
+        self.assertIsNotNone(event.failed_at)
+        self.assertEqual(self.consumer.call_count, 3)
+        with patch('core.outbox.now', return_value=now() + timedelta(days=1)):
+            self.assertEqual(self.worker.drain(), (0, 0))
+
+    def test_failure_keeps_the_other_events(self):
+        """Test a failing consumer does not undo the events delivered with it."""
+        self.consumer.side_effect = [None, ValueError('boom')]
+        publish('test.event', {'index': 0})
+        publish('test.event', {'index': 1})
+
+        self.assertEqual(self.worker.drain_batch(), (1, 1))
+
+        self.assertEqual(list(OutboxEvent.objects.values_list('payload', flat=True)), [{'index': 1}])
+
+    def test_drain_outbox_command(self):
+        """Test the worker command delivers the due events and exits with --once."""
+        publish('test.event', {})
+        out = StringIO()
+
+        call_command('drain_outbox', '--once', stdout=out)
+
+        self.consumer.assert_called_once_with({})
+        self.assertIn('1 events delivered, 0 failed.', out.getvalue())
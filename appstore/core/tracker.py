@@ -0,0 +1,117 @@
+"""
+Lightweight tracking of changes to a few model fields.
+"""
+from contextvars import ContextVar
+
+from django.core.exceptions import FieldError
+from django.db.models.query import ModelIterable
+
+_tracking = ContextVar('tracking', default=True)
+
+
+class Deferred:
+    """Original of a field that was deferred when the instance was loaded."""
+
+
+def call_untracked(func, *args):
+    """Return ``func(*args)``; the instances it loads do not remember the originals of their tracked fields."""
+    token = _tracking.set(False)
+    try:
+        return func(*args)
+    finally:
+        _tracking.reset(token)
+
+
+class UntrackedModelIterable(ModelIterable):
+    """``ModelIterable`` of read-only querysets, whose instances are not tracked."""
+
+    def __iter__(self):
+        rows = super().__iter__()
+        while True:
+            # Only while the next instance is built, the caller's code between
+            # two rows still loads tracked instances.
+            instance = call_untracked(next, rows, None)
+            if instance is None:
+                return
+            yield instance
+
+
+class FieldTracker:
+    """
+    Remember the values ``fields`` had when an instance was loaded, to tell
+    whether they changed before it is saved.
+
+    Unlike ``model_utils.FieldTracker`` nothing is copied when an instance is
+    created: the model stores the originals from ``from_db()`` (see
+    ``store()``), by reference, in a tuple holding just the tracked fields,
+    which must therefore have immutable values. Instances built by the
+    model's constructor, or loaded by ``call_untracked()``, have no originals
+    and every tracked field counts as changed, as for a new instance.
+    """
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.positions = {field: position for position, field in enumerate(self.fields)}
+
+    def contribute_to_class(self, cls, name):
+        self.attname = f'_{name}_originals'
+        setattr(cls, name, self)
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return BoundFieldTracker(self, instance)
+
+    def store(self, instance, fields=None):
+        """
+        Remember the current values of the tracked fields of instance, only
+        of the tracked ones among fields when given, e.g. after a save with
+        ``update_fields``.
+        """
+        if not _tracking.get():
+            return
+        loaded = instance.__dict__
+        originals = loaded.get(self.attname)
+        if originals is None or fields is None:
+            loaded[self.attname] = tuple(loaded.get(field, Deferred) for field in self.fields)
+            return
+        loaded[self.attname] = tuple(
+            loaded.get(field, Deferred) if field in fields else original
+            for field, original in zip(self.fields, originals)
+        )
+
+    def original(self, instance, field):
+        """Return the original of field, None for an instance without originals."""
+        position = self.positions.get(field)
+        if position is None:
+            raise FieldError(f'Field "{field}" is not tracked.')
+        originals = instance.__dict__.get(self.attname)
+        return None if originals is None else originals[position]
+
+
+class BoundFieldTracker:
+    """The ``FieldTracker`` of one instance, ``instance.tracker``."""
+    __slots__ = ('tracker', 'instance')
+
+    def __init__(self, tracker, instance):
+        self.tracker = tracker
+        self.instance = instance
+
+    def previous(self, field):
+        """Return the value field was loaded with, None for a new instance."""
+        value = self.tracker.original(self.instance, field)
+        return None if value is Deferred else value
+
+    def has_changed(self, field):
+        value = self.tracker.original(self.instance, field)
+        loaded = self.instance.__dict__
+        if self.tracker.attname not in loaded:
+            return True
+        if value is Deferred:
+            # A deferred field that was not set since has not changed.
+            return field in loaded
+        return value != loaded.get(field)
+
+    def changed(self):
+        """Return the ``{field: previous value}`` of the changed fields."""
+        return {field: self.previous(field) for field in self.tracker.fields if self.has_changed(field)}
@@ -4,6 +4,8 @@ from .models import Order
 
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('owner', 'app', 'purchase_date')
+    # Both columns render through __str__ of the related rows.
+    list_select_related = ('owner', 'app')
     search_fields = ('owner__email', 'app__title')
     list_filter = ('purchase_date',)
 
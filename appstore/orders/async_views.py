@@ -0,0 +1,15 @@
+"""
+Async views for the orders
+"""
+from django.http import JsonResponse
+
+from core.async_views import async_api_view
+from .models import Order
+from .serializers import OrderSerializer
+
+
+@async_api_view
+async def order_list(request):
+    """The orders of the user, like the sync list, read in chunks with ``aiterator``."""
+    orders = [order async for order in Order.objects.filter(owner=request.user).aiterator(chunk_size=500)]
+    return JsonResponse(OrderSerializer(orders, many=True).data, safe=False)
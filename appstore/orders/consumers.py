@@ -0,0 +1,17 @@
+"""
+Outbox consumers of the order events, run by the ``drain_outbox`` worker.
+"""
+import logging
+
+from core.outbox import consumer
+from orders.models import Order
+
+logger = logging.getLogger('orders.receipts')
+
+
+@consumer(Order.TOPIC_PLACED)
+def log_receipt(payload):
+    logger.info(
+        'Receipt for order %(order)s: user %(owner)s bought app %(app)s for %(price)s on %(purchase_date)s',
+        payload,
+    )
@@ -0,0 +1,94 @@
+"""
+Streaming export of the orders, joined with their app and buyer.
+"""
+import csv
+import itertools
+import json
+
+from asgiref.sync import sync_to_async
+
+from .models import Order
+
+
+# Column name and the ``values_list`` lookup it is read from.
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('purchase_date', 'purchase_date'),
+    ('price', 'price'),
+    ('app_id', 'app_id'),
+    ('app_title', 'app__title'),
+    ('owner_id', 'owner_id'),
+    ('owner_email', 'owner__email'),
+]
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def export_queryset(since_id=None, date_from=None, date_to=None):
+    """
+    Return the rows to export as tuples, in id order so that the last id of
+    an export can be passed as ``since_id`` to fetch only newer orders.
+    """
+    queryset = Order.objects.order_by('id')
+    if since_id is not None:
+        queryset = queryset.filter(id__gt=since_id)
+    if date_from is not None:
+        queryset = queryset.filter(purchase_date__gte=date_from)
+    if date_to is not None:
+        queryset = queryset.filter(purchase_date__lte=date_to)
+    return queryset.values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+
+
+class _Echo:
+    """File-like object handing back what the csv writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_ndjson(rows):
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), default=str) + '\n'
+
+
+FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
+
+
+def iter_export(file_format='csv', chunk_size=DEFAULT_CHUNK_SIZE, **filters):
+    """
+    Yield the export line by line.
+
+    Rows are read with ``iterator()``, a server-side cursor on PostgreSQL,
+    ``chunk_size`` at a time, so memory use does not depend on the number
+    of orders exported.
+    """
+    encode, _ = FORMATS[file_format]
+    return encode(export_queryset(**filters).iterator(chunk_size=chunk_size))
+
+
+async def aiter_export(file_format='csv', chunk_size=DEFAULT_CHUNK_SIZE, **filters):
+    """
+    Yield the export ``chunk_size`` lines at a time, for ASGI, which reads a
+    sync iterator to the end before sending any of it.
+
+    The lines come from ``iter_export()`` run in the thread of the request's
+    sync code, which its database connection and cursor belong to.
+    """
+    lines = iter_export(file_format, chunk_size, **filters)
+    next_chunk = sync_to_async(lambda: ''.join(itertools.islice(lines, chunk_size)))
+    while True:
+        chunk = await next_chunk()
+        if not chunk:
+            return
+        yield chunk
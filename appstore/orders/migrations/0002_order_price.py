@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:10
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_prices_and_counters(apps, schema_editor):
+    """
+    Take the current app price as the price of existing orders, then
+    count the purchases and revenue of every app.
+    """
+    App = apps.get_model('apps', 'App')
+    Order = apps.get_model('orders', 'Order')
+
+    Order.objects.update(price=Subquery(App.objects.filter(pk=OuterRef('app_id')).values('price')[:1]))
+
+    orders = Order.objects.filter(app=OuterRef('pk')).order_by().values('app')
+    App.objects.update(
+        purchase_count=Coalesce(Subquery(orders.annotate(count=Count('pk')).values('count')), 0),
+        revenue=Coalesce(
+            Subquery(orders.annotate(total=Sum('price')).values('total')),
+            Value(Decimal('0')),
+            output_field=models.DecimalField(max_digits=14, decimal_places=2),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0008_app_purchase_counters_top_app'),
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_prices_and_counters, migrations.RunPython.noop),
+    ]
@@ -1,18 +1,127 @@
+import datetime
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import connections, models, router, transaction
 from apps.models import App
+from core import outbox
+
+
+class OrderQuerySet(models.QuerySet):
+    def place(self, owner, app_id, idempotency_key=None):
+        """
+        Buy the app ``app_id`` for owner and return ``(order, created)``.
+
+        The app is checked to be verified and the order inserted by a single
+        ``INSERT ... SELECT ... ON CONFLICT DO NOTHING``, so concurrent
+        requests can neither insert the order twice nor buy an app whose
+        status just changed. A retry with the same ``idempotency_key``, or a
+        second purchase of the app, gets the existing order back instead: on
+        PostgreSQL from the same statement. ``order`` is None when the app
+        does not exist or is not verified.
+
+        The statement bypasses ``save()`` and its signals, so the purchase
+        counters of the app are updated here, and an ``order.placed`` event
+        is added to the outbox in the same transaction.
+        """
+        using = self._db or router.db_for_write(self.model)
+        params = {
+            'owner': owner.pk,
+            'app': app_id,
+            'key': idempotency_key,
+            'date': datetime.date.today(),
+            'verified': App.STATUS_VERIFIED,
+        }
+        with transaction.atomic(using=using):
+            orders = list(self.raw(self._place_sql(connections[using].vendor), params, using=using))
+            if not orders:
+                # Not purchasable, or bought by a concurrent request since the statement started.
+                existing = models.Q(app_id=app_id)
+                if idempotency_key is not None:
+                    existing |= models.Q(idempotency_key=idempotency_key)
+                orders = list(self.using(using).filter(existing, owner=owner))
+                for order in orders:
+                    order.placed = False
+            order = self._pick(orders, app_id, idempotency_key)
+            created = order is not None and bool(order.placed)
+            if created:
+                App.objects.using(using).count_purchases({order.app_id: order.price})
+                outbox.publish(Order.TOPIC_PLACED, order.event_payload(), using=using)
+        return order, created
+
+    @staticmethod
+    def _pick(orders, app_id, idempotency_key):
+        """Return the new order, else the order of the idempotency key, else the earlier order of the app."""
+        for matches in (
+            lambda order: order.placed,
+            lambda order: idempotency_key is not None and order.idempotency_key == idempotency_key,
+            lambda order: order.app_id == app_id,
+        ):
+            for order in orders:
+                if matches(order):
+                    return order
+        return None
+
+    @staticmethod
+    def _place_sql(vendor):
+        columns = 'id, owner_id, app_id, purchase_date, price, idempotency_key'
+        insert = f"""
+            INSERT INTO {Order._meta.db_table} (owner_id, app_id, purchase_date, price, idempotency_key)
+            SELECT %(owner)s, id, %(date)s, price, %(key)s FROM {App._meta.db_table}
+            WHERE id = %(app)s AND verification_status = %(verified)s
+            ON CONFLICT DO NOTHING
+        """
+        if vendor != 'postgresql':
+            return f'{insert} RETURNING {columns}, TRUE AS placed'
+        # The SELECT reads the snapshot the statement started with, so it
+        # finds the earlier orders but never the one the INSERT adds.
+        return f"""
+            WITH new_order AS ({insert} RETURNING {columns})
+            SELECT {columns}, TRUE AS placed FROM new_order
+            UNION ALL
+            SELECT {columns}, FALSE AS placed FROM {Order._meta.db_table}
+            WHERE owner_id = %(owner)s AND (app_id = %(app)s OR idempotency_key = %(key)s)
+        """
 
 
 class Order(models.Model):
+    # Outbox topic of new orders, see core/outbox.py.
+    TOPIC_PLACED = 'order.placed'
+
     owner = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name='user_orders')
     app = models.ForeignKey(App, on_delete=models.CASCADE, related_name='orders')
     purchase_date = models.DateField(auto_now_add=True)
+    # Price paid, so that deleting the order takes back the right revenue.
+    price = models.DecimalField(max_digits=10, decimal_places=2, editable=False)
+    # Idempotency-Key of the request that placed the order, see OrderQuerySet.place().
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True, editable=False)
+
+    objects = OrderQuerySet.as_manager()
 
     class Meta:
         ordering = ['-purchase_date']
         constraints = [
-            models.UniqueConstraint(fields=['owner', 'app'], name='unique_owner_app_order')
+            models.UniqueConstraint(fields=['owner', 'app'], name='unique_owner_app_order'),
+            models.UniqueConstraint(fields=['owner', 'idempotency_key'], name='unique_owner_idempotency_key'),
         ]
 
+    def save(self, *args, **kwargs):
+        if self.price is None:
+            self.price = self.app.price
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        # The post_save handlers count the purchase and publish its event,
+        # which must be committed along with the order.
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Order, instance=self)):
+            super().save(*args, **kwargs)
+
+    def event_payload(self):
+        return {
+            'order': self.pk,
+            'owner': self.owner_id,
+            'app': self.app_id,
+            'price': str(self.price),
+            'purchase_date': self.purchase_date.isoformat(),
+        }
+
     def __str__(self):
         return f"{self.owner.email} purchased the app '{self.app.title}'"
@@ -1,22 +1,157 @@
-from rest_framework import serializers
+from django.db import IntegrityError, transaction
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
 
 from apps.models import App
+from core import outbox
+from core.profiling import ProfiledSerializerMixin
+from .export import FORMATS
 from .models import Order
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used to buy another app.'
+    default_code = 'idempotency_key_reused'
+
+
+class OrderSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Order
-        fields = ['id', 'owner', 'app', 'purchase_date']
-        read_only_fields = ['id', 'owner', 'purchase_date']
+        fields = ['id', 'owner', 'app', 'purchase_date', 'price']
+        read_only_fields = ['id', 'owner', 'purchase_date', 'price']
 
-    def create(self, validated_data):
-        """Ensure the app is verified before allowing it to be purchased."""
-        app = validated_data.get('app')
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.instance is None:
+            # Order.objects.place() checks the app exists and is verified in the
+            # INSERT itself, so it is not looked up beforehand.
+            fields['app'] = serializers.IntegerField(source='app_id', min_value=1)
+        else:
+            # The purchase counters and the price paid belong to the app
+            # bought, so an order can not be moved to another one.
+            fields['app'] = serializers.PrimaryKeyRelatedField(read_only=True)
+        return fields
 
-        # Check if the app is verified
-        if app.verification_status != App.STATUS_VERIFIED:
+    def create(self, validated_data):
+        """
+        Buy the app if it is verified. A retry, or a second purchase of the
+        same app, returns the existing order and sets ``created`` to False.
+        """
+        app_id = validated_data['app_id']
+        order, self.created = Order.objects.place(
+            validated_data['owner'], app_id, validated_data.get('idempotency_key'),
+        )
+        if order is None:
+            if not App.objects.filter(pk=app_id).exists():
+                raise serializers.ValidationError({'app': [f'Invalid pk "{app_id}" - object does not exist.']})
             raise serializers.ValidationError("This app cannot be purchased until it is verified.")
+        if order.app_id != app_id:
+            raise IdempotencyKeyReused()
+        return order
+
+
+class BulkOrderSerializer(serializers.Serializer):
+    """Place orders for several apps in one request."""
+    STATUS_CREATED = 'created'
+    STATUS_ALREADY_PURCHASED = 'already_purchased'
+    STATUS_DUPLICATE = 'duplicate'
+    STATUS_NOT_VERIFIED = 'not_verified'
+    STATUS_NOT_FOUND = 'not_found'
+
+    apps = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
+
+    def create(self, validated_data):
+        """
+        Validate every app with one query and insert the orders with one
+        ``bulk_create``, all inside a single transaction.
+
+        Returns one result per requested app id, in request order.
+        """
+        owner = validated_data['owner']
+        app_ids = validated_data['apps']
+
+        with transaction.atomic():
+            apps = App.objects.only('id', 'verification_status', 'price').in_bulk(set(app_ids))
+            purchased = set(
+                Order.objects.filter(owner=owner, app_id__in=apps).values_list('app_id', flat=True)
+            )
+
+            results = []
+            seen = set()
+            for app_id in app_ids:
+                if app_id in seen:
+                    item_status = self.STATUS_DUPLICATE
+                elif app_id not in apps:
+                    item_status = self.STATUS_NOT_FOUND
+                elif apps[app_id].verification_status != App.STATUS_VERIFIED:
+                    item_status = self.STATUS_NOT_VERIFIED
+                elif app_id in purchased:
+                    item_status = self.STATUS_ALREADY_PURCHASED
+                else:
+                    item_status = self.STATUS_CREATED
+                seen.add(app_id)
+                results.append({'app': app_id, 'status': item_status, 'order': None})
+
+            new_orders = [
+                Order(owner=owner, app_id=item['app'], price=apps[item['app']].price)
+                for item in results if item['status'] == self.STATUS_CREATED
+            ]
+            inserted = self.insert_orders(new_orders)
+            App.objects.count_purchases({order.app_id: order.price for order in inserted})
+            outbox.publish_many(Order.TOPIC_PLACED, [order.event_payload() for order in inserted])
+
+            inserted_app_ids = {order.app_id for order in inserted}
+            order_ids = dict(
+                Order.objects.filter(owner=owner, app_id__in=apps).values_list('app_id', 'id')
+            )
+            for item in results:
+                if item['status'] == self.STATUS_CREATED and item['app'] not in inserted_app_ids:
+                    item['status'] = self.STATUS_ALREADY_PURCHASED
+                if item['status'] != self.STATUS_NOT_FOUND:
+                    item['order'] = order_ids.get(item['app'])
+
+        return results
+
+    def insert_orders(self, orders):
+        """
+        Insert orders with one ``bulk_create`` and return the ones inserted.
+
+        A concurrent request may have bought one of the apps since they were
+        checked. The batch then violates unique_owner_app_order and the orders
+        are inserted one by one instead, skipping the ones already bought, so
+        that only rows this request inserted are counted as purchases.
+        """
+        if not orders:
+            return []
+        try:
+            with transaction.atomic():
+                return Order.objects.bulk_create(orders)
+        except IntegrityError:
+            inserted = []
+            for order in orders:
+                try:
+                    with transaction.atomic():
+                        Order.objects.bulk_create([order])
+                except IntegrityError:
+                    continue
+                inserted.append(order)
+            return inserted
+
+
+class OrderExportSerializer(serializers.Serializer):
+    """Validate the query parameters of the order export."""
+    output = serializers.ChoiceField(choices=sorted(FORMATS), default='csv')
+    since_id = serializers.IntegerField(min_value=0, required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
 
-        # Proceed with creating the order
-        return super().create(validated_data)
+    def validate(self, attrs):
+        date_from, date_to = attrs.get('date_from'), attrs.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise serializers.ValidationError({'date_to': 'Must not be earlier than date_from.'})
+        return attrs
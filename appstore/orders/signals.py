@@ -0,0 +1,30 @@
+"""
+Signals and signal handlers for the order models.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.models import App
+from core import outbox
+
+
+@receiver(post_save, sender='orders.Order')
+def count_purchase(sender, instance, created, **kwargs):
+    if created:
+        App.objects.count_purchases({instance.app_id: instance.price})
+
+
+@receiver(post_save, sender='orders.Order')
+def publish_placed(sender, instance, created, using=None, **kwargs):
+    # Orders saved by the admin or the shell; place() and the bulk purchase
+    # insert without save() and publish their own events.
+    if created:
+        outbox.publish(sender.TOPIC_PLACED, instance.event_payload(), using=using)
+
+
+@receiver(post_delete, sender='orders.Order')
+def uncount_purchase(sender, instance, origin=None, **kwargs):
+    # Orders deleted along with their app have no counter left to update.
+    if isinstance(origin, App) or getattr(origin, 'model', None) is App:
+        return
+    App.objects.count_purchases({instance.app_id: instance.price}, delta=-1)
@@ -1,15 +1,35 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import date
+from functools import partial
 from decimal import Decimal
+from unittest import SkipTest
+from unittest.mock import Mock, patch
+
+from django.core.management import call_command
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
 from .models import Order, App
-from .serializers import OrderSerializer
+from core.models import OutboxEvent
+from core.outbox import OutboxWorker, consumers
+from .export import DEFAULT_CHUNK_SIZE, aiter_export
+from .serializers import BulkOrderSerializer, OrderSerializer
 from django.urls import reverse
-from django.test import TestCase
+from django.db import connection, connections
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
 
 ORDERS_URL = reverse('order:order-list')
+BULK_ORDERS_URL = reverse('order:order-bulk')
+EXPORT_URL = reverse('order:order-export')
 
 
 def detail_url(order_id):
@@ -137,6 +157,54 @@ class OrderAPITests(APITestCase):
         self.assertTrue(Order.objects.filter(id=self.order.id).exists())
 
 
+class OrderConditionalGetTests(APITestCase):
+    """Test ETag validators on the order endpoints."""
+
+    def setUp(self):
+        self.user = create_user(email="user@example.com", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.app = create_app(owner=self.user)
+        self.order = create_order(owner=self.user, app=self.app)
+
+    def test_list_not_modified(self):
+        """Test a matching If-None-Match gets a 304 from a single aggregate query."""
+        etag = self.client.get(ORDERS_URL)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(ORDERS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_changes_with_new_order(self):
+        """Test a new order invalidates the list ETag."""
+        etag = self.client.get(ORDERS_URL)['ETag']
+        create_order(owner=self.user, app=create_app(owner=self.user, title='Second App'))
+
+        response = self.client.get(ORDERS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    def test_list_etag_differs_between_users(self):
+        """Test users never share a list ETag."""
+        etag = self.client.get(ORDERS_URL)['ETag']
+        other_user = create_user(email="other@example.com", password="password123")
+        create_order(owner=other_user, app=self.app)
+        self.client.force_authenticate(user=other_user)
+
+        response = self.client.get(ORDERS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_not_modified(self):
+        """Test the order detail honours If-None-Match."""
+        etag = self.client.get(detail_url(self.order.id))['ETag']
+
+        response = self.client.get(detail_url(self.order.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
 class AppPurchasabilityTest(TestCase):
 
     def setUp(self):
@@ -187,3 +255,497 @@ class AppPurchasabilityTest(TestCase):
 
         # Check that no order was created
         self.assertFalse(Order.objects.filter(app=self.app_pending).exists())
+
+
+class BulkOrderAPITests(APITestCase):
+    """Test placing several orders in one request."""
+
+    def setUp(self):
+        self.user = create_user(email="user@example.com", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.apps = [create_app(owner=self.user, title=f'Bundle App {i}') for i in range(3)]
+
+    def test_bulk_create_orders(self):
+        """Test every verified app in the bundle is bought in a fixed number of queries."""
+        payload = {'apps': [app.id for app in self.apps]}
+
+        with self.assertNumQueries(10):
+            response = self.client.post(BULK_ORDERS_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.filter(owner=self.user).count(), 3)
+        for app, item in zip(self.apps, response.data['results']):
+            self.assertEqual(item['app'], app.id)
+            self.assertEqual(item['status'], 'created')
+            self.assertEqual(item['order'], Order.objects.get(owner=self.user, app=app).id)
+
+    def test_bulk_reports_each_item(self):
+        """Test unverified, unknown, repeated and already bought apps are reported."""
+        pending = create_app(owner=self.user, title='Pending App', verification_status=App.STATUS_PENDING)
+        existing = create_order(owner=self.user, app=self.apps[1])
+        payload = {'apps': [self.apps[0].id, self.apps[0].id, pending.id, self.apps[1].id, 999999]}
+
+        response = self.client.post(BULK_ORDERS_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item['status'] for item in response.data['results']],
+            ['created', 'duplicate', 'not_verified', 'already_purchased', 'not_found'],
+        )
+        self.assertEqual(response.data['results'][3]['order'], existing.id)
+        self.assertIsNone(response.data['results'][2]['order'])
+        self.assertFalse(Order.objects.filter(app=pending).exists())
+
+    def test_bulk_without_new_orders(self):
+        """Test a bundle that creates nothing answers 200."""
+        create_order(owner=self.user, app=self.apps[0])
+
+        response = self.client.post(BULK_ORDERS_URL, {'apps': [self.apps[0].id]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['status'], 'already_purchased')
+
+    def test_bulk_rejects_empty_list(self):
+        """Test an empty bundle is a validation error."""
+        response = self.client.post(BULK_ORDERS_URL, {'apps': []}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class OrderAdminTests(TestCase):
+    """Test the order admin pages."""
+
+    # Session, user, the two changelist counts and the page itself, plus one
+    # spare; going over means related rows are being fetched one by one.
+    CHANGELIST_QUERY_BUDGET = 6
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='test_password',
+        )
+        self.client.force_login(self.admin_user)
+
+    def create_orders(self, start, stop):
+        for i in range(start, stop):
+            buyer = create_user(email=f'buyer{i}@example.com', password='password123')
+            create_order(owner=buyer, app=create_app(owner=self.admin_user, title=f'Admin App {i}'))
+
+    def get_changelist(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(reverse('admin:orders_order_changelist'), params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, len(queries)
+
+    def test_changelist_within_query_budget(self):
+        """Test the changelist query count stays fixed as orders are added."""
+        self.create_orders(0, 2)
+        _, few = self.get_changelist()
+        self.create_orders(2, 20)
+        res, many = self.get_changelist()
+
+        self.assertContains(res, 'buyer19@example.com')
+        self.assertContains(res, 'Admin App 19')
+        self.assertEqual(many, few)
+        self.assertLessEqual(many, self.CHANGELIST_QUERY_BUDGET)
+
+    def test_changelist_search(self):
+        """Test searching by buyer email and app title."""
+        self.create_orders(0, 3)
+
+        res, _ = self.get_changelist(q='buyer1@')
+        self.assertContains(res, 'buyer1@example.com')
+        self.assertNotContains(res, 'buyer2@example.com')
+
+        res, _ = self.get_changelist(q='Admin App 2')
+        self.assertContains(res, 'buyer2@example.com')
+        self.assertNotContains(res, 'buyer1@example.com')
+
+
+class PurchaseCounterTests(APITestCase):
+    """Test the purchase counters denormalized on apps."""
+
+    def setUp(self):
+        self.user = create_user(email="user@example.com", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.app = create_app(owner=self.user, price=Decimal('2.50'))
+
+    def assertCounters(self, app, purchase_count, revenue):
+        app.refresh_from_db()
+        self.assertEqual(app.purchase_count, purchase_count)
+        self.assertEqual(app.revenue, Decimal(revenue))
+
+    def test_order_counts_purchase(self):
+        """Test buying an app adds one purchase and its price to the app."""
+        response = self.client.post(ORDERS_URL, {'app': self.app.id})
+
+        self.assertEqual(response.data['price'], '2.50')
+        self.assertCounters(self.app, 1, '2.50')
+
+    def test_delete_takes_back_price_paid(self):
+        """Test deleting an order removes the price paid, not the current price."""
+        order = create_order(owner=self.user, app=self.app)
+        App.objects.filter(pk=self.app.pk).update(price=Decimal('9.00'))
+
+        self.client.delete(detail_url(order.id))
+
+        self.assertCounters(self.app, 0, '0.00')
+
+    def test_order_can_not_move_to_another_app(self):
+        """Test an update keeps the app of the order, so deleting it uncounts the right app."""
+        other = create_app(owner=self.user, title='Other App', price=Decimal('1.25'))
+        order = create_order(owner=self.user, app=self.app)
+
+        self.client.patch(detail_url(order.id), {'app': other.id})
+        self.client.put(detail_url(order.id), {'app': other.id})
+        order.refresh_from_db()
+        self.assertEqual(order.app_id, self.app.id)
+
+        response = self.client.delete(detail_url(order.id))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCounters(self.app, 0, '0.00')
+        self.assertCounters(other, 0, '0.00')
+
+    def test_deleting_user_removes_purchases(self):
+        """Test orders deleted along with their owner are uncounted."""
+        other = create_user(email="other@example.com", password="password123")
+        create_order(owner=other, app=self.app)
+        create_order(owner=self.user, app=self.app)
+
+        other.delete()
+
+        self.assertCounters(self.app, 1, '2.50')
+
+    def test_bulk_counts_purchases(self):
+        """Test a bulk order counts each app it bought once."""
+        other = create_app(owner=self.user, title='Other App', price=Decimal('1.25'))
+        create_order(owner=self.user, app=other)
+
+        self.client.post(BULK_ORDERS_URL, {'apps': [self.app.id, self.app.id, other.id]}, format='json')
+
+        self.assertCounters(self.app, 1, '2.50')
+        self.assertCounters(other, 1, '1.25')
+
+    def test_bulk_skips_orders_bought_concurrently(self):
+        """Test orders that lost a race for the unique constraint are not counted."""
+        create_order(owner=self.user, app=self.app)
+        other = create_app(owner=self.user, title='Other App', price=Decimal('1.25'))
+        orders = [
+            Order(owner=self.user, app=self.app, price=self.app.price),
+            Order(owner=self.user, app=other, price=other.price),
+        ]
+
+        inserted = BulkOrderSerializer().insert_orders(orders)
+
+        self.assertEqual([order.app_id for order in inserted], [other.id])
+        self.assertTrue(Order.objects.filter(owner=self.user, app=other).exists())
+
+
+class OrderExportTests(APITestCase):
+    """Test the streaming order export."""
+
+    def setUp(self):
+        self.staff = get_user_model().objects.create_superuser(email='staff@example.com', password='password123')
+        self.client.force_authenticate(user=self.staff)
+        self.buyer = create_user(email="buyer@example.com", password="password123")
+        self.apps = [create_app(owner=self.staff, title=f'App {i}') for i in range(3)]
+        self.orders = [create_order(owner=self.buyer, app=app) for app in self.apps]
+
+    def export(self, **params):
+        response = self.client.get(EXPORT_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_requires_staff(self):
+        """Test regular users cannot export the orders of everyone."""
+        self.client.force_authenticate(user=self.buyer)
+
+        response = self.client.get(EXPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_csv(self):
+        """Test the CSV export joins every order with its app and buyer."""
+        rows = list(csv.reader(io.StringIO(self.export())))
+
+        self.assertEqual(rows[0], ['id', 'purchase_date', 'price', 'app_id', 'app_title', 'owner_id', 'owner_email'])
+        self.assertEqual([int(row[0]) for row in rows[1:]], [order.id for order in self.orders])
+        self.assertEqual(rows[1][4], 'App 0')
+        self.assertEqual(rows[1][6], 'buyer@example.com')
+
+    def test_export_ndjson(self):
+        """Test the NDJSON export writes one object per order."""
+        lines = self.export(output='ndjson').splitlines()
+
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])['app_title'], 'App 0')
+        self.assertEqual(json.loads(lines[0])['price'], '10.00')
+
+    async def test_export_streams_under_asgi(self):
+        """Test the export is streamed by an async iterator, chunk by chunk, under ASGI."""
+        token = await Token.objects.acreate(user=self.staff)
+
+        with patch('orders.views.aiter_export', wraps=partial(aiter_export, chunk_size=2)):
+            response = await AsyncClient().get(
+                EXPORT_URL, {'output': 'ndjson'}, headers={'Authorization': f'Token {token.key}'},
+            )
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+
+        self.assertEqual(len(chunks), 2)
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [order.id for order in self.orders])
+
+    def test_export_since_id(self):
+        """Test an incremental export only contains newer orders."""
+        lines = self.export(output='ndjson', since_id=self.orders[0].id).splitlines()
+
+        self.assertEqual([json.loads(line)['id'] for line in lines], [order.id for order in self.orders[1:]])
+
+    def test_export_date_range(self):
+        """Test the export can be limited to a range of purchase dates."""
+        Order.objects.filter(pk=self.orders[0].pk).update(purchase_date=date(2024, 1, 15))
+
+        lines = self.export(output='ndjson', date_from='2024-01-01', date_to='2024-01-31').splitlines()
+
+        self.assertEqual([json.loads(line)['id'] for line in lines], [self.orders[0].id])
+
+    def test_export_invalid_params(self):
+        """Test invalid parameters are rejected before streaming starts."""
+        response = self.client.get(EXPORT_URL, {'output': 'xml', 'date_from': '2024-02-01', 'date_to': '2024-01-01'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_reads_in_chunks(self):
+        """Test rows are fetched with an iterator instead of a whole queryset."""
+        with patch('django.db.models.query.QuerySet.iterator', autospec=True, return_value=iter([])) as iterator:
+            self.export()
+
+        iterator.assert_called_once()
+        self.assertEqual(iterator.call_args.kwargs['chunk_size'], DEFAULT_CHUNK_SIZE)
+
+    def test_export_command(self):
+        """Test the command writes the same export to a file or to stdout."""
+        out = io.StringIO()
+        call_command('export_orders', '--format', 'ndjson', '--since-id', str(self.orders[1].id), stdout=out)
+
+        self.assertEqual([json.loads(line)['id'] for line in out.getvalue().splitlines()], [self.orders[2].id])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'orders.csv')
+            call_command('export_orders', '--output', path)
+            with open(path, newline='') as export:
+                self.assertEqual(len(list(csv.reader(export))), 4)
+
+
+class AsyncOrderApiTests(TestCase):
+    """Test the async order list."""
+
+    def test_list_matches_sync_list(self):
+        """Test the async list returns the user's orders like the sync one."""
+        user = create_user(email="user@example.com", password="password123")
+        other = create_user(email="other@example.com", password="password123")
+        for i in range(3):
+            create_order(owner=user, app=create_app(owner=other, title=f'App {i}'))
+        create_order(owner=other, app=App.objects.first())
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+
+        res = client.get(reverse('order:async-order-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()), 3)
+        self.assertEqual(res.json(), client.get(ORDERS_URL).json())
+
+
+class IdempotentOrderTests(APITestCase):
+    """Test retried and repeated purchases."""
+
+    def setUp(self):
+        self.user = create_user(email="user@example.com", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.app = create_app(owner=self.user)
+
+    def buy(self, app, key=None):
+        headers = {'Idempotency-Key': key} if key is not None else {}
+        return self.client.post(ORDERS_URL, {'app': app.id}, headers=headers)
+
+    def test_retry_returns_original_order(self):
+        """Test a retry with the same key returns the order it placed, counted once."""
+        first = self.buy(self.app, key='retry-1')
+        retry = self.buy(self.app, key='retry-1')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        self.app.refresh_from_db()
+        self.assertEqual(self.app.purchase_count, 1)
+
+    def test_repeated_purchase_returns_existing_order(self):
+        """Test buying an app twice returns the first order instead of failing."""
+        order = create_order(owner=self.user, app=self.app)
+
+        res = self.buy(self.app)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['id'], order.id)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_for_another_app(self):
+        """Test a key can not be replayed to buy a different app."""
+        other = create_app(owner=self.user, title='Other App')
+        self.buy(self.app, key='retry-1')
+
+        res = self.buy(other, key='retry-1')
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertFalse(Order.objects.filter(app=other).exists())
+
+    def test_invalid_key(self):
+        """Test an overlong key is rejected."""
+        res = self.buy(self.app, key='k' * 256)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_unknown_app(self):
+        """Test buying an app that does not exist is a validation error."""
+        res = self.client.post(ORDERS_URL, {'app': self.app.id + 1})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('app', res.data)
+
+    def test_retry_is_a_single_statement(self):
+        """Test a retry costs no more queries than the purchase itself."""
+        Order.objects.place(self.user, self.app.id, 'retry-1')
+        # SAVEPOINT and RELEASE, around one statement on PostgreSQL and an INSERT and SELECT elsewhere.
+        expected = 3 if connection.vendor == 'postgresql' else 4
+
+        with self.assertNumQueries(expected):
+            order, created = Order.objects.place(self.user, self.app.id, 'retry-1')
+
+        self.assertFalse(created)
+        self.assertEqual(order.idempotency_key, 'retry-1')
+
+
+class OrderOutboxTests(APITestCase):
+    """Test new orders publish an event for the outbox worker."""
+
+    def setUp(self):
+        self.user = create_user(email="user@example.com", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.app = create_app(owner=self.user)
+
+    def test_purchase_publishes_event(self):
+        """Test a purchase adds an order.placed event, but runs no consumer."""
+        consumer = patch.dict(consumers, {Order.TOPIC_PLACED: [Mock()]})
+        with consumer:
+            res = self.client.post(ORDERS_URL, {'app': self.app.id})
+            consumers[Order.TOPIC_PLACED][0].assert_not_called()
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.topic, Order.TOPIC_PLACED)
+        self.assertEqual(event.payload, {
+            'order': res.data['id'],
+            'owner': self.user.id,
+            'app': self.app.id,
+            'price': '10.00',
+            'purchase_date': res.data['purchase_date'],
+        })
+
+    def test_replay_publishes_nothing(self):
+        """Test a retried purchase does not publish a second event."""
+        self.client.post(ORDERS_URL, {'app': self.app.id}, headers={'Idempotency-Key': 'retry-1'})
+        self.client.post(ORDERS_URL, {'app': self.app.id}, headers={'Idempotency-Key': 'retry-1'})
+
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+    def test_rolled_back_purchase_publishes_nothing(self):
+        """Test the order is not placed when its event can not be written."""
+        with patch('core.outbox.publish', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            Order.objects.place(self.user, self.app.id)
+
+        self.assertFalse(Order.objects.exists())
+        self.app.refresh_from_db()
+        self.assertEqual(self.app.purchase_count, 0)
+
+    def test_bulk_publishes_one_event_per_order(self):
+        """Test a bulk purchase publishes an event for each new order only."""
+        other = create_app(owner=self.user, title='Other App')
+        create_order(owner=self.user, app=self.app)
+        OutboxEvent.objects.all().delete()
+
+        self.client.post(BULK_ORDERS_URL, {'apps': [self.app.id, other.id]}, format='json')
+
+        self.assertEqual(
+            [event['app'] for event in OutboxEvent.objects.values_list('payload', flat=True)], [other.id],
+        )
+
+    def test_saved_order_publishes_event(self):
+        """Test an order saved outside of the purchase endpoints, e.g. by the admin, publishes an event once."""
+        order = create_order(owner=self.user, app=self.app)
+        order.save()
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.topic, Order.TOPIC_PLACED)
+        self.assertEqual(event.payload['order'], order.id)
+
+    def test_rolled_back_save_publishes_nothing(self):
+        """Test a saved order is not kept when its event can not be written."""
+        with patch('core.outbox.publish', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            create_order(owner=self.user, app=self.app)
+
+        self.assertFalse(Order.objects.exists())
+
+    def test_worker_logs_receipt(self):
+        """Test draining the outbox logs a receipt for the order."""
+        order, _ = Order.objects.place(self.user, self.app.id)
+
+        with self.assertLogs('orders.receipts', 'INFO') as logs:
+            OutboxWorker().drain()
+
+        self.assertIn(f'Receipt for order {order.id}', logs.output[0])
+
+
+class ConcurrentOrderTests(TransactionTestCase):
+    """Stress the order creation with concurrent double clicks."""
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        # Checked once the test databases are set up: SQLite tests run in
+        # memory unless TEST['NAME'] is set, whatever NAME is.
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise SkipTest('Concurrent writers need a database server or an SQLite file.')
+        super().setUpClass()
+
+    def test_concurrent_purchases_place_one_order(self):
+        """Test concurrent requests for the same app insert and count a single order."""
+        user = create_user(email="user@example.com", password="password123")
+        app = create_app(owner=user)
+        workers = 8
+        barrier = threading.Barrier(workers)
+        results = []
+
+        def buy(index):
+            try:
+                barrier.wait()
+                # Half of the clients retry with a key, the other half click again without one.
+                results.append(Order.objects.place(user, app.id, 'double-click' if index % 2 else None))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buy, args=(index,)) for index in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), workers)
+        self.assertEqual(sum(created for _, created in results), 1)
+        self.assertEqual({order.id for order, _ in results}, {Order.objects.get().id})
+        app.refresh_from_db()
+        self.assertEqual(app.purchase_count, 1)
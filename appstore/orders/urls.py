@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'orders', views.OrderViewSet)
@@ -8,4 +8,5 @@ app_name = 'order'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/orders/', async_views.order_list, name='async-order-list'),
 ]
@@ -1,15 +1,23 @@
-from rest_framework import viewsets
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .export import FORMATS, aiter_export, iter_export
 from .models import Order
-from .serializers import OrderSerializer
-from rest_framework.exceptions import PermissionDenied
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
+from .serializers import BulkOrderSerializer, OrderExportSerializer, OrderSerializer
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
+from core.mixins import ConditionalGetMixin
+from users.authentication import CachedTokenAuthentication
 
-class OrderViewSet(viewsets.ModelViewSet):
+
+class OrderViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -17,9 +25,77 @@ class OrderViewSet(viewsets.ModelViewSet):
         queryset = Order.objects.filter(owner=self.request.user)
         return queryset
 
-    def perform_create(self, serializer):
+    def get_list_validators(self):
+        """
+        Fingerprint the user's orders with a single aggregate query.
+
+        Orders have no modification timestamp and ``purchase_date`` is only a
+        date, so no Last-Modified is sent.
+        """
+        stats = self.get_queryset().aggregate(count=Count('id'), last_id=Max('id'))
+        fingerprint = f"{self.request.user.pk}:{stats['count']}:{stats['last_id']}"
+        return fingerprint, None
+
+    def get_detail_validators(self):
+        pk = self.kwargs[self.lookup_field]
+        if not pk.isdigit():
+            return None
+        row = self.get_queryset().filter(pk=pk).values_list('app_id', 'purchase_date').first()
+        if row is None:
+            return None
+        return f"{self.request.user.pk}:{pk}:{row[0]}:{row[1].isoformat()}", None
+
+    def create(self, request, *args, **kwargs):
+        """
+        Buy an app. Retrying with the same ``Idempotency-Key`` header, or
+        buying an app again, answers 200 with the existing order and an
+        ``Idempotent-Replayed`` header instead of 201.
+        """
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= 255:
+            raise ValidationError({'Idempotency-Key': 'Must be 1 to 255 characters long.'})
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         # Automatically set the owner to the authenticated user
-        serializer.save(owner=self.request.user)
+        serializer.save(owner=request.user, idempotency_key=idempotency_key)
+        if not serializer.created:
+            return Response(serializer.data, headers={'Idempotent-Replayed': 'true'})
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    @action(detail=False, methods=['post'], url_path='bulk', serializer_class=BulkOrderSerializer)
+    def bulk(self, request):
+        """Buy several apps at once, reporting the outcome for each of them."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save(owner=request.user)
+
+        created = any(item['status'] == BulkOrderSerializer.STATUS_CREATED for item in results)
+        return Response(
+            {'results': results},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=['get'], url_path='export', permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Stream every order of every user, joined with its app and buyer, as
+        CSV or NDJSON (``?output=``). Staff only. ``?date_from=`` and
+        ``?date_to=`` bound the purchase date; ``?since_id=`` only exports
+        orders newer than a previous export.
+
+        Under ASGI the export is streamed by an async iterator, a sync one
+        would be read to the end before anything is sent.
+        """
+        params = OrderExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = dict(params.validated_data)
+        file_format = filters.pop('output')
+
+        export = aiter_export if isinstance(request._request, ASGIRequest) else iter_export
+        response = StreamingHttpResponse(export(file_format, **filters), content_type=FORMATS[file_format][1])
+        response['Content-Disposition'] = f'attachment; filename="orders.{file_format}"'
+        return response
 
     def destroy(self, request, *args, **kwargs):
         # Retrieve the order object to check its owner
@@ -0,0 +1,123 @@
+"""
+Authentication classes for the APIs.
+"""
+import copy
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+from core.cache import TieredCache
+from users.tokens import token_issuer
+
+
+class TokenCache:
+    """
+    ``token key -> (user, token)`` cache, kept in the shared cache when the
+    ``SHARED_CACHE`` setting names one and in process otherwise.
+
+    Entries are dropped as soon as the token is deleted or its user is saved
+    (see ``users.signals``). Only the shared cache makes that visible to the
+    other processes, so an entry kept in process is only used once a query
+    has checked that its token still belongs to an active user.
+    """
+
+    def __init__(self, max_entries=10000, ttl=60, shared_cache=None):
+        self.entries = TieredCache(max_entries, ttl, shared_cache)
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'AUTH_TOKEN_CACHE', {})
+        return cls(
+            max_entries=options.get('MAX_ENTRIES', 10000),
+            ttl=options.get('TTL', 60),
+            shared_cache=getattr(settings, 'SHARED_CACHE', None),
+        )
+
+    @staticmethod
+    def _valid(key):
+        return Token.objects.filter(pk=key, user__is_active=True)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None and self.entries.shared is None and not self._valid(key).exists():
+            # Deleted, or its user deactivated, by another process.
+            self.delete(key)
+            return None
+        return entry
+
+    async def aget(self, key):
+        entry = self.entries.get(key)
+        if entry is not None and self.entries.shared is None and not await self._valid(key).aexists():
+            self.delete(key)
+            return None
+        return entry
+
+    def set(self, key, entry):
+        self.entries.set(key, entry)
+
+    def delete(self, key):
+        self.entries.delete(key)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        local = self.entries.local.stats()
+        hits = local['hits'] + self.entries.shared_hits
+        return {
+            'hits': hits,
+            'misses': local['misses'] + self.entries.shared_misses,
+            'size': local['size'],
+            # A hit skips the Token JOIN User query, but in process it runs
+            # the cheaper check instead.
+            'queries_saved': hits if self.entries.shared is not None else 0,
+        }
+
+
+token_cache = TokenCache.from_settings()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` that serves repeat lookups from ``token_cache``."""
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is None:
+            entry = super().authenticate_credentials(key)
+            token_cache.set(key, entry)
+        user, token = entry
+        if token_issuer.is_expired(token):
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        # Hand every request its own instance; the cached one is shared.
+        return copy.copy(user), token
+
+
+async def aauthenticate(request):
+    """
+    Async counterpart of ``CachedTokenAuthentication`` for plain Django async
+    views: return the active user of the request's ``Token`` header, or None.
+    """
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != b'token':
+        return None
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        return None
+
+    entry = await token_cache.aget(key)
+    if entry is None:
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            return None
+        if not token.user.is_active:
+            return None
+        entry = (token.user, token)
+        token_cache.set(key, entry)
+    if token_issuer.is_expired(entry[1]):
+        return None
+    return copy.copy(entry[0])
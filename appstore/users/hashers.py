@@ -0,0 +1,36 @@
+"""
+Password hashers whose cost is tuned with the ``PASSWORD_HASHING`` setting.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher
+
+
+def _cost(name, default):
+    """Class attribute read from ``PASSWORD_HASHING[name]`` on every use."""
+    return property(lambda self: getattr(settings, 'PASSWORD_HASHING', {}).get(name, default))
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = _cost('PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = _cost('ARGON2_TIME_COST', Argon2PasswordHasher.time_cost)
+    memory_cost = _cost('ARGON2_MEMORY_COST', Argon2PasswordHasher.memory_cost)
+    parallelism = _cost('ARGON2_PARALLELISM', Argon2PasswordHasher.parallelism)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = _cost('SCRYPT_WORK_FACTOR', ScryptPasswordHasher.work_factor)
+    block_size = _cost('SCRYPT_BLOCK_SIZE', ScryptPasswordHasher.block_size)
+    parallelism = _cost('SCRYPT_PARALLELISM', ScryptPasswordHasher.parallelism)
+
+    @property
+    def maxmem(self):
+        # scrypt needs 128 * n * r * p bytes, above OpenSSL's 32 MiB default for larger costs.
+        return 2 * 128 * self.work_factor * self.block_size * self.parallelism
+
+
+def hashers_for(profile):
+    """Return the ``PASSWORD_HASHERS`` of profile, see ``PASSWORD_HASHER_PROFILES``."""
+    return settings.PASSWORD_HASHER_PROFILES[profile]
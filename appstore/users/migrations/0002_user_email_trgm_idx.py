@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def create_email_trigram_index(apps, schema_editor):
+    """
+    Trigram index for the admin searches on ``email`` and ``owner__email``,
+    built on the same UPPER() expression as ``app_title_trgm_idx``.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS user_email_trgm_idx '
+        'ON users_user USING gin ((UPPER(email::text)) gin_trgm_ops)'
+    )
+
+
+def drop_email_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS user_email_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_trigram_index, drop_email_trigram_index),
+    ]
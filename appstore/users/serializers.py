@@ -8,8 +8,11 @@ from django.contrib.auth import (
 from django.utils.translation import gettext as _
 from rest_framework import serializers
 
+from core.profiling import ProfiledSerializerMixin
+from users.throttling import login_failures
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
         fields = ['email', 'password', 'name']
@@ -43,14 +46,20 @@ class AuthTokenSerializer(serializers.Serializer):
         """Validate and authenticate the user."""
         email = attrs.get('email')
         password = attrs.get('password')
+        request = self.context.get('request')
         user = authenticate(
-            request=self.context.get('request'),
+            request=request,
             username=email,
             password=password,
         )
         if not user:
+            if request is not None:
+                login_failures.record(request, email)
             msg = _('Unable to authenticate with provided credentials.')
             raise serializers.ValidationError(msg, code='authorization')
 
+        if request is not None:
+            login_failures.reset(request, email)
+
         attrs['user'] = user
         return attrs
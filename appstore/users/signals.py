@@ -0,0 +1,25 @@
+"""
+Signal handlers for the user models.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users.authentication import token_cache
+from users.tokens import token_issuer
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    token_cache.delete(instance.key)
+    token_issuer.forget(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_tokens_of_saved_user(sender, instance, created, **kwargs):
+    """Re-read deactivated or otherwise changed users on their next request."""
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        token_cache.delete(key)
@@ -1,12 +1,27 @@
 """
 Test For User Model
 """
-from django.test import TestCase
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.utils.timezone import now
 from django.urls import reverse
 from django.test import Client
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from users.authentication import TokenCache, token_cache
+from users.hashers import hashers_for
+from users.throttling import login_failures
+from users.tokens import TokenIssuer, token_issuer
 
 CREATE_USER_URL = reverse('users:create')
 TOKEN_URL = reverse('users:token')
@@ -100,6 +115,7 @@ class UserApiTests(TestCase):
 
     def setUp(self):
         """Create user and client."""
+        token_issuer.clear()
         self.client = APIClient()
 
     def test_create_user(self):
@@ -229,3 +245,349 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test the cached token authentication backend."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'token-cache-tests'},
+    })
+    def test_repeated_requests_skip_token_lookup(self):
+        """Test with a shared cache only the first request looks the token up in the database."""
+        caches['shared'].clear()
+        with patch.object(token_cache.entries, 'shared_cache_alias', 'shared'):
+            with CaptureQueriesContext(connection) as first:
+                self.client.get(PROFILE_URL)
+            with CaptureQueriesContext(connection) as second:
+                res = self.client.get(PROFILE_URL)
+            saved = token_cache.stats()['queries_saved']
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(second), len(first) - 1)
+        self.assertEqual(saved, 1)
+
+    def test_cached_token_is_checked_in_process(self):
+        """Test without a shared cache a cached token is checked to be valid, with a lighter query."""
+        self.client.get(PROFILE_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(queries[0]['sql'].startswith('SELECT 1 AS "a" FROM "authtoken_token"'))
+
+    def test_user_deactivated_elsewhere_is_rejected(self):
+        """Test a user deactivated by another process, which evicted nothing here, stops authenticating."""
+        self.client.get(PROFILE_URL)
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+        res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_is_rejected(self):
+        """Test a deleted token stops authenticating right away."""
+        self.client.get(PROFILE_URL)
+        self.token.delete()
+
+        res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """Test a deactivated user stops authenticating right away."""
+        self.client.get(PROFILE_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_user_is_reloaded(self):
+        """Test changes to the user are visible on the next request."""
+        self.client.get(PROFILE_URL)
+        self.user.name = 'Renamed'
+        self.user.save()
+
+        res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.data['name'], 'Renamed')
+
+    def test_expired_entries_are_reloaded(self):
+        """Test entries older than the TTL are looked up again."""
+        cache = TokenCache(max_entries=10, ttl=60)
+        cache.set('key', 'entry')
+
+        with patch('core.cache.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(cache.get('key'))
+
+    def test_cache_is_size_bounded(self):
+        """Test the least recently used entries are evicted."""
+        cache = TokenCache(max_entries=2, ttl=60)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+
+        self.assertEqual(cache.stats()['size'], 2)
+        self.assertIsNone(cache.get('a'))
+
+
+# Low costs, to keep the tests fast.
+FAST_HASHING = {
+    'ARGON2_TIME_COST': 1,
+    'ARGON2_MEMORY_COST': 1024,
+    'ARGON2_PARALLELISM': 1,
+    'SCRYPT_WORK_FACTOR': 2 ** 8,
+    'PBKDF2_ITERATIONS': 1000,
+}
+
+
+@override_settings(PASSWORD_HASHERS=hashers_for('argon2'), PASSWORD_HASHING=FAST_HASHING)
+class PasswordHashingTests(TestCase):
+    """Test the password hasher profiles."""
+
+    def setUp(self):
+        login_failures.clear()
+        token_issuer.clear()
+        self.client = APIClient()
+
+    def login(self, email, password):
+        return self.client.post(TOKEN_URL, {'email': email, 'password': password})
+
+    def test_profile_hashes_new_passwords(self):
+        """Test new passwords are hashed with the costs of the profile."""
+        user = create_user(email='test@example.com', password='test-password123')
+
+        self.assertTrue(user.password.startswith('argon2$argon2id$v=19$m=1024,t=1,p=1$'))
+
+    def test_profiles_verify_each_other(self):
+        """Test each profile hashes with its own hasher and verifies the hashes of the others."""
+        profiles = settings.PASSWORD_HASHER_PROFILES
+        for profile, hashers in profiles.items():
+            self.assertIn(profile, hashers[0].lower())
+            self.assertEqual(sorted(hashers), sorted(profiles['argon2']))
+
+    def test_other_profile_is_upgraded_on_login(self):
+        """Test a hash of another profile is verified and replaced on login."""
+        with override_settings(PASSWORD_HASHERS=hashers_for('pbkdf2')):
+            user = create_user(email='test@example.com', password='test-password123')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+        res = self.login('test@example.com', 'test-password123')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('argon2$'))
+
+    def test_cost_change_is_upgraded_on_login(self):
+        """Test raising the cost of a profile rehashes the password on login."""
+        with override_settings(PASSWORD_HASHERS=hashers_for('scrypt')):
+            user = create_user(email='test@example.com', password='test-password123')
+            with override_settings(PASSWORD_HASHING={**FAST_HASHING, 'SCRYPT_WORK_FACTOR': 2 ** 9}):
+                self.login('test@example.com', 'test-password123')
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$512$'))
+
+
+class LoginThrottleTests(TestCase):
+    """Test repeated failed logins are refused without hashing."""
+
+    def setUp(self):
+        login_failures.clear()
+        token_issuer.clear()
+        self.client = APIClient()
+        create_user(email='test@example.com', password='test-password123')
+
+    def login(self, password, email='test@example.com', **extra):
+        return self.client.post(TOKEN_URL, {'email': email, 'password': password}, **extra)
+
+    def fail(self, times, email='test@example.com', **extra):
+        for _ in range(times):
+            self.assertEqual(self.login('wrong-password', email, **extra).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_email_is_blocked_after_failures(self):
+        """Test an email is refused, even with the right password, once blocked."""
+        self.fail(login_failures.max_failures)
+
+        with patch('users.serializers.authenticate') as authenticate:
+            res = self.login('test-password123')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], str(login_failures.window))
+        authenticate.assert_not_called()
+        self.assertEqual(self.login('test-password123', email='other@example.com').status_code, 400)
+
+    def test_email_is_blocked_for_the_failing_client_only(self):
+        """Test failures from another address do not lock the user out."""
+        self.fail(login_failures.max_failures)
+
+        res = self.login('test-password123', REMOTE_ADDR='10.0.0.2')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.login('test-password123').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forwarded_for_is_not_trusted(self):
+        """Test a client can not dodge the block by making up X-Forwarded-For addresses."""
+        for index in range(login_failures.max_failures):
+            self.fail(1, HTTP_X_FORWARDED_FOR=f'203.0.113.{index}')
+
+        res = self.login('test-password123', HTTP_X_FORWARDED_FOR='203.0.113.99')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_email_is_blocked_across_addresses(self):
+        """Test failures for an email from many addresses add up to a block for every address."""
+        per_address = login_failures.max_failures - 1
+        for index in range(-(-login_failures.max_failures_per_email // per_address)):
+            self.fail(per_address, REMOTE_ADDR=f'10.0.1.{index}')
+
+        res = self.login('test-password123', REMOTE_ADDR='10.0.2.1')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_success_resets_failures(self):
+        """Test a successful login clears the failures of its email."""
+        self.fail(login_failures.max_failures - 1)
+        self.assertEqual(self.login('test-password123').status_code, status.HTTP_200_OK)
+
+        self.fail(login_failures.max_failures - 1)
+
+        self.assertEqual(self.login('test-password123').status_code, status.HTTP_200_OK)
+
+    def test_client_is_blocked_after_failures(self):
+        """Test a client address is blocked after failing with many emails."""
+        for index in range(login_failures.max_failures_per_ip // login_failures.max_failures):
+            self.fail(login_failures.max_failures, email=f'user{index}@example.com')
+
+        res = self.login('test-password123')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_failures_expire(self):
+        """Test the block is lifted once the window has passed."""
+        self.fail(login_failures.max_failures)
+
+        with patch('core.cache.time.monotonic', return_value=time.monotonic() + login_failures.window + 1):
+            res = self.login('test-password123')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class TokenIssuanceTests(TestCase):
+    """Test logins reuse, expire and rotate tokens without writing each time."""
+
+    def setUp(self):
+        login_failures.clear()
+        token_issuer.clear()
+        token_cache.clear()
+        self.user = create_user(email='test@example.com', password='test-password123')
+        self.client = APIClient()
+
+    def login(self):
+        res = self.client.post(TOKEN_URL, {'email': 'test@example.com', 'password': 'test-password123'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data['token']
+
+    def test_repeat_login_does_not_write(self):
+        """Test a repeat login reuses the cached token, checked to exist, and writes nothing."""
+        first = self.login()
+        with CaptureQueriesContext(connection) as captured:
+            second = self.login()
+
+        self.assertEqual(first, second)
+        self.assertEqual(Token.objects.filter(user=self.user).count(), 1)
+        self.assertEqual([query['sql'].split()[0] for query in captured], ['SELECT', 'SELECT'])
+
+    def test_last_login_is_coalesced(self):
+        """Test last_login is only written again once the interval has passed."""
+        self.login()
+        self.user.refresh_from_db()
+        stamp = self.user.last_login
+        self.assertIsNotNone(stamp)
+
+        self.login()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, stamp)
+
+        later = now() + token_issuer.last_login_interval + timedelta(seconds=1)
+        with patch('users.tokens.now', return_value=later):
+            self.login()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, later)
+
+    def test_stale_last_login_is_not_written_twice(self):
+        """Test a concurrent login that already stored last_login is not overwritten."""
+        user = get_user_model().objects.get(pk=self.user.pk)
+        stamp = now()
+        token_issuer.touch_last_login(self.user, stamp)
+
+        with CaptureQueriesContext(connection) as captured:
+            token_issuer.touch_last_login(user, stamp + timedelta(seconds=1))
+
+        self.assertEqual(len(captured), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, stamp)
+
+    def test_expired_token_is_rejected_and_rotated(self):
+        """Test a token past its lifetime is refused and replaced at login."""
+        key = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        self.assertEqual(self.client.get(PROFILE_URL).status_code, status.HTTP_200_OK)
+
+        later = now() + timedelta(hours=2)
+        with patch.object(token_issuer, 'lifetime', timedelta(hours=1)), \
+                patch('users.tokens.now', return_value=later):
+            res = self.client.get(PROFILE_URL)
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+            self.client.credentials()
+            new_key = self.login()
+
+        self.assertNotEqual(new_key, key)
+        self.assertEqual(list(Token.objects.filter(user=self.user).values_list('key', flat=True)), [new_key])
+
+    def test_deleted_token_is_not_handed_out(self):
+        """Test a login after the token was deleted creates a new one."""
+        key = self.login()
+        Token.objects.get(key=key).delete()
+
+        self.assertNotEqual(self.login(), key)
+
+    def test_token_deleted_by_another_worker_is_not_handed_out(self):
+        """Test a token cached in process is not handed out once another worker deleted it."""
+        key = self.login()
+        # The signal only reaches the cache of the worker that deletes.
+        with patch.object(token_issuer, 'forget'):
+            Token.objects.filter(key=key).delete()
+
+        new_key = self.login()
+
+        self.assertNotEqual(new_key, key)
+        self.assertTrue(Token.objects.filter(key=new_key).exists())
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'token-issuer-tests'},
+    })
+    def test_shared_cache_skips_existence_check(self):
+        """Test a token from the shared cache, which deletions reach, is reused without a query."""
+        issuer = TokenIssuer(shared_cache='shared')
+        self.addCleanup(caches['shared'].clear)
+        token = issuer.issue(self.user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(issuer.cached(self.user.pk).key, token.key)
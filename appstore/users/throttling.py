@@ -0,0 +1,101 @@
+"""
+Throttling of repeated failed logins.
+"""
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from core.cache import TieredCache
+
+
+class LoginFailures:
+    """
+    Count the failed logins of every email from every client address, of
+    every email and of every address.
+
+    An email with ``max_failures`` failures from an address is blocked for
+    that address only, so that one client can not lock its user out, and
+    with ``max_failures_per_email`` from any addresses it is blocked for
+    every one, so that rotating addresses does not start the count over. An
+    address with ``max_failures_per_ip`` is blocked for every email. Blocks
+    last until ``window`` seconds have passed without a new failure. A
+    successful login clears the counts of its email.
+
+    Addresses are told apart by ``REMOTE_ADDR``, or by the entry of
+    ``X-Forwarded-For`` added by the last of ``REST_FRAMEWORK['NUM_PROXIES']``
+    trusted proxies, never by what the client sends.
+
+    Counts are kept in an in-process LRU or, if there is one, in the shared
+    cache instead, so that every worker sees the failures of the others.
+    """
+
+    def __init__(self, max_failures=5, max_failures_per_email=20, max_failures_per_ip=50, window=300,
+                 max_entries=100000, shared_cache=None):
+        self.max_failures = max_failures
+        self.max_failures_per_email = max_failures_per_email
+        self.max_failures_per_ip = max_failures_per_ip
+        self.window = window
+        self.counts = TieredCache(max_entries, window, shared_cache)
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'LOGIN_THROTTLE', {})
+        return cls(
+            max_failures=options.get('MAX_FAILURES', 5),
+            max_failures_per_email=options.get('MAX_FAILURES_PER_EMAIL', 20),
+            max_failures_per_ip=options.get('MAX_FAILURES_PER_IP', 50),
+            window=options.get('WINDOW', 300),
+            max_entries=options.get('MAX_ENTRIES', 100000),
+            shared_cache=getattr(settings, 'SHARED_CACHE', None),
+        )
+
+    def limits(self, request, email):
+        """Return the ``(key, limit)`` pairs a login attempt counts against."""
+        address = BaseThrottle().get_ident(request)
+        limits = [(f'login:ip:{address}', self.max_failures_per_ip)]
+        if email:
+            email_key = self.email_key(email)
+            limits.append((f'{email_key}:ip:{address}', self.max_failures))
+            limits.append((email_key, self.max_failures_per_email))
+        return limits
+
+    @staticmethod
+    def email_key(email):
+        return f'login:email:{email.strip().lower()}'
+
+    def is_blocked(self, request, email):
+        return any(self.count(key) >= limit for key, limit in self.limits(request, email))
+
+    def record(self, request, email):
+        for key, _ in self.limits(request, email):
+            self.increment(key)
+
+    def reset(self, request, email):
+        for key, _ in self.limits(request, email)[1:]:
+            self.counts.delete(key)
+
+    def count(self, key):
+        return self.counts.get(key, 0)
+
+    def increment(self, key):
+        self.counts.incr(key)
+
+    def clear(self):
+        self.counts.clear()
+
+
+login_failures = LoginFailures.from_settings()
+
+
+class LoginFailureThrottle(BaseThrottle):
+    """
+    Refuse the login attempts of a blocked email and address, or of a
+    blocked address, before
+    the password is hashed, so bad credentials can not exhaust the CPU.
+    """
+
+    def allow_request(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        return not login_failures.is_blocked(request, email if isinstance(email, str) else None)
+
+    def wait(self):
+        return login_failures.window
@@ -0,0 +1,108 @@
+"""
+Issuance of the auth tokens handed out at login.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils.timezone import now
+from rest_framework.authtoken.models import Token
+
+from core.cache import TieredCache
+
+
+class TokenIssuer:
+    """
+    Hand out the token of a user at login without writing on every login.
+
+    * The token of a user is kept in an in-process LRU, or in the shared
+      cache so that every worker sees the others' tokens, and a repeat
+      login does not look it up again.
+    * ``last_login`` is written at most once every ``last_login_interval``
+      seconds, with an UPDATE that only matches an older value, so
+      concurrent logins of one user write it once.
+    * With a ``lifetime``, tokens older than that many seconds stop
+      authenticating and the next login replaces them with a new one.
+      Checking the age needs no write, ``Token.created`` is read along with
+      the token.
+
+    Deleting a token drops it from the cache (see ``users.signals``).
+    Without a shared cache other workers do not see that, so a token cached
+    in process is checked to still exist, by primary key, before it is
+    handed out.
+    """
+    _prefix = 'auth-token:user:'
+
+    def __init__(self, lifetime=None, last_login_interval=300, ttl=300, max_entries=10000, shared_cache=None):
+        self.lifetime = timedelta(seconds=lifetime) if lifetime else None
+        self.last_login_interval = timedelta(seconds=last_login_interval)
+        self.ttl = ttl
+        self.tokens = TieredCache(max_entries, ttl, shared_cache)
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'AUTH_TOKEN_ISSUANCE', {})
+        return cls(
+            lifetime=options.get('LIFETIME'),
+            last_login_interval=options.get('LAST_LOGIN_INTERVAL', 300),
+            ttl=options.get('TTL', 300),
+            max_entries=options.get('MAX_ENTRIES', 10000),
+            shared_cache=getattr(settings, 'SHARED_CACHE', None),
+        )
+
+    def is_expired(self, token, at=None):
+        return self.lifetime is not None and token.created <= (at or now()) - self.lifetime
+
+    def issue(self, user):
+        """Return the valid token of user, creating or rotating it if needed."""
+        stamp = now()
+        token = self.cached(user.pk)
+        if token is None or self.is_expired(token, stamp):
+            token = self.load(user, stamp)
+            self.remember(user.pk, token)
+        self.touch_last_login(user, stamp)
+        return token
+
+    def load(self, user, stamp):
+        token, created = Token.objects.get_or_create(user=user)
+        if not created and self.is_expired(token, stamp):
+            # A concurrent login may have rotated it already, then the
+            # delete matches nothing and get_or_create returns the new one.
+            Token.objects.filter(pk=token.pk).delete()
+            token, _ = Token.objects.get_or_create(user=user)
+        return token
+
+    def touch_last_login(self, user, stamp):
+        """Store the login time of user, unless the stored one is recent enough."""
+        threshold = stamp - self.last_login_interval
+        if user.last_login is not None and user.last_login > threshold:
+            return
+        # A queryset update sends no post_save, which would drop the cached
+        # credentials of the user (see ``users.signals``).
+        get_user_model().objects.filter(
+            Q(last_login__isnull=True) | Q(last_login__lte=threshold), pk=user.pk,
+        ).update(last_login=stamp)
+        user.last_login = stamp
+
+    def cached(self, user_id):
+        token = self.tokens.get(f'{self._prefix}{user_id}')
+        if token is not None and self.tokens.shared is None and not Token.objects.filter(pk=token.key).exists():
+            # Deleted or rotated by another worker.
+            self.forget(user_id)
+            return None
+        return token
+
+    def remember(self, user_id, token):
+        # Keep only the columns, not the user the token was loaded with.
+        token = Token(key=token.key, user_id=token.user_id, created=token.created)
+        self.tokens.set(f'{self._prefix}{user_id}', token)
+
+    def forget(self, user_id):
+        self.tokens.delete(f'{self._prefix}{user_id}')
+
+    def clear(self):
+        self.tokens.clear()
+
+
+token_issuer = TokenIssuer.from_settings()
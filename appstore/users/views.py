@@ -1,10 +1,14 @@
 from django.contrib.auth import get_user_model
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
+from users.authentication import CachedTokenAuthentication
+from users.throttling import LoginFailureThrottle
+from users.tokens import token_issuer
 from users.serializers import (
     UserSerializer,
     AuthTokenSerializer,
 )
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
 
@@ -16,14 +20,21 @@ class CreateUserView(generics.CreateAPIView):
 class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for user."""
     serializer_class = AuthTokenSerializer
+    throttle_classes = [LoginFailureThrottle]
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        token = token_issuer.issue(serializer.validated_data['user'])
+        return Response({'token': token.key})
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
     queryset = get_user_model().objects.all()
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):